@@ -0,0 +1,70 @@
+import argparse
+import re
+import subprocess
+import tempfile
+import time
+
+from common import build, quiet
+from bench_runtime import ALLOCS_PATTERN
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: peak RSS of string temporaries ===
+#
+# Runs a concatenation loop for a growing number of iterations and records
+# the peak RSS of each run. In "temporaries" every string stays inside the
+# iteration, lives in the arena and is released at the top of the next one,
+# so RSS should stay flat. In "escaping" each iteration's string is kept in
+# a variable declared outside the loop, which copies it into the variable's
+# heap slot; the slot is reused while the string fits, so RSS should stay
+# flat as well and allocations only grow with the longest string. Peak RSS
+# and allocation counts come from bench/runtime/alloc_count.c.
+
+PEAK_RSS_PATTERN = re.compile(r"^FORGE_PEAK_RSS_KB (-?\d+)$", re.M)
+
+PROGRAMS = {
+    "temporaries": """let total = 0
+for let i = 0; i < {n}; i++ {{
+    let line = "item " + string(i) + " of " + string({n})
+    total = total + len(line)
+}}
+print(total)
+""",
+    "escaping": """let total = 0
+let last = ""
+for let i = 0; i < {n}; i++ {{
+    let line = "item " + string(i) + " of " + string({n})
+    total = total + len(line)
+    last = line
+}}
+print(total, last)
+""",
+}
+
+
+def run(executable):
+    # (seconds, peak RSS in KB, heap allocations) of one run
+    start = time.perf_counter()
+    proc = subprocess.run([executable], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    allocs = int(ALLOCS_PATTERN.search(proc.stderr).group(1))
+    return elapsed, int(PEAK_RSS_PATTERN.search(proc.stderr).group(1)), allocs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Peak RSS of a string concatenation loop")
+    ap.add_argument("--iterations", type=int, nargs="+", default=[10000, 100000, 1000000])
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    args = ap.parse_args()
+
+    print(f"{'program':<12} {'iterations':>10} {'ms':>9} {'peak RSS MB':>12} {'allocs':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, program in PROGRAMS.items():
+            for n in args.iterations:
+                elapsed, rss_kb, allocs = run(build(program.format(n=n), workdir, f"{label}-{n}", args.profile, count_allocs=True))
+                print(f"{label:<12} {n:10d} {elapsed * 1000:9.1f} {rss_kb / 1024:12.1f} {allocs:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import tracemalloc
+
+from common import quiet, generate_functions_source, node_fields, is_node, count_nodes
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+
+# === Benchmark: AST memory per node ===
+#
+# Parses a generated program, then rebuilds the same tree twice: once with
+# the real (slotted) node classes and once with plain __dict__ twins of the
+# same classes, which is how the nodes were laid out before. Both copies
+# share leaf values, so the difference is the node representation alone.
+
+_dict_twins = {}
+
+
+def dict_twin(cls):
+    twin = _dict_twins.get(cls)
+    if twin is None:
+        twin = _dict_twins[cls] = type(cls.__name__, (), {})
+    return twin
+
+
+def clone(value, with_dict):
+    if isinstance(value, list):
+        return [clone(v, with_dict) for v in value]
+    if isinstance(value, tuple):
+        return tuple(clone(v, with_dict) for v in value)
+    if not is_node(value):
+        return value
+    cls = dict_twin(type(value)) if with_dict else type(value)
+    copy = cls.__new__(cls)
+    for name, field in node_fields(value):
+        setattr(copy, name, clone(field, with_dict))
+    return copy
+
+
+def measure(fn):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Report AST bytes per node for slotted vs __dict__ nodes")
+    ap.add_argument("--functions", type=int, nargs="+", default=[500, 2000])
+    args = ap.parse_args()
+
+    print(f"{'fns':>6} {'source':>10} {'nodes':>8} {'dict B/node':>12} {'slots B/node':>13} {'saved':>7}")
+    for count in args.functions:
+        source = generate_functions_source(count)
+        with quiet():
+            ast = Parser(Lexer(source).tokenize()).parse()
+        nodes = count_nodes(ast)
+
+        dict_tree, dict_bytes = measure(lambda: clone(ast, with_dict=True))
+        slot_tree, slot_bytes = measure(lambda: clone(ast, with_dict=False))
+
+        print(f"{count:6d} {len(source) / 1024:8.1f}KiB {nodes:8d} "
+              f"{dict_bytes / nodes:12.1f} {slot_bytes / nodes:13.1f} "
+              f"{1 - slot_bytes / dict_bytes:6.1%}")
+        del dict_tree, slot_tree
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import time
+
+from common import quiet, generate_functions_source, count_nodes
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser, CallExpr, Identifier, StringLiteral
+    import transpile_to_c
+    from transpile_to_c import CTranspiler
+
+# === Benchmark: expression dispatch + built-in lookup ===
+#
+# Transpiles a generated program dominated by the nodes that used to sit at
+# the bottom of gen_expr's isinstance chain (BinaryExpr, CallExpr) and by
+# calls to built-ins that used to sit at the bottom of gen_CallExpr.
+
+
+def bench_transpile(source, repeat):
+    with quiet():
+        ast = Parser(Lexer(source).tokenize()).parse()
+    nodes = count_nodes(ast)
+    best = None
+    for _ in range(repeat):
+        with quiet():
+            ast = Parser(Lexer(source).tokenize()).parse()
+            transpiler = CTranspiler()
+            start = time.perf_counter()
+            transpiler.gen_Program(ast)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return nodes, best
+
+
+def bench_builtin_lookup(sizes, calls):
+    # Time a built-in call while the registry is padded with dummy entries
+    registry = getattr(transpile_to_c, "BUILTINS", None)
+    if registry is None:
+        return []
+    node = CallExpr(Identifier("string"), [StringLiteral("x")])
+    results = []
+    for size in sizes:
+        padding = [f"__bench_builtin_{i}" for i in range(size)]
+        for name in padding:
+            registry[name] = registry["string"]
+        transpiler = CTranspiler()
+        transpiler.body_lines = []
+        with quiet():
+            start = time.perf_counter()
+            for _ in range(calls):
+                transpiler.gen_CallExpr(node)
+            elapsed = time.perf_counter() - start
+        for name in padding:
+            del registry[name]
+        results.append((len(registry) + size, elapsed / calls))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark gen_expr dispatch and built-in lookup")
+    ap.add_argument("--functions", type=int, nargs="+", default=[200, 800, 2000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--calls", type=int, default=20000)
+    args = ap.parse_args()
+
+    print("== gen_Program on generated sources ==")
+    for count in args.functions:
+        source = generate_functions_source(count)
+        nodes, elapsed = bench_transpile(source, args.repeat)
+        print(f"{count:6d} fns  {len(source) / 1024:8.1f} KiB  {nodes:8d} nodes  "
+              f"{elapsed * 1000:9.1f} ms  {nodes / elapsed:10.0f} nodes/s")
+
+    results = bench_builtin_lookup([0, 100, 1000, 10000], args.calls)
+    if results:
+        print("== built-in call cost vs registry size ==")
+        for size, per_call in results:
+            print(f"{size:6d} built-ins  {per_call * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import sys
+import time
+
+from common import quiet
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from transpile_to_c import CTranspiler
+
+# === Benchmark: C emission for deeply nested programs ===
+#
+# Generates a program whose blocks nest --depth levels deep (if, while and
+# for in turn, a few statements on every level) and times
+# CTranspiler.gen_Program on it for a range of depths. The number of lines
+# grows linearly with the depth, so linear emission shows up as a roughly
+# flat microseconds-per-line column (a deeper line carries more indentation);
+# emission that copies each nested block into its parent costs more per line
+# the deeper the program goes.
+#
+# The parser and the transpiler recurse once per level, so the recursion
+# limit is raised to fit the deepest program.
+
+
+def nested_source(depth):
+    lines = []
+    for d in range(depth):
+        pad = "    " * d
+        lines.append(f"{pad}let v{d} = {d}")
+        lines.append(f"{pad}print(v{d})")
+        kind = d % 3
+        if kind == 0:
+            lines.append(f"{pad}if v{d} >= 0 {{")
+        elif kind == 1:
+            lines.append(f"{pad}while v{d} < {d + 1} {{")
+        else:
+            lines.append(f"{pad}for let i{d} = 0; i{d} < 2; i{d}++ {{")
+        lines.append(f"{pad}    v{d} = v{d} + 1")
+    for d in reversed(range(depth)):
+        lines.append("    " * d + "}")
+    return "\n".join(lines) + "\n"
+
+
+def best_ms(fn, repeat):
+    # (best milliseconds, last result)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="gen_Program time against block nesting depth")
+    ap.add_argument("--depths", default="25,50,100,200,400", help="comma-separated nesting depths")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    depths = [int(d) for d in args.depths.split(",")]
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 40 * max(depths)))
+
+    print(f"{'depth':>6} {'C lines':>9} {'C KiB':>8} {'codegen ms':>11} {'us/line':>8}")
+    for depth in depths:
+        ast = Parser(Lexer(nested_source(depth)).iter_tokens()).parse()
+        with quiet():
+            ms, c_code = best_ms(lambda: CTranspiler().gen_Program(ast), args.repeat)
+        c_lines = c_code.count("\n") + 1
+        print(f"{depth:6d} {c_lines:9d} {len(c_code) / 1024:8.0f} {ms:11.1f} {ms * 1000 / c_lines:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from common import build, quiet
+from bench_runtime import ALLOCS_PATTERN
+from bench_arena import PEAK_RSS_PATTERN
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: reading a large file ===
+#
+# Generates a log file of --mb megabytes and measures three ways of getting
+# through it from Forge, each printing the number of bytes it saw:
+#
+#   read         read(path): the whole file copied into one heap string
+#   read_mapped  read_mapped(path): the file mapped read-only, no copy
+#   lines        for line in lines(path): one line at a time, one buffer
+#
+# Peak RSS comes from bench/runtime/alloc_count.c. Pages of a mapped file
+# count towards RSS once touched, but they are page cache that the kernel can
+# drop and reload at any time, unlike the heap copy made by read; lines stays
+# flat whatever the file size.
+
+PROGRAMS = {
+    "read": """let text = read("{path}")
+print(len(text))
+""",
+    "read_mapped": """let text = read_mapped("{path}")
+print(len(text))
+unmap(text)
+""",
+    "lines": """let total = 0
+for line in lines("{path}") {{
+    total = total + len(line) + 1
+}}
+print(total)
+""",
+}
+
+
+def write_log(path, megabytes):
+    line = "2024-01-01T00:00:00 INFO request handled in 12 ms by worker 7\n"
+    chunk = line * 1000
+    with open(path, "w") as f:
+        for _ in range(megabytes * 1024 * 1024 // len(chunk) + 1):
+            f.write(chunk)
+    return os.path.getsize(path)
+
+
+def run(executable):
+    # (seconds, bytes seen, peak RSS in KB, heap allocations) of one run
+    start = time.perf_counter()
+    proc = subprocess.run([executable], capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    allocs = int(ALLOCS_PATTERN.search(proc.stderr).group(1))
+    rss_kb = int(PEAK_RSS_PATTERN.search(proc.stderr).group(1))
+    return elapsed, int(proc.stdout.split()[0]), rss_kb, allocs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time and peak RSS of read, read_mapped and lines on a large file")
+    ap.add_argument("--mb", type=int, default=256, help="size of the generated file")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bench.log")
+        size = write_log(path, args.mb)
+        print(f"{size / 1024 / 1024:.0f} MB file")
+        print(f"{'program':<12} {'ms':>9} {'MB/s':>8} {'peak RSS MB':>12} {'allocs':>7}")
+        for label, program in PROGRAMS.items():
+            executable = build(program.format(path=path), workdir, label, args.profile, count_allocs=True)
+            elapsed, seen, rss_kb, allocs = run(executable)
+            note = "" if seen == size else f"  saw {seen} bytes"
+            print(f"{label:<12} {elapsed * 1000:9.1f} {size / elapsed / 1024 / 1024:8.0f} "
+                  f"{rss_kb / 1024:12.1f} {allocs:7d}{note}")
+
+
+if __name__ == "__main__":
+    main()
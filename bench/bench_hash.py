@@ -0,0 +1,106 @@
+import argparse
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from common import build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: SHA-256 throughput ===
+#
+# Generates --mb megabytes of random base64 text (76-character lines) and
+# hashes it with:
+#
+#   hash_file   a Forge program running print(hash_file(path))
+#   Hasher      a Forge program feeding every line of the file to a Hasher
+#               (digest of the file without its newlines, so not compared)
+#   sha256sum   coreutils
+#   hashlib     Python's hashlib, for reference
+#
+# Reports the best of --repeat runs in MB/s and checks that hash_file,
+# sha256sum and hashlib agree on the digest.
+
+PROGRAMS = {
+    "hash_file": """print(hash_file("{path}"))
+""",
+    "Hasher": """let h = Hasher()
+for line in lines("{path}") {{
+    h.update(line)
+}}
+print(h.final())
+""",
+}
+
+
+def write_random(path, megabytes):
+    with open(path, "wb") as f:
+        for _ in range(megabytes):
+            f.write(base64.encodebytes(os.urandom(3 * 1024 * 1024 // 4)))
+    return os.path.getsize(path)
+
+
+def timed(fn, repeat):
+    # (best seconds, digest) of repeat calls; fn returns the hex digest
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        digest = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, digest
+
+
+def run_command(command):
+    proc = subprocess.run(command, capture_output=True, text=True, check=True)
+    return proc.stdout.split()[0]
+
+
+def hashlib_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="SHA-256 throughput of hash_file and Hasher against sha256sum")
+    ap.add_argument("--mb", type=int, default=256, help="size of the generated file")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bench.txt")
+        size = write_random(path, args.mb)
+        print(f"{size / 1024 / 1024:.0f} MB file")
+
+        runs = {}
+        for label, program in PROGRAMS.items():
+            executable = build(program.format(path=path), workdir, label, args.profile, count_allocs=True)
+            runs[label] = lambda executable=executable: run_command([executable])
+        if shutil.which("sha256sum"):
+            runs["sha256sum"] = lambda: run_command(["sha256sum", path])
+        runs["hashlib"] = lambda: hashlib_digest(path)
+
+        print(f"{'hasher':<10} {'ms':>9} {'MB/s':>8}  digest")
+        digests = {}
+        for label, fn in runs.items():
+            elapsed, digest = timed(fn, args.repeat)
+            digests[label] = digest
+            print(f"{label:<10} {elapsed * 1000:9.1f} {size / elapsed / 1024 / 1024:8.0f}  {digest[:16]}")
+
+    compared = {digests[label] for label in ("hash_file", "sha256sum", "hashlib") if label in digests}
+    if len(compared) != 1:
+        raise SystemExit("DIGEST MISMATCH between hash_file, sha256sum and hashlib")
+    print("hash_file digest matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import tempfile
+import time
+
+from common import best_run, build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: removal-heavy loops ===
+#
+# Drops every even number from a list of N ints three ways: .remove(value)
+# per match (a scan plus a shift each time, O(n^2) overall), .swap_remove(i)
+# per match (O(1) each, order not kept) and one .filter_in_place(keep) pass.
+# All three must leave the same count and sum.
+
+PROLOGUE = """fn is_odd(x) -> bool {{
+    return x % 2 == 1
+}}
+let xs = @()
+for let i = 0; i < {n}; i++ {{
+    xs.add(i)
+}}
+"""
+
+EPILOGUE = """let total = 0
+for let i = 0; i < len(xs); i++ {
+    total = total + xs[i]
+}
+print(len(xs), total)
+"""
+
+VARIANTS = {
+    "remove(value)": """let i = 0
+while i < len(xs) {
+    if xs[i] % 2 == 0 {
+        xs.remove(xs[i])
+    } else {
+        i = i + 1
+    }
+}
+""",
+    "swap_remove(i)": """let i = 0
+while i < len(xs) {
+    if xs[i] % 2 == 0 {
+        xs.swap_remove(i)
+    } else {
+        i = i + 1
+    }
+}
+""",
+    "filter_in_place": "xs.filter_in_place(is_odd)\n",
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time removing half of a list's items with each list API")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"profile {args.profile}")
+    print(f"{'items':>8} " + "".join(f"{label + ' ms':>20}" for label in VARIANTS))
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            timings, outputs = [], set()
+            for i, body in enumerate(VARIANTS.values()):
+                source = PROLOGUE.format(n=n) + body + EPILOGUE
+                elapsed, output = best_run(build(source, workdir, f"v{i}-{n}", args.profile), args.repeat)
+                timings.append(elapsed)
+                outputs.add(output)
+            if len(outputs) != 1:
+                raise SystemExit(f"variants disagree for {n} items: {sorted(outputs)}")
+            print(f"{n:8d} " + "".join(f"{t * 1000:20.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import tempfile
+
+from common import best_run, build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: hash map lookups vs the list-scan pattern ===
+#
+# Before maps, a key -> value table in Forge was two parallel lists and a
+# linear .index() scan per lookup. Both programs below insert N keys and then
+# do a fixed number of lookups; the map's cost per lookup stays flat while the
+# scan grows with N.
+
+LIST_SCAN = """let ids = @()
+let values = @()
+for let i = 0; i < {n}; i++ {{
+    ids.add(i * 7)
+    values.add(i)
+}}
+let total = 0
+for let j = 0; j < {lookups}; j++ {{
+    let at = ids.index((j * 13) % {n} * 7)
+    total = total + values[at]
+}}
+print(total)
+"""
+
+HASH_MAP = """let table = @{{}}
+for let i = 0; i < {n}; i++ {{
+    table.set(i * 7, i)
+}}
+let total = 0
+for let j = 0; j < {lookups}; j++ {{
+    total = total + table.get((j * 13) % {n} * 7)
+}}
+print(total)
+"""
+
+VARIANTS = {"list scan": LIST_SCAN, "map": HASH_MAP}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time key lookups with a map vs parallel lists and .index()")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="keys in the table")
+    ap.add_argument("--lookups", type=int, default=100000)
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{args.lookups} lookups, profile {args.profile}")
+    print(f"{'keys':>8} " + "".join(f"{label + ' ms':>14}" for label in VARIANTS) + f" {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            timings, outputs = [], set()
+            for i, program in enumerate(VARIANTS.values()):
+                source = program.format(n=n, lookups=args.lookups)
+                elapsed, output = best_run(build(source, workdir, f"v{i}-{n}", args.profile), args.repeat)
+                timings.append(elapsed)
+                outputs.add(output)
+            if len(outputs) != 1:
+                raise SystemExit(f"variants disagree for {n} keys: {sorted(outputs)}")
+            print(f"{n:8d} " + "".join(f"{t * 1000:14.1f}" for t in timings) + f" {timings[0] / timings[1]:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+
+from common import quiet
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from module_cache import ModuleCache
+    from transpile_to_c import CTranspiler
+
+# === Benchmark: serial vs parallel module parsing ===
+#
+# Generates a program that loads many independent modules, then transpiles
+# it cold (empty module cache) with one job and with N jobs. The generated C
+# must be identical in both runs; only the wall time should differ.
+
+
+def module_source(index, functions):
+    lines = []
+    for i in range(functions):
+        lines.append(f"fn m{index}_f{i}(a, b) -> int {{")
+        lines.append(f"    let x = (a + b) * (a - b) + (a * {i}) - (b / 3)")
+        lines.append(f"    let n = (x % 7) + ((a + 1) * (b + 2))")
+        lines.append(f"    return x + n")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def write_program(tmp, modules, functions):
+    for m in range(modules):
+        with open(os.path.join(tmp, f"benchmod{m}.forge"), "w") as f:
+            f.write(module_source(m, functions))
+    return "".join(f'load "benchmod{m}.forge"\n' for m in range(modules))
+
+
+def transpile(entry, search_path, jobs):
+    with tempfile.TemporaryDirectory() as cache_dir, quiet():
+        transpiler = CTranspiler(module_cache=ModuleCache(cache_dir), jobs=jobs)
+        transpiler.module_search_paths.insert(0, search_path)
+        ast = Parser(Lexer(entry).iter_tokens()).parse()
+        start = time.perf_counter()
+        c_code = transpiler.gen_Program(ast)
+        return c_code, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time cold transpiles of a many-module program by job count")
+    ap.add_argument("--modules", type=int, default=40)
+    ap.add_argument("--functions", type=int, default=150)
+    ap.add_argument("--jobs", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        entry = write_program(tmp, args.modules, args.functions)
+        print(f"{args.modules} modules x {args.functions} functions")
+        reference = None
+        for jobs in args.jobs:
+            c_code, elapsed = transpile(entry, tmp, jobs)
+            same = "" if reference is None or c_code == reference else "  OUTPUT DIFFERS"
+            reference = reference or c_code
+            print(f"jobs={jobs:<3d} {elapsed * 1000:9.1f} ms{same}")
+
+
+if __name__ == "__main__":
+    main()
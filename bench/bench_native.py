@@ -0,0 +1,143 @@
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from common import quiet
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from transpile_to_c import CTranspiler
+    from build_profiles import PROFILES, gcc_command
+    from native import build_library, load_library
+
+# === Benchmark: in-process native calls against spawning ./output ===
+#
+# The same Forge kernels are called two ways:
+#
+#   spawn   a program printing kernel(arg), compiled once and run as a new
+#           process per call, the way main() runs ./output
+#   native  the program built as a shared library (native.py) and the
+#           kernel called through ctypes in this process
+#
+# Reports microseconds per call for each kernel, checks both give the same
+# result, and times loading the library cold (transpile + gcc) and from the
+# cache (transpile + dlopen). Then calls greet() with a 1 KB string in a long
+# loop and fails if the process grew: a call's strings must not outlive it.
+
+KERNELS = """fn add(a: int, b: int) -> int {
+    return a + b
+}
+
+fn fib(n: int) -> int {
+    if n < 2 {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+
+fn label(name: str, n: int) -> str {
+    return name + "-" + n
+}
+
+fn greet(name: str) -> str {
+    return "hi " + name
+}
+"""
+
+CALLS = {
+    "add": ("add", (20, 22), "print(add(20, 22))"),
+    "fib": ("fib", (20,), "print(fib(20))"),
+    "label": ("label", ("item", 7), 'print(label("item", 7))'),
+}
+
+
+def build_executable(source, workdir, name, profile):
+    with quiet():
+        c_code = CTranspiler().gen_Program(Parser(Lexer(source).iter_tokens()).parse())
+    c_path = os.path.join(workdir, name + ".c")
+    with open(c_path, "w") as f:
+        f.write(c_code)
+    executable = os.path.join(workdir, name)
+    subprocess.run(gcc_command(profile, ["-w", "-Iincludes"], [c_path], executable), check=True)
+    return executable
+
+
+def per_call(fn, calls):
+    # (microseconds per call, last result), best of three batches
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            result = fn()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6, result
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ctypes calls into a Forge shared library against a process per call")
+    ap.add_argument("--calls", type=int, default=2000, help="native calls per batch")
+    ap.add_argument("--spawns", type=int, default=50, help="process runs per batch")
+    ap.add_argument("--loop-calls", type=int, default=200000, help="greet() calls in the memory check")
+    ap.add_argument("--max-growth", type=float, default=16, help="MB the memory check lets the process grow")
+    ap.add_argument("--profile", choices=sorted(p for p in PROFILES if not PROFILES[p]["pgo"]), default="release")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        kernels_path = os.path.join(workdir, "kernels.forge")
+        with open(kernels_path, "w") as f:
+            f.write(KERNELS)
+
+        start = time.perf_counter()
+        with quiet():
+            build_library(kernels_path, args.profile, cache_dir=workdir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        with quiet():
+            library = load_library(kernels_path, args.profile, cache_dir=workdir)
+        warm = time.perf_counter() - start
+        print(f"library load: {cold * 1000:.1f} ms cold, {warm * 1000:.1f} ms cached")
+
+        print(f"{'kernel':<8} {'spawn us':>10} {'native us':>10} {'speedup':>8}")
+        mismatched = []
+        for label, (name, call_args, program) in CALLS.items():
+            executable = build_executable(KERNELS + program + "\n", workdir, label, args.profile)
+            spawn_us, spawn_out = per_call(
+                lambda: subprocess.run([executable], capture_output=True, text=True, check=True).stdout,
+                args.spawns,
+            )
+            function = getattr(library, name)
+            native_us, native_result = per_call(lambda: function(*call_args), args.calls)
+            same = spawn_out.strip() == str(native_result)
+            if not same:
+                mismatched.append(label)
+            print(f"{label:<8} {spawn_us:10.1f} {native_us:10.2f} {spawn_us / native_us:7.0f}x"
+                  f"{'' if same else '  RESULT DIFFERS'}")
+
+        name = "x" * 1024
+        for _ in range(1000):  # warm up: the arena's first blocks, ctypes' caches
+            library.greet(name)
+        before = max_rss_mb()
+        for _ in range(args.loop_calls):
+            greeting = library.greet(name)
+        growth = max_rss_mb() - before
+        print(f"greet x{args.loop_calls}: max RSS grew {growth:.1f} MB")
+        if greeting != "hi " + name:
+            raise SystemExit(f"greet() returned {greeting[:20]!r}...")
+
+    if mismatched:
+        raise SystemExit(f"native and spawned results differ: {', '.join(mismatched)}")
+    if growth > args.max_growth:
+        raise SystemExit(f"greet() calls grew the process by {growth:.1f} MB (limit {args.max_growth:g} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import ROOT, quiet, generate_functions_source, count_nodes
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from module_cache import ModuleCache
+    from transpile_to_c import CTranspiler
+
+# === Benchmark: compiler pipeline phases ===
+#
+# Generates synthetic programs of a few shapes and times each phase of the
+# pipeline on its own: Lexer.tokenize, Parser.parse, CTranspiler.gen_Program
+# and gcc. Timings are best-of-N without tracemalloc; peak memory per phase
+# comes from one extra traced run. Results can be written as JSON and
+# compared against an earlier run to catch regressions:
+#
+#   python bench/bench_pipeline.py --json before.json
+#   python bench/bench_pipeline.py --compare before.json
+#
+# For the "loads" shape the modules are parsed inside gen_Program (with the
+# module cache disabled), so their lexing and parsing count as codegen time.
+
+PHASES = ("lex", "parse", "codegen", "gcc")
+
+
+def shape_nesting(size, depth):
+    lines = []
+    for i in range(size):
+        expr = str(i)
+        for d in range(depth):
+            expr = f"({expr} {'+-*'[d % 3]} {d + 1})"
+        lines.append(f"let n{i} = {expr}")
+        lines.append(f"print(n{i})")
+    return "\n".join(lines) + "\n"
+
+
+def shape_functions(size, depth):
+    return generate_functions_source(size)
+
+
+def shape_loops(size, depth):
+    lines = []
+    for i in range(size):
+        lines.append(f"let total{i} = 0")
+        lines.append(f"for let i{i} = 0; i{i} < 100; i{i}++ {{")
+        lines.append(f"    let k{i} = 0")
+        lines.append(f"    while k{i} < 10 {{")
+        lines.append(f"        total{i} = total{i} + (i{i} * k{i}) % 7")
+        lines.append(f"        k{i} = k{i} + 1")
+        lines.append("    }")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def shape_prints(size, depth):
+    lines = ['let name = "forge"', "let count = 3"]
+    for i in range(size):
+        lines.append(f'print("line {i}:", name, count + {i}, "of", {size})')
+    return "\n".join(lines) + "\n"
+
+
+def shape_loads(size, depth, module_dir):
+    # size modules of 20 functions each, all loaded by the entry program
+    for m in range(size):
+        lines = []
+        for i in range(20):
+            lines.append(f"fn p{m}_f{i}(a, b) -> int {{")
+            lines.append(f"    return (a + b) * {i} - (a % (b + 1))")
+            lines.append("}")
+        with open(os.path.join(module_dir, f"pipe{m}.forge"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+    return "".join(f'load "pipe{m}.forge"\n' for m in range(size))
+
+
+SHAPES = {
+    "nesting": shape_nesting,
+    "functions": shape_functions,
+    "loops": shape_loops,
+    "prints": shape_prints,
+    "loads": shape_loads,
+}
+
+
+def run_phases(source, module_dir, c_path, cflags, traced=False, run_gcc=True):
+    # Returns ({phase: seconds or peak bytes}, tokens, ast)
+    results = {}
+
+    def measure(phase, fn):
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with quiet():
+            value = fn()
+        elapsed = time.perf_counter() - start
+        if traced:
+            results[phase] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            results[phase] = elapsed
+        return value
+
+    tokens = measure("lex", lambda: Lexer(source).tokenize())
+    ast = measure("parse", lambda: Parser(tokens).parse())
+
+    transpiler = CTranspiler(module_cache=ModuleCache(enabled=False))
+    transpiler.module_search_paths.insert(0, module_dir)
+    c_code = measure("codegen", lambda: transpiler.gen_Program(ast))
+
+    with open(c_path, "w") as f:
+        f.write(c_code)
+    if run_gcc and not traced:
+        start = time.perf_counter()
+        subprocess.run(["gcc", "-w", "-Iincludes", *cflags, "-c", c_path, "-o", c_path + ".o"], check=True)
+        results["gcc"] = time.perf_counter() - start
+    return results, tokens, ast
+
+
+def bench_shape(name, size, depth, repeat, cflags, skip_gcc):
+    with tempfile.TemporaryDirectory() as tmp:
+        if name == "loads":
+            source = shape_loads(size, depth, tmp)
+        else:
+            source = SHAPES[name](size, depth)
+        c_path = os.path.join(tmp, "bench.c")
+
+        best = {}
+        for _ in range(repeat):
+            times, tokens, ast = run_phases(source, tmp, c_path, cflags, run_gcc=not skip_gcc)
+            for phase, seconds in times.items():
+                best[phase] = min(seconds, best.get(phase, seconds))
+        peaks, _, _ = run_phases(source, tmp, c_path, cflags, traced=True)
+
+    nodes = count_nodes(ast)
+    return {
+        "size": size,
+        "source_bytes": len(source),
+        "tokens": len(tokens),
+        "nodes": nodes,
+        "seconds": best,
+        "peak_kb": {phase: peak // 1024 for phase, peak in peaks.items()},
+        "tokens_per_s": len(tokens) / best["lex"],
+        "nodes_per_s": nodes / best["parse"],
+        "codegen_nodes_per_s": nodes / best["codegen"],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    # Prints per-phase ratios against an earlier run; returns the regressions
+    regressions = []
+    print(f"== compared with {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%}) ==")
+    for shape, result in results.items():
+        old = baseline["results"].get(shape)
+        if old is None or old["size"] != result["size"]:
+            print(f"{shape:<10} (not comparable)")
+            continue
+        cells = []
+        for phase, seconds in result["seconds"].items():
+            if phase not in old["seconds"]:
+                continue
+            ratio = seconds / old["seconds"][phase]
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = " !"
+                regressions.append((shape, phase, ratio))
+            cells.append(f"{phase} {ratio:5.2f}x{flag}")
+        print(f"{shape:<10} " + "  ".join(cells))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time lexer, parser, codegen and gcc on synthetic programs")
+    ap.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    ap.add_argument("--size", type=int, default=400, help="statements / functions / modules per program")
+    ap.add_argument("--depth", type=int, default=40, help="parenthesis depth for the nesting shape")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--cflags", nargs="*", default=[], help="extra gcc flags, e.g. -O2")
+    ap.add_argument("--no-gcc", action="store_true", help="skip the gcc phase")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--compare", help="earlier --json results to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression")
+    args = ap.parse_args()
+
+    results = {}
+    print(f"{'shape':<10} {'tokens':>8} {'nodes':>8} " + "".join(f"{p + ' ms':>11}" for p in PHASES)
+          + f" {'tok/s':>10} {'nodes/s':>10} {'peak MB':>8}")
+    for shape in args.shapes:
+        size = max(1, args.size // 10) if shape == "loads" else args.size
+        r = results[shape] = bench_shape(shape, size, args.depth, args.repeat, args.cflags, args.no_gcc)
+        timings = "".join(
+            f"{r['seconds'][p] * 1000:11.1f}" if p in r["seconds"] else f"{'-':>11}" for p in PHASES
+        )
+        print(f"{shape:<10} {r['tokens']:8d} {r['nodes']:8d} {timings} "
+              f"{r['tokens_per_s']:10.0f} {r['nodes_per_s']:10.0f} {max(r['peak_kb'].values()) / 1024:8.1f}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {"size": args.size, "depth": args.depth, "repeat": args.repeat, "cflags": args.cflags},
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from common import quiet
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from transpile_to_c import CTranspiler
+    from build_profiles import PROFILES, gcc_command
+
+# === Benchmark: print throughput ===
+#
+# Prints N integers, one per line, into a pipe that the driver drains, and
+# reports lines/s and MB/s. "print" is the Forge program as compiled today,
+# run with several stdout buffer sizes (FORGE_OUTPUT_BUFFER, see
+# includes/output.h). "printf" is the same loop written in C with one
+# printf("%d\n") per line, which is what print used to compile to.
+
+PROGRAM = """for let i = 0; i < {n}; i++ {{
+    print(i)
+}}
+"""
+
+PRINTF_PROGRAM = """#include <stdio.h>
+int main(void) {{
+    for (int i = 0; i < {n}; i++) {{
+        printf("%d\\n", i);
+    }}
+    return 0;
+}}
+"""
+
+
+def build(workdir, name, c_code, profile):
+    c_path = os.path.join(workdir, name + ".c")
+    with open(c_path, "w") as f:
+        f.write(c_code)
+    executable = os.path.join(workdir, name)
+    subprocess.run(gcc_command(profile, ["-w", "-Iincludes"], [c_path], executable), check=True)
+    return executable
+
+
+def run(executable, env, repeat):
+    # (best seconds, bytes written) of repeat runs
+    best = None
+    for _ in range(repeat):
+        written = 0
+        start = time.perf_counter()
+        proc = subprocess.Popen([executable], stdout=subprocess.PIPE, env=env)
+        while True:
+            chunk = proc.stdout.read(1 << 20)
+            if not chunk:
+                break
+            written += len(chunk)
+        proc.wait()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Throughput of print() into a pipe")
+    ap.add_argument("--lines", type=int, default=10_000_000)
+    ap.add_argument("--buffers", type=int, nargs="+", default=[4096, 65536, 1 << 20],
+                    help="stdout buffer sizes to try, in bytes")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with quiet():
+        c_code = CTranspiler().gen_Program(Parser(Lexer(PROGRAM.format(n=args.lines)).iter_tokens()).parse())
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        printf_exe = build(workdir, "printf", PRINTF_PROGRAM.format(n=args.lines), args.profile)
+        runs.append(("printf", "stdio", run(printf_exe, dict(os.environ), args.repeat)))
+        print_exe = build(workdir, "print", c_code, args.profile)
+        for size in args.buffers:
+            env = dict(os.environ, FORGE_OUTPUT_BUFFER=str(size))
+            runs.append(("print", f"{size // 1024} KB", run(print_exe, env, args.repeat)))
+
+    print(f"{'program':<8} {'buffer':>8} {'ms':>9} {'Mlines/s':>9} {'MB/s':>8}")
+    for label, buffer, (elapsed, written) in runs:
+        print(f"{label:<8} {buffer:>8} {elapsed * 1000:9.1f} {args.lines / elapsed / 1e6:9.1f} "
+              f"{written / elapsed / 1024 / 1024:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
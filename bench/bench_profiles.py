@@ -0,0 +1,58 @@
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from common import ROOT, best_run, quiet
+
+with quiet():
+    from lexer import Lexer
+    from forge_parser import Parser
+    from transpile_to_c import CTranspiler
+    from build_profiles import PROFILES, build_program, gcc_command
+
+# === Benchmark: runtime of the programs in test/bench per build profile ===
+#
+# Each program is transpiled once, built with every profile (pgo trains on a
+# run of the program itself) and run a few times; the best wall time is kept.
+
+PROGRAMS = os.path.join(ROOT, "test", "bench", "*.forge")
+
+
+def transpile(path, out_path):
+    with open(path) as f:
+        source = f.read()
+    with quiet():
+        c_code = CTranspiler().gen_Program(Parser(Lexer(source).iter_tokens()).parse())
+    with open(out_path, "w") as f:
+        f.write(c_code)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare run time of test/bench programs across build profiles")
+    ap.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("programs", nargs="*", help="Forge programs (default: test/bench/*.forge)")
+    args = ap.parse_args()
+
+    programs = args.programs or sorted(glob.glob(PROGRAMS))
+    base = args.profiles[0]
+    print(f"{'program':<10}" + "".join(f"{name:>20}" for name in args.profiles) + f"   (speedup vs {base})")
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in programs:
+            name = os.path.splitext(os.path.basename(path))[0]
+            c_path = os.path.join(tmp, name + ".c")
+            transpile(path, c_path)
+            times = {}
+            for profile in args.profiles:
+                executable = os.path.join(tmp, f"{name}-{profile}")
+                command = gcc_command(profile, ["-w", "-Iincludes"], [c_path], executable)
+                build_program(profile, command, executable)
+                times[profile], _ = best_run(executable, args.repeat)
+            row = "".join(f"{times[p] * 1000:11.1f} ms {times[base] / times[p]:4.2f}x" for p in args.profiles)
+            print(f"{name:<10}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, RUNTIME_DIR, build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: runtime helpers (list.h, array.h, hash.h, fileio.h) ===
+#
+# Every program in bench/runtime/ exercises one runtime helper and declares
+# how many operations it performs in a "# ops: N" header line. Each one is
+# transpiled, compiled together with alloc_count.c (which wraps malloc and
+# friends) and run; the driver reports ops/sec, with the start-up cost of an
+# empty program subtracted, and the allocation counts of the run.
+#
+# Results are checked against bench/runtime_baseline.json: a program fails if
+# its ops/sec dropped more than --threshold below the baseline or if it makes
+# more allocations than before (allocation counts are deterministic). Refresh
+# the baseline on the reference machine with --update-baseline.
+
+BASELINE = os.path.join(ROOT, "bench", "runtime_baseline.json")
+# Loops start on a 32-byte boundary, so a short hot loop never straddles a
+# cache line because unrelated code before it in main grew or shrank; without
+# this, array_get ran 1.4-2x slower whenever its loop happened to cross one
+ALIGN_FLAGS = ["-falign-loops=32"]
+OPS_PATTERN = re.compile(r"^#\s*ops:\s*(\d+)", re.M)
+ALLOCS_PATTERN = re.compile(r"^FORGE_ALLOCS (\d+) (\d+) (\d+)$", re.M)
+
+
+def run(executable, workdir, repeat):
+    # Best wall time of repeat runs plus the allocation counts (identical on every run)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([executable], cwd=workdir, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    allocs = ALLOCS_PATTERN.search(proc.stderr)
+    counts = [int(n) for n in allocs.groups()] if allocs else [0, 0, 0]
+    return best, counts
+
+
+def check(results, baseline, threshold):
+    failures = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["ops_per_s"] < old["ops_per_s"] * (1 - threshold):
+            failures.append(f"{name}: {result['ops_per_s']:.0f} ops/s, baseline {old['ops_per_s']:.0f}")
+        for key in ("allocs", "reallocs"):
+            if result[key] > old[key]:
+                failures.append(f"{name}: {result[key]} {key}, baseline {old[key]}")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure runtime helper throughput and allocations")
+    ap.add_argument("programs", nargs="*", help="Forge programs (default: bench/runtime/*.forge)")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed ops/sec drop below the baseline")
+    ap.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    args = ap.parse_args()
+
+    programs = args.programs or sorted(glob.glob(os.path.join(RUNTIME_DIR, "*.forge")))
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        empty = build('print("")\n', workdir, "empty", args.profile, ALIGN_FLAGS, count_allocs=True)
+        startup, _ = run(empty, workdir, args.repeat)
+
+        print(f"{'program':<14} {'ops':>10} {'ms':>9} {'ops/s':>14} {'allocs':>9} {'reallocs':>9} {'alloc MB':>9}")
+        for path in programs:
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(path) as f:
+                source = f.read()
+            ops = OPS_PATTERN.search(source)
+            if ops is None:
+                sys.exit(f"{path}: missing '# ops: N' header")
+            ops = int(ops.group(1))
+
+            elapsed, (allocs, reallocs, alloc_bytes) = run(
+                build(source, workdir, name, args.profile, ALIGN_FLAGS, count_allocs=True), workdir, args.repeat
+            )
+            seconds = max(elapsed - startup, 1e-9)
+            results[name] = {
+                "ops": ops,
+                "seconds": seconds,
+                "ops_per_s": ops / seconds,
+                "allocs": allocs,
+                "reallocs": reallocs,
+                "alloc_bytes": alloc_bytes,
+            }
+            print(f"{name:<14} {ops:10d} {seconds * 1000:9.1f} {ops / seconds:14.0f} "
+                  f"{allocs:9d} {reallocs:9d} {alloc_bytes / 1024 / 1024:9.1f}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"wrote {os.path.relpath(args.baseline, ROOT)}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            failures = check(results, json.load(f), args.threshold)
+        if failures:
+            print("RUNTIME REGRESSIONS:")
+            for failure in failures:
+                print("  " + failure)
+            sys.exit(1)
+        print(f"no regressions against {os.path.relpath(args.baseline, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, generate_functions_source
+
+from forge_client import request
+
+# === Benchmark: compile server turnaround ===
+#
+# Transpiles one program (loading the MODULES from modules/ plus --functions
+# generated functions) the ways an editor or test runner could:
+#
+#   cold      a fresh Python process importing the transpiler, as
+#             transpile_to_c.py does on every invocation
+#   client    python forge_client.py c, a process talking to a warm server
+#   request   forge_client.request() from this process: socket round trip
+#             plus the server's work, without Python start-up
+#   edited    request() after appending a function to one module, so that
+#             module misses the server's cache
+#
+# The server runs on a private socket and cache directory and is stopped at
+# the end. Reports the best of --repeat runs in milliseconds and checks that
+# every path produced the same C.
+
+MODULES = ("finance.forge", "conversions.forge", "memory.forge", "math.forge")
+
+COLD = """import os, sys
+from lexer import Lexer
+from forge_parser import Parser
+from transpile_to_c import CTranspiler
+workdir = sys.argv[1]
+t = CTranspiler()
+t.module_search_paths = [os.path.join(workdir, p) for p in t.module_search_paths]
+with open(os.path.join(workdir, "program.forge")) as f:
+    sys.stdout.write(t.gen_Program(Parser(Lexer(f.read()).iter_tokens()).parse()))
+"""
+
+
+def best_of(fn, repeat):
+    # (best milliseconds, last result)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile server turnaround against a cold transpile")
+    ap.add_argument("--functions", type=int, default=40, help="generated functions in the program")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "modules"))
+        for name in MODULES:
+            shutil.copy(os.path.join(ROOT, "modules", name), os.path.join(workdir, "modules"))
+        loads = "".join(f'load "{name}"\n' for name in MODULES)
+        program = os.path.join(workdir, "program.forge")
+        with open(program, "w") as f:
+            f.write(loads + generate_functions_source(args.functions))
+
+        env = dict(os.environ, FORGE_CACHE_DIR=os.path.join(workdir, "cache"),
+                   FORGE_SERVER_SOCKET=os.path.join(workdir, "server.sock"))
+        os.environ.update(env)
+        message = {"op": "c", "source": program, "cwd": workdir}
+
+        def warm():
+            response = request(message)
+            if not response["ok"]:
+                raise SystemExit(f"server error: {response['error']}")
+            return response["c"]
+
+        def run(command, cwd):
+            return subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+
+        edited_module = os.path.join(workdir, "modules", MODULES[0])
+        edits = iter(range(1_000_000))
+
+        def edit_and_request():
+            with open(edited_module, "a") as f:
+                f.write(f"\nfn bench_edit_{next(edits)}() -> int {{\n    return 1\n}}\n")
+            return warm()
+
+        try:
+            start = time.perf_counter()
+            expected = warm()
+            first = (time.perf_counter() - start) * 1000
+            results = {
+                "cold": best_of(lambda: run([sys.executable, "-c", COLD, workdir], ROOT), args.repeat),
+                "client": best_of(lambda: run([sys.executable, os.path.join(ROOT, "forge_client.py"),
+                                               "c", program], workdir), args.repeat),
+                "request": best_of(warm, args.repeat),
+            }
+            edited = best_of(edit_and_request, args.repeat)[0]
+        finally:
+            request({"op": "stop"}, start=False)
+
+    print(f"server start + first request: {first:.1f} ms")
+    print(f"{'path':<10} {'ms':>9}")
+    for label, (ms, _) in results.items():
+        print(f"{label:<10} {ms:9.1f}")
+    print(f"{'edited':<10} {edited:9.1f}")
+    differing = [label for label, (_, c_code) in results.items() if c_code != expected]
+    if differing:
+        raise SystemExit(f"generated C differs: {', '.join(differing)}")
+
+
+if __name__ == "__main__":
+    main()
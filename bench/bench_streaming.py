@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, quiet
+
+# === Benchmark: list-based vs streaming lexing/parsing ===
+#
+# Writes a synthetic .forge file of the requested size, then lexes and parses
+# it in a fresh child process per mode and reports the child's peak RSS:
+#
+#   list        Lexer.tokenize() + Parser.parse()         (whole token list + AST)
+#   list-stmts  Lexer.tokenize() + Parser.iter_statements() (whole token list)
+#   stream      Lexer.iter_tokens() + Parser.iter_statements() (bounded window)
+
+MODES = ("list", "list-stmts", "stream")
+
+BLOCK = """let total{n} = {n} * 2 + (3 - 1)
+let name{n} = "item" + string({n})
+if total{n} > 10 {{
+    print("big", total{n}, name{n})
+}} else {{
+    print("small")
+}}
+let i{n} = 0
+while i{n} < 3 {{
+    i{n} = i{n} + 1
+}}
+"""
+
+
+def write_source(path, size_mb):
+    target = size_mb * 1024 * 1024
+    written = 0
+    n = 0
+    with open(path, "w") as f:
+        while written < target:
+            chunk = "".join(BLOCK.format(n=n + k) for k in range(100))
+            f.write(chunk)
+            written += len(chunk)
+            n += 100
+
+
+def run_child(mode, path):
+    with quiet():
+        from lexer import Lexer
+        from forge_parser import Parser
+
+    with open(path) as f:
+        source = f.read()
+    rss_source = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    lexer = Lexer(source)
+    with quiet():
+        if mode == "list":
+            tokens = lexer.tokenize()
+            count = len(Parser(tokens).parse().statements)
+        elif mode == "list-stmts":
+            tokens = lexer.tokenize()
+            count = sum(1 for _ in Parser(tokens).iter_statements())
+        else:
+            count = sum(1 for _ in Parser(lexer.iter_tokens()).iter_statements())
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "statements": count,
+        "seconds": elapsed,
+        "rss_source_kb": rss_source,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare peak RSS of list-based and streaming parsing")
+    ap.add_argument("--size-mb", type=int, default=100)
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ap.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.forge")
+        write_source(path, args.size_mb)
+        size = os.path.getsize(path)
+        print(f"synthetic source: {size / 1024 / 1024:.1f} MiB")
+        print(f"{'mode':<12} {'stmts':>9} {'seconds':>9} {'source RSS':>12} {'peak RSS':>12} {'over source':>12}")
+        for mode in args.modes:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                cwd=ROOT, capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<12} {r['statements']:9d} {r['seconds']:9.2f} "
+                  f"{r['rss_source_kb'] / 1024:10.1f}MB {r['peak_rss_kb'] / 1024:10.1f}MB "
+                  f"{(r['peak_rss_kb'] - r['rss_source_kb']) / 1024:10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import subprocess
+import tempfile
+import time
+
+from common import build, quiet
+from bench_runtime import ALLOCS_PATTERN
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: building a long string in a loop ===
+#
+# Appends one report line per iteration and prints the final length. In
+# "builder" the loop is written `report = report + ...`, which the compiler
+# backs with a StringBuilder (includes/string_builder.h): each iteration
+# appends in place, so the time per line stays flat as the report grows. In
+# "copying" the chain starts with "" instead of report, so every iteration
+# concatenates the whole report into a new string, as every `+` used to: the
+# time per line grows with the report. The printed length is checked against
+# the expected one so a truncated report fails the run.
+
+LINE = "line {i} of the quarterly report\n"
+
+PROGRAMS = {
+    "builder": """let report = ""
+for let i = 0; i < {n}; i++ {{
+    report = report + "line " + i + " of the quarterly report\\n"
+}}
+print(len(report))
+""",
+    "copying": """let report = ""
+for let i = 0; i < {n}; i++ {{
+    report = "" + report + "line " + i + " of the quarterly report\\n"
+}}
+print(len(report))
+""",
+}
+
+
+def run(executable):
+    # (seconds, printed length, heap allocations + reallocations) of one run
+    start = time.perf_counter()
+    proc = subprocess.run([executable], capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    allocs, reallocs, _ = (int(n) for n in ALLOCS_PATTERN.search(proc.stderr).groups())
+    return elapsed, int(proc.stdout.split()[0]), allocs + reallocs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time building a long string one line per iteration")
+    ap.add_argument("--lines", type=int, nargs="+", default=[2500, 5000, 10000, 80000, 320000])
+    ap.add_argument("--max-copying", type=int, default=10000,
+                    help="skip the copying program above this many lines (its time and memory are quadratic)")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    args = ap.parse_args()
+
+    print(f"{'program':<9} {'lines':>8} {'MB':>7} {'ms':>9} {'us/line':>8} {'allocs':>8}")
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, program in PROGRAMS.items():
+            for n in args.lines:
+                if label == "copying" and n > args.max_copying:
+                    continue
+                elapsed, length, allocs = run(build(program.format(n=n), workdir, f"{label}-{n}", args.profile, count_allocs=True))
+                expected = sum(len(LINE.format(i=i)) for i in range(n))
+                note = "" if length == expected else f"  TRUNCATED (expected {expected})"
+                failed |= length != expected
+                print(f"{label:<9} {n:8d} {length / 1024 / 1024:7.1f} {elapsed * 1000:9.1f} "
+                      f"{elapsed / n * 1e6:8.2f} {allocs:8d}{note}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
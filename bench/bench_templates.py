@@ -0,0 +1,107 @@
+import argparse
+import subprocess
+import sys
+import time
+
+from common import ROOT
+
+from c_templates import TEMPLATES_DIR, templates
+
+# === Benchmark: per-statement template emission ===
+#
+# Renders each C template with arguments shaped like the transpiler's calls,
+# two ways:
+#
+#   jinja2     env.get_template(name).render(...), as the transpiler used to
+#              (skipped when jinja2 is not installed)
+#   compiled   the c_templates function for the template, which returns a
+#              string, or a c_emit.Code node when it indents a body
+#   + str      the same call plus writing a node out as text, which the
+#              transpiler does once for the whole program
+#
+# Reports microseconds per call and checks that both give the same text.
+# Also times a fresh interpreter importing jinja2 against importing
+# c_templates, which is the start-up cost the transpiler no longer pays.
+
+BODY = "\n".join(f"x{i} = x{i} + {i};" for i in range(6))
+
+CALLS = [
+    ("for", "for_statement", dict(init="int i = 0", condition="i < n", update="i++", body=BODY)),
+    ("while", "while_statement", dict(condition="k < 10", body=BODY)),
+    ("if", "if_statement", dict(condition="a > b", then_body=BODY, elifs=[], else_body=None)),
+    ("if/elif/else", "if_statement", dict(condition="a > b", then_body=BODY,
+                                          elifs=[{"condition": "a == b", "body": BODY},
+                                                 {"condition": "a < 0", "body": "a = 0;"}],
+                                          else_body=BODY)),
+    ("function", "function_def", dict(return_type="int", name="add", params=["int a", "int b"],
+                                      body="return a + b;")),
+    ("read", "read_file", dict(tmp="__tmp3", reader="read_file", filename='"data.txt"')),
+    ("write", "write_file", dict(filename='"out.txt"', content="text", mode='"w"', spacing="1")),
+    ("main", "main", dict(body="forge_output_init();\n" + BODY)),
+    ("print", "print_statement", dict(type="bool", arg="ok")),
+    ("let", "let_statement", dict(name="x", value="42")),
+]
+
+
+def per_call(fn, calls):
+    # (microseconds per call, last result), best of three batches
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            result = fn()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6, result
+
+
+def import_ms(module, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compiled C templates against jinja2 rendering")
+    ap.add_argument("--calls", type=int, default=20000, help="renders per batch")
+    ap.add_argument("--repeat", type=int, default=5, help="runs of each import timing")
+    args = ap.parse_args()
+
+    try:
+        from jinja2 import Environment, FileSystemLoader
+        env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+    except ImportError:
+        env = None
+        print("jinja2 is not installed; timing the compiled templates only")
+
+    print(f"{'template':<16} {'jinja2 us':>10} {'compiled us':>12} {'+ str us':>9} {'speedup':>8}")
+    mismatched = []
+    for label, name, kwargs in CALLS:
+        function = getattr(templates, name)
+        compiled_us, _ = per_call(lambda: function(**kwargs), args.calls)
+        rendered_us, compiled_out = per_call(lambda: str(function(**kwargs)), args.calls)
+        if env is None:
+            print(f"{label:<16} {'-':>10} {compiled_us:12.2f} {rendered_us:9.2f}")
+            continue
+        jinja_us, jinja_out = per_call(lambda: env.get_template(name + ".c.j2").render(**kwargs), args.calls)
+        same = jinja_out == compiled_out
+        if not same:
+            mismatched.append(label)
+        print(f"{label:<16} {jinja_us:10.2f} {compiled_us:12.2f} {rendered_us:9.2f} {jinja_us / rendered_us:7.1f}x"
+              f"{'' if same else '  OUTPUT DIFFERS'}")
+
+    baseline = import_ms("sys", args.repeat)
+    print(f"import c_templates: {import_ms('c_templates', args.repeat) - baseline:.1f} ms over interpreter start-up")
+    if env is not None:
+        print(f"import jinja2:      {import_ms('jinja2', args.repeat) - baseline:.1f} ms over interpreter start-up")
+
+    if mismatched:
+        raise SystemExit(f"compiled templates differ from jinja2: {', '.join(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
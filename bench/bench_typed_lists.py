@@ -0,0 +1,57 @@
+import argparse
+import tempfile
+
+from common import best_run, build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: generic List (double) vs typed IntList ===
+#
+# Adds N ints to a list and sums them, once with the list forced to the
+# generic List via a `list` type hint (how every list was compiled before)
+# and once with the element type inferred from .add(...), which makes it an
+# IntList.
+
+PROGRAM = """let nums{hint} = @()
+for let i = 0; i < {n}; i++ {{
+    nums.add(i % 100)
+}}
+let total = 0
+for let r = 0; r < {rounds}; r++ {{
+    for let i = 0; i < len(nums); i++ {{
+        total = total + nums[i]
+    }}
+}}
+print(total)
+"""
+
+VARIANTS = {"List (before)": ": list", "IntList (after)": ""}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time adding and summing ints with List vs IntList")
+    ap.add_argument("-n", type=int, default=1000000, help="ints added to the list")
+    ap.add_argument("--rounds", type=int, default=10, help="times the list is summed")
+    ap.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=["debug", "release"])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{args.n} adds, {args.rounds} summing passes")
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in args.profiles:
+            baseline = None
+            for i, (label, hint) in enumerate(VARIANTS.items()):
+                source = PROGRAM.format(hint=hint, n=args.n, rounds=args.rounds)
+                executable = build(source, workdir, f"v{i}-{profile}", profile)
+                with open(executable + ".c") as f:
+                    c_code = f.read()
+                list_type = c_code.split(" nums = ")[0].split()[-1]
+                elapsed, output = best_run(executable, args.repeat)
+                baseline = baseline or elapsed
+                print(f"{profile:<8} {label:<16} {list_type:<8} {elapsed * 1000:8.1f} ms  "
+                      f"{baseline / elapsed:5.2f}x  (sum {output})")
+
+
+if __name__ == "__main__":
+    main()
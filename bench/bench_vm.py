@@ -0,0 +1,135 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, build, quiet
+
+with quiet():
+    from build_profiles import PROFILES
+
+# === Benchmark: bytecode VM against the transpiled program ===
+#
+# Runs each program two ways and checks that both print the same thing:
+#
+#   vm      python interpreter.py prog.forge (start-up, compile and run)
+#   build   transpiling plus gcc, which the C path pays before its first run
+#   c       running the compiled executable
+#
+# "vm" against "build + c" is the time to a first result for a quick script;
+# "vm" against "c" alone shows what the VM costs once a program is hot.
+
+PROGRAMS = {
+    "startup": """print(1)
+""",
+    "loop": """let total = 0
+for let i = 0; i < {n}; i++ {{
+    total = (total + i * 3) % 1000003
+}}
+print(total)
+""",
+    "fib": """fn fib(n: int) -> int {{
+    if n < 2 {{
+        return n
+    }}
+    return fib(n - 1) + fib(n - 2)
+}}
+print(fib({fib}))
+""",
+    "strings": """let report = ""
+for let i = 0; i < {n}; i++ {{
+    report = report + "line " + i + "\\n"
+}}
+print(len(report))
+""",
+    "lists": """let nums = @()
+for let i = 0; i < {n}; i++ {{
+    nums.add(i % 97)
+}}
+let total = 0
+for let i = 0; i < len(nums); i++ {{
+    total = total + nums[i]
+}}
+print(total)
+""",
+    "structs": """struct Point {{
+    x: int
+    y: int
+}}
+
+fn manhattan(p: Point) -> int {{
+    return p.x + p.y
+}}
+
+let total = 0
+for let i = 0; i < {n}; i++ {{
+    let p = Point(i % 10, i % 7)
+    total = total + manhattan(p)
+}}
+print(total)
+""",
+    "attempt": """let caught = 0
+for let i = 0; i < {n}; i++ {{
+    attempt {{
+        let x = number("x" + i)
+    }} rescue err {{
+        caught = caught + 1
+    }}
+}}
+print(caught)
+""",
+}
+
+
+def timed(command, repeat):
+    # (best seconds, stdout) of repeat runs
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, proc.stdout
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bytecode VM against transpile + gcc + run")
+    ap.add_argument("--n", type=int, default=100_000, help="iterations of the loop programs")
+    ap.add_argument("--fib", type=int, default=22)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="release")
+    ap.add_argument("programs", nargs="*", help="subset of programs to run")
+    args = ap.parse_args()
+
+    interpreter = os.path.join(ROOT, "interpreter.py")
+    failed = []
+    print(f"{'program':<10} {'vm ms':>9} {'build ms':>9} {'c ms':>9} {'vm/c':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, template in PROGRAMS.items():
+            if args.programs and name not in args.programs:
+                continue
+            source = template.format(n=args.n, fib=args.fib)
+            path = os.path.join(workdir, name + ".forge")
+            with open(path, "w") as f:
+                f.write(source)
+
+            vm_time, vm_out = timed([sys.executable, interpreter, path], args.repeat)
+            start = time.perf_counter()
+            executable = build(source, workdir, name, args.profile)
+            build_time = time.perf_counter() - start
+            c_time, c_out = timed([executable], args.repeat)
+
+            mark = "" if vm_out == c_out else "  OUTPUT DIFFERS"
+            if mark:
+                failed.append(name)
+            print(f"{name:<10} {vm_time * 1000:9.1f} {build_time * 1000:9.1f} {c_time * 1000:9.1f} "
+                  f"{vm_time / c_time:7.0f}x{mark}")
+
+    if failed:
+        raise SystemExit(f"VM and C output differ: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
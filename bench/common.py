@@ -0,0 +1,109 @@
+import contextlib
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # benchmarks pass includes/ and modules/ as relative paths
+
+RUNTIME_DIR = os.path.join(ROOT, "bench", "runtime")
+# Routes the allocator through bench/runtime/alloc_count.c (see build)
+WRAP_FLAGS = ["-Wl,--wrap=malloc,--wrap=calloc,--wrap=realloc,--wrap=strdup"]
+
+
+@contextlib.contextmanager
+def quiet():
+    # Older trees print debug output to stdout; keep it out of the timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def build(source, workdir, name, profile, cflags=(), count_allocs=False):
+    # Transpiles a Forge program and compiles it with the profile's flags to
+    # workdir/name, next to its C source in workdir/name.c. With count_allocs
+    # it is linked with alloc_count.c, which reports allocations and peak RSS
+    # on stderr when it exits.
+    with quiet():
+        from lexer import Lexer
+        from forge_parser import Parser
+        from transpile_to_c import CTranspiler
+        from build_profiles import gcc_command
+        c_code = CTranspiler().gen_Program(Parser(Lexer(source).iter_tokens()).parse())
+    c_path = os.path.join(workdir, name + ".c")
+    with open(c_path, "w") as f:
+        f.write(c_code)
+    executable = os.path.join(workdir, name)
+    inputs = [c_path]
+    link_flags = []
+    if count_allocs:
+        inputs.append(os.path.join(RUNTIME_DIR, "alloc_count.c"))
+        link_flags = WRAP_FLAGS
+    subprocess.run(gcc_command(profile, ["-w", "-Iincludes"] + list(cflags), inputs, executable) + link_flags,
+                   check=True)
+    return executable
+
+
+def best_run(executable, repeat):
+    # (best wall-clock seconds, stripped stdout of the last run)
+    best, output = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([executable], stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                                check=True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output.strip()
+
+
+def generate_functions_source(functions):
+    lines = []
+    for i in range(functions):
+        lines.append(f"fn f{i}(a, b) -> int {{")
+        lines.append(f"    let x = (a + b) * (a - b) + (a * {i}) - (b / 3)")
+        lines.append(f"    let s = \"v\" + string(x)")
+        lines.append(f"    let n = len(s) + (x % 7) + ((a + 1) * (b + 2))")
+        lines.append(f"    print(\"f{i}\", x, n, s)")
+        lines.append(f"    let r = ri(1, 10) + (n * 2)")
+        lines.append(f"    return x + n + r")
+        lines.append("}")
+    for i in range(functions):
+        lines.append(f"print(f{i}({i}, {i + 1}))")
+    return "\n".join(lines) + "\n"
+
+
+def node_fields(node):
+    # Works for both __dict__ and __slots__ based nodes
+    if hasattr(node, "__dict__"):
+        return list(node.__dict__.items())
+    fields = []
+    for cls in type(node).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(node, name):
+                fields.append((name, getattr(node, name)))
+    return fields
+
+
+def is_node(value):
+    return type(value).__module__ == "forge_parser"
+
+
+def iter_nodes(root):
+    stack = [root]
+    seen = set()
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+            continue
+        if not is_node(value) or id(value) in seen:
+            continue
+        seen.add(id(value))
+        yield value
+        for _, field in node_fields(value):
+            stack.append(field)
+
+
+def count_nodes(root):
+    return sum(1 for _ in iter_nodes(root))
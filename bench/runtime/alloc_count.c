@@ -0,0 +1,62 @@
+// Allocation counter linked into runtime benchmarks with
+//   -Wl,--wrap=malloc,--wrap=calloc,--wrap=realloc,--wrap=strdup
+// Counts the allocations made by generated code and the runtime headers
+// (not those made inside libc) and reports them on stderr at exit, together
+// with the peak RSS of the process (VmHWM, which unlike ru_maxrss does not
+// carry over the parent's size through fork and exec).
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+void* __real_malloc(size_t size);
+void* __real_calloc(size_t count, size_t size);
+void* __real_realloc(void* ptr, size_t size);
+
+static unsigned long alloc_calls, realloc_calls, alloc_bytes;
+
+static long peak_rss_kb(void) {
+    char line[256];
+    long kb = -1;
+    FILE* status = fopen("/proc/self/status", "r");
+    if (!status) return -1;
+    while (fgets(line, sizeof(line), status)) {
+        if (sscanf(line, "VmHWM: %ld kB", &kb) == 1) break;
+    }
+    fclose(status);
+    return kb;
+}
+
+static void report_allocs(void) {
+    fprintf(stderr, "FORGE_ALLOCS %lu %lu %lu\n", alloc_calls, realloc_calls, alloc_bytes);
+    fprintf(stderr, "FORGE_PEAK_RSS_KB %ld\n", peak_rss_kb());
+}
+
+__attribute__((constructor)) static void install_report(void) {
+    atexit(report_allocs);
+}
+
+void* __wrap_malloc(size_t size) {
+    alloc_calls++;
+    alloc_bytes += size;
+    return __real_malloc(size);
+}
+
+void* __wrap_calloc(size_t count, size_t size) {
+    alloc_calls++;
+    alloc_bytes += count * size;
+    return __real_calloc(count, size);
+}
+
+void* __wrap_realloc(void* ptr, size_t size) {
+    realloc_calls++;
+    alloc_bytes += size;
+    return __real_realloc(ptr, size);
+}
+
+char* __wrap_strdup(const char* s) {
+    size_t size = strlen(s) + 1;
+    char* copy = __wrap_malloc(size);
+    if (copy) memcpy(copy, s, size);
+    return copy;
+}
@@ -0,0 +1,105 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+from c_templates import TEMPLATES_DIR
+from module_cache import compiler_version
+from module_graph import resolve_module
+
+# === Incremental Build Manifest ===
+#
+# After a successful build, main() records a hash of every input that went
+# into the binary: the Forge source, each module it transitively loaded (and
+# the file each load resolved to), the runtime headers and sources under
+# includes/, the templates, the compiler itself and the gcc command line.
+# The next build recomputes those hashes first, and if nothing differs and
+# the output files still exist, the transpile and gcc steps are skipped.
+
+MANIFEST_FORMAT = 1
+
+INCLUDES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "includes")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def digest_files(pattern):
+    return {path: file_digest(path) for path in sorted(glob.glob(pattern))}
+
+
+def collect_inputs(source_path, module_files, search_paths, compile_cmd,
+                   includes_dir=INCLUDES_DIR, templates_dir=TEMPLATES_DIR):
+    # module_files maps each load path to the file it resolved to last time;
+    # resolving it again catches a module that is now shadowed by another file
+    modules = {}
+    for load_path, full_path in sorted(module_files.items()):
+        resolved = resolve_module(load_path, search_paths)
+        if resolved is None:
+            return None
+        modules[load_path] = [resolved, file_digest(resolved)]
+    runtime = digest_files(os.path.join(includes_dir, "*.h"))
+    runtime.update(digest_files(os.path.join(includes_dir, "*.c")))
+    return {
+        "compiler": compiler_version(),
+        "command": list(compile_cmd),
+        "source": [source_path, file_digest(source_path)],
+        "modules": modules,
+        "runtime": runtime,
+        "templates": digest_files(os.path.join(templates_dir, "*")),
+    }
+
+
+class BuildManifest:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+            return None
+        return manifest
+
+    def is_current(self, source_path, search_paths, compile_cmd, outputs):
+        manifest = self.load()
+        if manifest is None or not all(os.path.exists(path) for path in outputs):
+            return False
+        previous = manifest.get("inputs", {})
+        module_files = {load: entry[0] for load, entry in previous.get("modules", {}).items()}
+        try:
+            current = collect_inputs(source_path, module_files, search_paths, compile_cmd)
+        except OSError:
+            return False
+        return current == previous
+
+    def store(self, source_path, module_files, search_paths, compile_cmd):
+        inputs = collect_inputs(source_path, module_files, search_paths, compile_cmd)
+        if inputs is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"format": MANIFEST_FORMAT, "inputs": inputs}, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
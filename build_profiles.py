@@ -0,0 +1,57 @@
+import os
+import shutil
+import subprocess
+
+import forge_trace
+
+build_log = forge_trace.channel("build")
+
+# === Build Profiles ===
+#
+# Named gcc configurations selected with --profile. "pgo" is a two-phase
+# build: the program is compiled with instrumentation, run once per training
+# input (each file is fed to the program on stdin), and then recompiled using
+# the recorded profile.
+
+PROFILES = {
+    "debug":       {"cflags": ["-O0", "-g"], "ldflags": [], "pgo": False},
+    "release":     {"cflags": ["-O2"], "ldflags": [], "pgo": False},
+    "release-lto": {"cflags": ["-O2", "-flto"], "ldflags": ["-flto"], "pgo": False},
+    "pgo":         {"cflags": ["-O2"], "ldflags": [], "pgo": True},
+}
+
+DEFAULT_PROFILE = "debug"
+
+
+def gcc_command(profile_name, cflags, inputs, output):
+    profile = PROFILES[profile_name]
+    return ["gcc", *cflags, *profile["cflags"], *inputs, "-o", output, *profile["ldflags"]]
+
+
+def run_training(executable, train_inputs):
+    # The exit status of a training run does not matter, only the profile it leaves behind
+    if not train_inputs:
+        subprocess.run([executable], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        return
+    for path in train_inputs:
+        build_log.info("pgo: training run with %s", path)
+        with open(path, "rb") as stdin:
+            subprocess.run([executable], stdin=stdin, stdout=subprocess.DEVNULL)
+
+
+def build_program(profile_name, command, executable, train_inputs=(), pgo_dir=None):
+    # command is a full gcc command line from gcc_command(); raises CalledProcessError
+    if not PROFILES[profile_name]["pgo"]:
+        subprocess.run(command, check=True)
+        return
+
+    pgo_dir = os.path.abspath(pgo_dir or executable + ".pgo")
+    shutil.rmtree(pgo_dir, ignore_errors=True)  # stale counters from an older binary would be rejected
+
+    build_log.info("pgo: building instrumented binary")
+    subprocess.run(command[:1] + [f"-fprofile-generate={pgo_dir}"] + command[1:], check=True)
+    run_training(executable, train_inputs)
+
+    build_log.info("pgo: rebuilding with profile from %s", pgo_dir)
+    use_flags = [f"-fprofile-use={pgo_dir}", "-fprofile-correction", "-Wno-missing-profile"]
+    subprocess.run(command[:1] + use_flags + command[1:], check=True)
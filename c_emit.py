@@ -0,0 +1,150 @@
+# === Emission Buffer ===
+#
+# Generated C is built as a tree of Code nodes rather than strings. A block
+# keeps its list of lines, a template keeps the text around a loop body and
+# the body itself by reference, and indentation is a property of the node:
+# nothing is joined or indented until the program is written out, in one
+# pass, straight to a file or into one string. Nesting a body one level
+# deeper is O(1), where joining a block into a string and re-indenting it
+# for every enclosing statement copied the inner code once per level.
+
+import re
+
+LINE_WITH_TEXT = re.compile(r"\n(?=[^\n])")
+
+
+class Code:
+    # parts are written one after another with sep between them; a part is a
+    # string, a nested Code, or anything else (written with str()). indent
+    # spaces go in front of every non-empty line the parts produce, and in
+    # front of the first line even when it is empty unless first is False,
+    # which is what jinja's indent(width, first) filter does to a string
+    __slots__ = ("parts", "sep", "indent", "first")
+
+    def __init__(self, parts, sep="", indent=0, first=True):
+        self.parts = parts
+        self.sep = sep
+        self.indent = indent
+        self.first = first
+
+    def __bool__(self):
+        # Empty when it writes nothing, like the string it replaces
+        return any(self.parts)
+
+    def __str__(self):
+        chunks = []
+        CodeWriter(chunks.append).write_code(self)
+        return "".join(chunks)
+
+    def write_to(self, f):
+        CodeWriter(f.write).write_code(self)
+
+
+def joined(parts, sep=""):
+    # sep.join(parts) when the parts are all strings, which only leaf code
+    # is; otherwise a node holding them by reference. A string never has a
+    # nested block in it, so joining one copies nothing twice
+    try:
+        return sep.join(parts)
+    except TypeError:
+        return Code(parts, sep)
+
+
+def lines(parts):
+    # The parts as consecutive lines
+    return joined(parts, "\n")
+
+
+def block(body, width=4):
+    # body with every line indented one level deeper
+    return Code([body], indent=width)
+
+
+class CodeWriter:
+    # Writes a Code tree through write(), keeping track of the line being
+    # written instead of re-splitting text per nesting level: the indentation
+    # a line owes is added when its first character goes out, so every
+    # character of the program is copied once
+    def __init__(self, write):
+        self.write = write
+        self.line = 0  # newlines written so far
+        self.at_line_start = True
+        self.pending = 0  # indentation owed to the current line once it gets content
+        self.total = 0  # indentation of all open nodes
+
+    def text(self, s):
+        if not s:
+            return
+        if self.at_line_start and s[0] != "\n":
+            if self.pending:
+                self.write(" " * self.pending)
+            self.at_line_start = False
+        newlines = s.count("\n")
+        if not newlines:
+            self.write(s)
+            return
+        if self.total:
+            # Every line that starts inside s and has text owes all open indentation
+            s = LINE_WITH_TEXT.sub("\n" + " " * self.total, s)
+        self.write(s)
+        self.line += newlines
+        self.at_line_start = s[-1] == "\n"
+        if self.at_line_start:
+            self.pending = self.total
+
+    def open(self, node):
+        if node.indent:
+            self.total += node.indent
+            if node.first:
+                # The node's first line is indented even if it stays empty,
+                # which also makes it a non-empty line for the enclosing nodes
+                if self.at_line_start:
+                    self.write(" " * (self.pending + node.indent))
+                    self.at_line_start = False
+                else:
+                    self.write(" " * node.indent)
+        return self.line
+
+    def close(self, node, opened_line):
+        if node.indent:
+            self.total -= node.indent
+            # Only lines started while the node was open owe its indentation
+            if self.at_line_start and opened_line < self.line:
+                self.pending -= node.indent
+
+    def push(self, stack, node):
+        opened_line = self.open(node)
+        try:
+            # A node of plain strings, which most are, goes out in one piece
+            text = node.sep.join(node.parts)
+        except TypeError:
+            stack.append([node, 0, opened_line])
+            return
+        self.text(text)
+        self.close(node, opened_line)
+
+    def write_code(self, code):
+        # Iterative, so nesting depth is not limited by the recursion limit
+        stack = []
+        self.push(stack, code)
+        while stack:
+            frame = stack[-1]
+            node, i = frame[0], frame[1]
+            parts = node.parts
+            if i == len(parts):
+                self.close(node, frame[2])
+                stack.pop()
+                continue
+            if i and node.sep:
+                self.text(node.sep)
+            part = parts[i]
+            if type(part) is Code:
+                frame[1] = i + 1
+                self.push(stack, part)
+                continue
+            # The run of text up to the next nested node, in one piece
+            j = i + 1
+            while j < len(parts) and type(parts[j]) is not Code:
+                j += 1
+            frame[1] = j
+            self.text(node.sep.join(map(str, parts[i:j])))
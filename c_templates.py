@@ -0,0 +1,271 @@
+import keyword
+import os
+import re
+import sys
+
+from c_emit import Code, joined
+
+# === C Code Templates ===
+#
+# The C snippets in templates/*.c.j2 are compiled into plain Python functions
+# the first time each one is used, so emitting a loop or a function definition
+# is one call instead of a Jinja lookup and render:
+#
+#   templates.for_statement(init=..., condition=..., update=..., body=...)
+#
+# The result is the text Jinja renders when every value is a string and
+# nothing goes through | indent. Otherwise it is a c_emit.Code node that holds
+# the template text and the values by reference, and str() of it is that
+# text: a body passed through | indent is indented when the program is
+# written, not copied.
+#
+# The compiler handles the part of Jinja these templates use: {{ expr }} with
+# attribute access and the indent/join filters, {% if %}/{% elif %}/{% else %}
+# with == and != tests, and {% for x in xs %}. Whitespace follows Jinja's
+# defaults (no trim_blocks, the template's final newline dropped). A template
+# using anything else is handed to jinja2 when it is installed and is an error
+# when it is not, so jinja2 is not needed to run the compiler. Templates are
+# found next to this file, whatever the working directory.
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_SUFFIX = ".c.j2"
+
+TAG_PATTERN = re.compile(r"\{\{(.*?)\}\}|\{%(.*?)%\}|\{#.*?#\}", re.S)
+# Words that mean something in a Jinja expression, which the compiler would misread as variables
+JINJA_WORDS = {"not", "and", "or", "in", "is", "if", "else", "true", "false", "none", "True", "False", "None"}
+# Names the generated functions use themselves
+RESERVED_NAMES = {"out", "str", "map", "Code", "joined", "attr"}
+EXPR_TOKEN = re.compile(r"""\s*(?:([A-Za-z_]\w*)|("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(\d+)|(==|!=|[.|(),]))""")
+
+
+class Unsupported(Exception):
+    pass
+
+
+# --- Runtime helper the generated functions call ---
+
+def attr(obj, name):
+    # Jinja looks up attributes first and falls back to items; a plain dict
+    # without such an attribute goes straight to the item
+    if type(obj) is dict and not hasattr(dict, name):
+        return obj[name]
+    try:
+        return getattr(obj, name)
+    except AttributeError:
+        return obj[name]
+
+
+# --- Compiler ---
+
+class Expression:
+    def __init__(self, text, names, bound):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            m = EXPR_TOKEN.match(text, pos)
+            if not m or m.end() == pos:
+                raise Unsupported(f"cannot compile expression {text!r}")
+            self.tokens.append(next(t for t in m.groups() if t is not None))
+            pos = m.end()
+        self.pos = 0
+        self.names = names  # template variables (the function's parameters), in first-use order
+        self.bound = bound  # loop variables in scope
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise Unsupported(f"expected {expected or 'more'} in expression, got {token!r}")
+        self.pos += 1
+        return token
+
+    def compile(self):
+        code = self.filtered()
+        if self.peek() in ("==", "!="):
+            op = self.take()
+            code = f"({code} {op} {self.filtered()})"
+        if self.peek() is not None:
+            raise Unsupported(f"unexpected {self.peek()!r} in expression")
+        return code
+
+    def filtered(self):
+        code = self.primary()
+        while self.peek() == "|":
+            self.take()
+            name = self.take()
+            args = []
+            if self.peek() == "(":
+                self.take()
+                while self.peek() != ")":
+                    args.append(self.literal())
+                    if self.peek() == ",":
+                        self.take()
+                self.take(")")
+            if name == "indent" and len(args) <= 2 and all(a.isdigit() or a in ("True", "False") for a in args):
+                width = args[0] if args else "4"
+                first = args[1] if len(args) > 1 else "False"
+                code = f"Code([{code}], indent={width}, first={first})"
+            elif name == "join" and len(args) <= 1:
+                code = f"{args[0] if args else repr('')}.join(map(str, {code}))"
+            else:
+                raise Unsupported(f"filter {name!r}")
+        return code
+
+    def primary(self):
+        token = self.peek()
+        if token is None or not (token[0].isalpha() or token[0] == "_"):
+            return self.literal()
+        if token in JINJA_WORDS:
+            raise Unsupported(f"{token!r} in expression")
+        self.take()
+        if token in self.bound:
+            code = f"v_{token}"
+        elif keyword.iskeyword(token) or token in RESERVED_NAMES:
+            raise Unsupported(f"variable {token!r}")
+        else:
+            code = self.names.setdefault(token, token)
+        while self.peek() == ".":
+            self.take()
+            code = f"attr({code}, {self.take()!r})"
+        return code
+
+    def literal(self):
+        token = self.take()
+        if token[0] in "\"'" or token.isdigit():
+            return token
+        if token in ("true", "false"):
+            return token.capitalize()
+        raise Unsupported(f"expected a literal, got {token!r}")
+
+
+def compile_template(name, source):
+    # Returns the Python source of a function `name` taking the template's
+    # variables as keyword arguments and returning the rendering as a Code
+    if source.endswith("\n"):
+        source = source[:-1]  # Jinja drops the template's final newline
+    names = {}
+    bound = []
+    lines = []
+    blocks = []  # open "if" / "for" tags
+    depth = 1
+    pending = []  # pieces of output not yet flushed into an append
+
+    def flush():
+        if pending:
+            lines.append("    " * depth + f"out.extend(({', '.join(pending)},))")
+            pending.clear()
+
+    def close_block():
+        if lines[-1].endswith(":"):
+            lines.append("    " * depth + "pass")  # nothing rendered inside
+
+    pos = 0
+    for m in TAG_PATTERN.finditer(source):
+        if m.start() > pos:
+            pending.append(repr(source[pos:m.start()]))
+        pos = m.end()
+        output, statement = m.group(1), m.group(2)
+        if output is not None:
+            if output.startswith("-") or output.endswith("-"):
+                raise Unsupported("whitespace control")
+            pending.append(Expression(output, names, bound).compile())
+            continue
+        if statement is None:
+            continue  # comment
+        if statement.startswith("-") or statement.endswith("-"):
+            raise Unsupported("whitespace control")
+        flush()
+        keyword, _, rest = statement.strip().partition(" ")
+        if keyword == "if":
+            lines.append("    " * depth + f"if {Expression(rest, names, bound).compile()}:")
+            blocks.append("if")
+            depth += 1
+        elif keyword in ("elif", "else") and blocks and blocks[-1] == "if":
+            close_block()
+            header = f"elif {Expression(rest, names, bound).compile()}:" if keyword == "elif" else "else:"
+            lines.append("    " * (depth - 1) + header)
+        elif keyword == "for":
+            target, sep, iterable = rest.partition(" in ")
+            if not sep or not target.strip().isidentifier():
+                raise Unsupported(f"for {rest}")
+            iterable_code = Expression(iterable, names, bound).compile()
+            bound.append(target.strip())
+            lines.append("    " * depth + f"for v_{target.strip()} in {iterable_code}:")
+            blocks.append("for")
+            depth += 1
+        elif keyword in ("endif", "endfor") and blocks and blocks[-1] == keyword[3:]:
+            close_block()
+            if blocks.pop() == "for":
+                bound.pop()
+            depth -= 1
+        else:
+            raise Unsupported(f"tag {statement.strip()!r}")
+    if pos < len(source):
+        pending.append(repr(source[pos:]))
+    if blocks:
+        raise Unsupported(f"unclosed {blocks[-1]}")
+
+    params = list(names)
+    signature = f"def {name}({'*, ' + ', '.join(params) if params else ''}):"
+    if not lines:
+        # Straight-line template: one node
+        return "\n".join([signature, f"    return joined(({', '.join(pending)},))"]) + "\n"
+    flush()
+    return "\n".join([signature, "    out = []"] + lines + ["    return joined(out)"]) + "\n"
+
+
+def load_template(path):
+    name = os.path.basename(path)[:-len(TEMPLATE_SUFFIX)]
+    with open(path) as f:
+        source = f.read()
+    try:
+        code = compile_template(name, source)
+    except Unsupported as e:
+        return jinja_template(path, str(e))
+    namespace = {"Code": Code, "joined": joined, "attr": attr}
+    exec(compile(code, path, "exec"), namespace)
+    function = namespace[name]
+    function.source = code
+    return function
+
+
+def jinja_template(path, reason):
+    try:
+        # Optional: only needed for templates the compiler above cannot handle
+        from jinja2 import Environment, FileSystemLoader
+    except ImportError:
+        raise Exception(f"{os.path.basename(path)}: {reason}, and jinja2 is not installed to render it") from None
+    template = Environment(loader=FileSystemLoader(os.path.dirname(path))).get_template(os.path.basename(path))
+    return template.render
+
+
+class Templates:
+    # templates.<name>(**variables) renders templates/<name>.c.j2
+    def __init__(self, directory=TEMPLATES_DIR):
+        self.directory = directory
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        path = os.path.join(self.directory, name + TEMPLATE_SUFFIX)
+        if not os.path.exists(path):
+            raise AttributeError(f"no template {name}{TEMPLATE_SUFFIX} in {self.directory}")
+        # Cached on the instance, so later calls never come back here
+        function = load_template(path)
+        setattr(self, name, function)
+        return function
+
+
+templates = Templates()
+
+
+if __name__ == "__main__":
+    # python c_templates.py [name ...]: print the Python each template compiles to
+    names = sys.argv[1:] or sorted(f[:-len(TEMPLATE_SUFFIX)] for f in os.listdir(TEMPLATES_DIR)
+                                   if f.endswith(TEMPLATE_SUFFIX))
+    for name in names:
+        with open(os.path.join(TEMPLATES_DIR, name + TEMPLATE_SUFFIX)) as f:
+            print(compile_template(name, f.read()))
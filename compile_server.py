@@ -0,0 +1,233 @@
+import argparse
+import glob
+import hashlib
+import io
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import forge_trace
+from c_templates import TEMPLATES_DIR
+from build_manifest import INCLUDES_DIR, digest_files
+from build_profiles import DEFAULT_PROFILE, PROFILES, gcc_command
+from forge_client import ROOT, default_socket_path, recv_message, send_message
+from forge_parser import Parser
+from lexer import Lexer
+from module_cache import MemoryModuleCache, default_cache_dir
+from transpile_to_c import CTranspiler
+
+server_log = forge_trace.channel("server")
+
+# === Compile Server ===
+#
+# A long-lived process that keeps the transpiler warm for forge_client.py:
+# the compiler and its compiled templates stay loaded, loaded modules stay in
+# a MemoryModuleCache (AST plus registered symbols), and entry programs are
+# kept parsed by the hash of their source. Everything is keyed on file
+# contents, so an edited program or module is simply a miss, and executables
+# are cached by the hash of the C, the runtime headers and the gcc command.
+# Edits to the compiler's own Python sources or templates cannot be reloaded
+# in place, so the server answers the next request with "restart" and exits,
+# and the client starts a fresh one.
+#
+# Requests are handled one at a time. The socket is created mode 0600, since
+# anyone who can connect can make the server read files and run gcc.
+
+IDLE_TIMEOUT = 30 * 60  # seconds without a request before the server exits
+MAX_PROGRAMS = 64  # parsed entry programs kept in memory
+SERVER_CFLAGS = ["-w"]
+
+
+def mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def source_stamps():
+    # mtime of every module this process imported from the repository, and of
+    # the templates, which are compiled once per process
+    stamps = {path: mtime(path) for path in glob.glob(os.path.join(TEMPLATES_DIR, "*"))}
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == ROOT:
+            path = os.path.abspath(path)
+            stamps[path] = mtime(path)
+    return stamps
+
+
+def program_key(c_source, command):
+    h = hashlib.sha256()
+    h.update(repr(list(command)).encode())
+    h.update(repr(sorted(digest_files(os.path.join(INCLUDES_DIR, "*.h")).items())).encode())
+    h.update(c_source.encode())
+    return h.hexdigest()
+
+
+def listen(socket_path):
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)  # left behind by a server that died
+        else:
+            probe.close()
+            return None
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen(16)
+    return listener
+
+
+class CompileServer:
+    def __init__(self, cache_dir=None, idle_timeout=IDLE_TIMEOUT):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.idle_timeout = idle_timeout
+        self.module_cache = MemoryModuleCache(self.cache_dir)
+        self.programs = OrderedDict()  # source hash -> pickled AST
+        self.stamps = source_stamps()
+        self.started = time.time()
+        self.requests = 0
+        self.running = False
+
+    def serve(self, socket_path):
+        listener = listen(socket_path)
+        if listener is None:
+            server_log.warn("a compile server is already listening on %s", socket_path)
+            return
+        server_log.info("listening on %s (pid %d)", socket_path, os.getpid())
+        listener.settimeout(self.idle_timeout)
+        self.running = True
+        try:
+            while self.running:
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    server_log.info("idle for %ds, exiting", self.idle_timeout)
+                    break
+                with conn:
+                    conn.settimeout(None)
+                    try:
+                        message = recv_message(conn)
+                    except (OSError, ValueError):
+                        continue
+                    response = self.handle(message)
+                    try:
+                        send_message(conn, response)
+                    except OSError:
+                        pass
+        finally:
+            listener.close()
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    def handle(self, message):
+        op = message.get("op")
+        self.requests += 1
+        if op == "status":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "modules": len(self.module_cache.entries),
+                "programs": len(self.programs),
+            }
+        if op == "stop":
+            self.running = False
+            return {"ok": True}
+        if op not in ("c", "build"):
+            return {"ok": False, "error": f"unknown request: {op!r}"}
+        if any(mtime(path) != stamp for path, stamp in self.stamps.items()):
+            self.running = False
+            return {"ok": False, "restart": True, "error": "compiler sources changed, restarting the server"}
+
+        start = time.perf_counter()
+        log = io.StringIO()
+        try:
+            forge_trace.configure(message.get("trace"), stream=log)
+            c_code = self.transpile(message["source"], message.get("cwd") or ROOT)
+            if op == "c":
+                response = {"ok": True, "c": c_code}
+            else:
+                binary, cached = self.build(c_code, message.get("profile") or DEFAULT_PROFILE)
+                response = {"ok": True, "binary": binary, "cached": cached}
+        except subprocess.CalledProcessError as e:
+            log.write(e.stderr or "")
+            response = {"ok": False, "error": "Compilation failed"}
+        except Exception as e:
+            # Reported to the client; the server keeps running
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            forge_trace.configure(os.environ.get("FORGE_TRACE"))
+        response["log"] = log.getvalue()
+        server_log.info("%s %s: %.1f ms", op, message.get("source"), (time.perf_counter() - start) * 1000)
+        return response
+
+    def parse(self, source):
+        key = hashlib.sha256(source.encode()).hexdigest()
+        blob = self.programs.get(key)
+        if blob is not None:
+            self.programs.move_to_end(key)
+            # The transpiler annotates the AST it walks, so every request gets a fresh copy
+            return pickle.loads(blob)
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        try:
+            self.programs[key] = pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            return ast
+        while len(self.programs) > MAX_PROGRAMS:
+            self.programs.popitem(last=False)
+        return ast
+
+    def transpile(self, source_path, cwd):
+        path = os.path.join(cwd, source_path)
+        with open(path) as f:
+            source = f.read()
+        transpiler = CTranspiler(module_cache=self.module_cache)
+        # Modules resolve against the client's directory, not the server's
+        transpiler.module_search_paths = [os.path.join(cwd, p) for p in transpiler.module_search_paths]
+        return transpiler.gen_Program(self.parse(source))
+
+    def build(self, c_code, profile):
+        # Returns (path of the executable, whether it was already cached)
+        if profile not in PROFILES:
+            raise ValueError(f"unknown profile {profile!r}, expected one of {', '.join(sorted(PROFILES))}")
+        if PROFILES[profile]["pgo"]:
+            raise ValueError("the pgo profile needs a training run; pick another profile")
+        cflags = SERVER_CFLAGS + ["-I", INCLUDES_DIR]
+        key = program_key(c_code, gcc_command(profile, cflags, ["program.c"], "program"))
+        binary = os.path.join(self.cache_dir, "programs", key[:2], key)
+        if os.path.exists(binary):
+            return binary, True
+        os.makedirs(os.path.dirname(binary), exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(binary)) as workdir:
+            c_path = os.path.join(workdir, "program.c")
+            with open(c_path, "w") as f:
+                f.write(c_code)
+            tmp_binary = os.path.join(workdir, "program")
+            subprocess.run(gcc_command(profile, cflags, [c_path], tmp_binary),
+                           check=True, capture_output=True, text=True)
+            os.replace(tmp_binary, binary)
+        return binary, False
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Keep the Forge transpiler warm behind a Unix socket")
+    ap.add_argument("--socket", help="socket path (default: $FORGE_SERVER_SOCKET or FORGE_CACHE_DIR/server.sock)")
+    ap.add_argument("--idle", type=int, default=IDLE_TIMEOUT, help="exit after this many seconds without a request")
+    args = ap.parse_args()
+    CompileServer(idle_timeout=args.idle).serve(args.socket or default_socket_path())
+
+
+if __name__ == "__main__":
+    main()
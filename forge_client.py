@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+from module_cache import default_cache_dir
+
+# === Compile Server Client ===
+#
+# Talks to compile_server.py over a Unix socket: one JSON request per
+# connection, one JSON line back. Nothing heavier than the standard library
+# is imported here (subprocess only to start a server or run a program), so a
+# client invocation costs Python start-up and a round trip, not jinja2 and
+# the transpiler. If no server is listening one is started in the background
+# and the request waits for it.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+START_TIMEOUT = 10.0  # seconds to wait for a freshly started server
+
+
+def default_socket_path():
+    return os.environ.get("FORGE_SERVER_SOCKET") or os.path.join(default_cache_dir(), "server.sock")
+
+
+def send_message(sock, message):
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+
+def recv_message(sock):
+    with sock.makefile("rb") as f:
+        line = f.readline()
+    if not line:
+        raise ConnectionError("compile server closed the connection")
+    return json.loads(line)
+
+
+def connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def start_server(socket_path):
+    import subprocess
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    log_path = os.path.join(os.path.dirname(socket_path), "server.log")
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "compile_server.py"), "--socket", socket_path],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True,
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while True:
+        try:
+            return connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() > deadline:
+                raise ConnectionError(f"compile server did not start, see {log_path}") from None
+            time.sleep(0.02)
+
+
+def request(message, socket_path=None, start=True):
+    socket_path = socket_path or default_socket_path()
+    # A server that finds its own sources edited answers "restart" and exits;
+    # the retry then reaches a fresh one
+    for _ in range(2):
+        try:
+            sock = connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not start:
+                raise ConnectionError(f"no compile server at {socket_path}") from None
+            sock = start_server(socket_path)
+        with sock:
+            send_message(sock, message)
+            response = recv_message(sock)
+        if not response.get("restart"):
+            return response
+        deadline = time.monotonic() + START_TIMEOUT
+        while os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    return response
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transpile and build Forge programs through the compile server")
+    ap.add_argument("--socket", help="server socket (default: $FORGE_SERVER_SOCKET or FORGE_CACHE_DIR/server.sock)")
+    ap.add_argument("--no-start", action="store_true", help="fail instead of starting a server")
+    ap.add_argument("--trace", default=os.environ.get("FORGE_TRACE"),
+                    help='trace levels for the request, e.g. "debug" or "types=debug"')
+    commands = ap.add_subparsers(dest="command", required=True)
+    c = commands.add_parser("c", help="print the generated C")
+    c.add_argument("source")
+    c.add_argument("-o", "--output", help="write the C here instead of stdout")
+    build = commands.add_parser("build", help="compile and print the path of the cached executable")
+    build.add_argument("source")
+    build.add_argument("--profile", help="build profile other than pgo (default: debug)")
+    build.add_argument("--run", action="store_true", help="run the executable instead of printing its path")
+    commands.add_parser("status", help="show what the server holds in memory")
+    commands.add_parser("stop", help="shut the server down")
+    args = ap.parse_args()
+
+    message = {"op": args.command}
+    if args.command in ("c", "build"):
+        message.update(source=os.path.abspath(args.source), cwd=os.getcwd(), trace=args.trace)
+    if args.command == "build":
+        message["profile"] = args.profile
+
+    try:
+        response = request(message, args.socket, start=not args.no_start and args.command != "stop")
+    except ConnectionError as e:
+        if args.command == "stop":
+            return
+        sys.exit(f"error: {e}")
+    sys.stderr.write(response.get("log", ""))
+    if not response["ok"]:
+        sys.exit(f"error: {response['error']}")
+
+    if args.command == "c":
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(response["c"])
+        else:
+            sys.stdout.write(response["c"])
+    elif args.command == "build":
+        if args.run:
+            import subprocess
+            sys.stdout.flush()
+            sys.exit(subprocess.run([response["binary"]]).returncode)
+        print(response["binary"])
+    elif args.command == "status":
+        print(json.dumps({k: v for k, v in response.items() if k not in ("ok", "log")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
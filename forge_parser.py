@@ -1,33 +1,47 @@
 from lexer import Token, Lexer
-print("[LOADED] forge_parser.py from:", __file__)
+import forge_trace
+
+parser_log = forge_trace.channel("parser")
+parser_log.debug("loaded forge_parser.py from: %s", __file__)
 
             # AST Node Classes #
 
 
-class ASTNode: pass
+class ASTNode:
+    __slots__ = ()
+
+class AddressOf(ASTNode):
+    __slots__ = ("expr",)
 
-class AddressOf:
     def __init__(self, expr):
         self.expr = expr
 
-class LoadStmt:
+class LoadStmt(ASTNode):
+    __slots__ = ("path",)
+
     def __init__(self, path):
         self.path = path
 
 
 class ErrorDef(ASTNode):
+    __slots__ = ("name", "fields")
+
     def __init__(self, name, fields):
         self.name = name
         self.fields = fields
 
 
 class AttemptRescue(ASTNode):
+    __slots__ = ("try_block", "error_name", "rescue_block")
+
     def __init__(self, try_block, error_name, rescue_block):
         self.try_block = try_block
         self.error_name = error_name
         self.rescue_block = rescue_block
 
 class AttemptRescueExpr(ASTNode):
+    __slots__ = ("try_expr", "error_name", "rescue_expr")
+
     def __init__(self, try_expr, error_name, rescue_expr):
         self.try_expr = try_expr
         self.error_name = error_name
@@ -35,58 +49,76 @@ class AttemptRescueExpr(ASTNode):
 
 
 class TryExpr(ASTNode):
+    __slots__ = ("expr", "fallback")
+
     def __init__(self, expr, fallback):
         self.expr = expr
         self.fallback = fallback
 
 
 class NullLiteral(ASTNode):
-    pass
+    __slots__ = ()
 
 
 class BreakStatement(ASTNode):
-    pass
+    __slots__ = ()
 
 
 class StructDef(ASTNode):
+    __slots__ = ("name", "fields")
+
     def __init__(self, name, fields):  # fields: list of (name, type)
         self.name = name
         self.fields = fields
 
 
 class StructInstance(ASTNode):
+    __slots__ = ("struct_name", "args")
+
     def __init__(self, struct_name, args):
         self.struct_name = struct_name
         self.args = args
 
 
-class StructValue:
+class StructValue(ASTNode):
+    __slots__ = ("fields",)
+
     def __init__(self, fields):
         self.fields = fields  # dict
 
 
 class Block(ASTNode):
+    __slots__ = ("statements",)
+
     def __init__(self, statements):
         self.statements = statements
 
 
 class MemberAccess(ASTNode):
+    __slots__ = ("obj", "name")
+
     def __init__(self, obj, name):
         self.obj = obj    
         self.name = name  
 
 
 class Program(ASTNode):
+    __slots__ = ("statements",)
+
     def __init__(self, statements): self.statements = statements
 
 
 class Assignment(ASTNode):
+    __slots__ = ("target", "expr")
+
     def __init__(self, target, expr):
         self.target = target  # Can be a string (ID) or a MemberAccess
         self.expr = expr
 
 
 class ReadFile(ASTNode):
+    __slots__ = ("path_expr",)
+
     def __init__(self, path_expr):
         self.path_expr = path_expr
 
@@ -104,19 +136,27 @@ class ReadFile(ASTNode):
 
 
 class ReturnStatement(ASTNode):
-    def __init__(self, expr): self.expr = expr
+    __slots__ = ("expr", "_force_return_type")
+
+    def __init__(self, expr):
+        self.expr = expr
+        self._force_return_type = None  # set by the transpiler from the enclosing fn
 
 
 class FunctionDef(ASTNode):
+    __slots__ = ("name", "params", "body", "return_type")
+
     def __init__(self, name, params, body, return_type=None):
         self.name = name
         self.params = params
         self.body = body
         self.return_type = return_type  
-        print("FUNC: " , name, "return type is", return_type)
+        parser_log.debug("FUNC: %s return type is %s", name, return_type)
 
 
 class IfExpr(ASTNode):
+    __slots__ = ("condition", "then_branch", "elif_branches", "else_branch")
+
     def __init__(self, condition, then_branch, elif_branches, else_branch):
         self.condition = condition
         self.then_branch = then_branch
@@ -125,15 +165,20 @@ class IfExpr(ASTNode):
 
 
 class WhileLoop(ASTNode):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
-class Expression(ASTNode): pass
+class Expression(ASTNode):
+    __slots__ = ()
 
 
 class ForStatement(ASTNode):
+    __slots__ = ("init", "condition", "increment", "body")
+
     def __init__(self, init, condition, increment, body):
         self.init = init
         self.condition = condition
@@ -141,32 +186,60 @@ class ForStatement(ASTNode):
         self.body = body
 
 
+class ForInStatement(ASTNode):
+    __slots__ = ("name", "iterable", "body")
+
+    def __init__(self, name, iterable, body):
+        self.name = name
+        self.iterable = iterable
+        self.body = body
+
+
 class ListLiteral(ASTNode):
+    __slots__ = ("elements", "_forced_type_hint")
+
     def __init__(self, elements):
         self.elements = elements
+        self._forced_type_hint = None  # set from `let x: T = @(...)`
+
+
+class MapLiteral(ASTNode):
+    __slots__ = ("entries", "_forced_type_hint")
+
+    def __init__(self, entries):
+        self.entries = entries  # [(key_expr, value_expr), ...]
+        self._forced_type_hint = None  # "map:<key>:<value>", inferred by the transpiler
 
 
 class ExternExpr(ASTNode):
+    __slots__ = ("name", "arg_types", "return_type")
+
     def __init__(self, name, arg_types, return_type="int"):
         self.name = name         # function name as string
         self.arg_types = arg_types
         self.return_type = return_type or "int"
-        print(f"[DEBUG] ExternExpr created: {name}, args={arg_types}, return_type={return_type}")
+        parser_log.debug("ExternExpr created: %s, args=%s, return_type=%s", name, arg_types, return_type)
 
 
 class SubscriptExpr(ASTNode):
+    __slots__ = ("target", "index")
+
     def __init__(self, target, index):
         self.target = target
         self.index = index
 
 
 class UnaryExpr(ASTNode):
+    __slots__ = ("op", "operand")
+
     def __init__(self, op, operand):
         self.op = op
         self.operand = operand
 
 
 class LetStatement(ASTNode):
+    __slots__ = ("name", "expr", "type_hint")
+
     def __init__(self, name, expr, type_hint=None):
         self.name = name
         self.expr = expr
@@ -177,47 +250,67 @@ class LetStatement(ASTNode):
 
 
 class ExpressionStatement(ASTNode):
+    __slots__ = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class ArrayLiteral(ASTNode):
+    __slots__ = ("elements",)
+
     def __init__(self, elements):
         self.elements = elements
 
 
 class PropertyAccess(ASTNode):
+    __slots__ = ("object", "prop")
+
     def __init__(self, object_expr, prop):
         self.object = object_expr
         self.prop = prop
 
 
 class BinaryExpr(Expression):
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right): self.left, self.op, self.right = left, op, right
 
 
 class NumberLiteral(Expression):
+    __slots__ = ("value", "is_float")
+
     def __init__(self, value): 
         self.value = value
         self.is_float = isinstance(value, float)
 
 
 class StringLiteral(Expression):
+    __slots__ = ("value",)
+
     def __init__(self, value): self.value = value
 
 
 class Identifier(Expression):
+    __slots__ = ("name",)
+
     def __init__(self, name): self.name = name
 
 
 class CallExpr(Expression):
+    __slots__ = ("func", "args", "_expected_type")
+
     def __init__(self, func, args):
         self.func = func
         self.args = args
-        print(f"[DEBUG] CallExpr created: {repr(func)} with args = {[type(arg).__name__ for arg in args]}")
+        self._expected_type = None  # set from `let x: T = input(...)`
+        if parser_log.enabled(forge_trace.DEBUG):
+            parser_log.debug("CallExpr created: %r with args = %s", func, [type(arg).__name__ for arg in args])
 
 
 class PostfixExpr(ASTNode):
+    __slots__ = ("operand", "op")
+
     def __init__(self, operand, op):
         self.operand = operand
         self.op = op
@@ -237,25 +330,46 @@ class Parser:
     }
 
     
+    # Consumed tokens are dropped once the window grows past this many
+    WINDOW_SLACK = 64
+
     def __init__(self, tokens):
-        self.tokens = tokens
+        # tokens may be a list or any iterator (e.g. Lexer.iter_tokens()).
+        # Only a small window is kept: the previous token for prev() plus
+        # whatever lookahead peek() has pulled in.
+        self.source = iter(tokens)
+        self.window = []
+        self.window_start = 0  # absolute position of window[0]
         self.pos = 0
 
 
     def peek(self, offset=0):
-        if self.pos + offset < len(self.tokens):
-            return self.tokens[self.pos + offset]
-        return None
+        index = self.pos + offset - self.window_start
+        window = self.window
+        while index >= len(window):
+            tok = next(self.source, None)
+            if tok is None:
+                return None
+            window.append(tok)
+        return window[index]
+
+
+    def step(self):
+        self.pos += 1
+        if self.pos - self.window_start > self.WINDOW_SLACK:
+            drop = self.pos - 1 - self.window_start
+            del self.window[:drop]
+            self.window_start += drop
 
 
     def is_at_end(self):
-        return self.pos >= len(self.tokens)
+        return self.peek() is None
 
 
     def advance(self):
         if not self.is_at_end():
-            self.pos += 1
-        return self.tokens[self.pos - 1]
+            self.step()
+        return self.prev()
 
     
     def parse_unary(self):
@@ -283,6 +397,12 @@ class Parser:
         return self.parse_primary()
 
 
+    def expect_member_name(self):
+        # Name after '.'; `write` and `read` are keywords but fine as method names (f.write(...))
+        if self.check("WRITE") or self.check("READ"):
+            return self.advance()
+        return self.consume_expect("ID", "Expected property name after '.'")
+
     def consume_expect(self, expected_type, message="Expected token."):
         if self.check(expected_type):
             return self.advance()
@@ -290,7 +410,7 @@ class Parser:
 
 
     def prev(self):
-        return self.tokens[self.pos - 1]
+        return self.window[self.pos - 1 - self.window_start]
 
     
     def check(self, token_type):
@@ -300,8 +420,8 @@ class Parser:
 
 
     def consume(self):
-        if self.pos < len(self.tokens):
-            self.pos += 1
+        if not self.is_at_end():
+            self.step()
 
 
     def parse_list_literal(self):
@@ -314,15 +434,28 @@ class Parser:
         self.expect("RPAREN")
         return ListLiteral(elements)
 
+    def parse_map_literal(self):
+        self.expect("LBRACE")
+        entries = []
+        if not self.check("RBRACE"):
+            while True:
+                key = self.parse_expr()
+                self.expect("COLON")
+                entries.append((key, self.parse_expr()))
+                if not self.match("COMMA") or self.check("RBRACE"):
+                    break
+        self.expect("RBRACE")
+        return MapLiteral(entries)
+
 
     def current(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return self.peek()
 
 
     def match(self, *types):
         tok = self.current()
         if tok and tok.type in types:
-            self.pos += 1
+            self.step()
             return tok
         return None
     
@@ -382,12 +515,15 @@ class Parser:
 
 
     def parse(self):
-        stmts = []
+        return Program(list(self.iter_statements()))
+
+
+    def iter_statements(self):
+        # Yields top-level statements as soon as each one is parsed
         while self.current():
             stmt = self.parse_stmt()
             if stmt:
-                stmts.append(stmt)
-        return Program(stmts)
+                yield stmt
 
 
     def parse_stmt(self):
@@ -403,7 +539,7 @@ class Parser:
             type_hint = None
             if self.match("COLON"):
                 #self.expect("COLON")
-                type_hint = self.expect("TYPE").value  # <- unified handling
+                type_hint = self.parse_type()  # builtin type, struct name or &type
             self.expect("EQ")
             expr = self.parse_expr()
             if isinstance(expr, CallExpr) and isinstance(expr.func, Identifier) and expr.func.name == "input":
@@ -460,7 +596,7 @@ class Parser:
 
         elif self.current() and self.current().type == "ID":
             id_token = self.current()
-            next_token = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
+            next_token = self.peek(1)
             if next_token and next_token.type == "EQ":
                 self.consume()
                 self.consume()
@@ -600,7 +736,7 @@ class Parser:
                 expr = SubscriptExpr(expr, index)
             elif tok.type == "DOT":
                 self.consume()
-                name_token = self.expect("ID")
+                name_token = self.expect_member_name()
                 expr = MemberAccess(expr, name_token.value)  # ✅ ALLOW ANY expr
             elif tok.type == "INC" or tok.type == "DEC":
                 self.consume()
@@ -621,6 +757,14 @@ class Parser:
 
     def parse_for_stmt(self):
         #self.expect("FOR")
+        after = self.peek(1)
+        if self.check("ID") and after and after.type == "ID" and after.value == "in":
+            # for line in lines(path) { ... }
+            name = self.expect("ID").value
+            self.consume()
+            iterable = self.parse_expr()
+            body = self.parse_block()
+            return ForInStatement(name, iterable, body)
         if self.match("LET"):
             name = self.expect("ID").value
             # Handle optional type annotation
@@ -636,11 +780,8 @@ class Parser:
         condition = self.parse_expr()
         self.expect("SEMI")
         increment = self.parse_expr()
-        print("[DEBUG] about to parse for-loop body, current token:", self.current())
         body = self.parse_block()
-        print("[DEBUG] For-loop init:", init)
-        print("[DEBUG] For-loop condition:", type(condition).__name__, repr(condition))
-        print("[DEBUG] For-loop increment:", type(increment).__name__, repr(increment))
+        parser_log.debug("For-loop init: %s, condition: %r, increment: %r", init, condition, increment)
         return ForStatement(init, condition, increment, body)
 
 
@@ -700,7 +841,7 @@ class Parser:
             expr = Identifier(tok.value)
             while True:
                 if self.match("DOT"):
-                    prop_token = self.consume_expect("ID", "Expected property name after '.'")
+                    prop_token = self.expect_member_name()
                     expr = MemberAccess(expr, prop_token.value)
 
                 elif self.match("LBRACK"):
@@ -718,7 +859,7 @@ class Parser:
                     expr = CallExpr(expr, args)
                 else:
                     break
-            print("[DEBUG] Built primary expr node:", type(expr).__name__, repr(expr))
+            parser_log.debug("Built primary expr node: %r", expr)
             return expr
         elif tok.type == "TYPE":
             self.consume()
@@ -740,6 +881,8 @@ class Parser:
             return ExpressionStatement(CallExpr(Identifier("read"), [path]))
         elif tok.type == "AT":
             self.consume()
+            if self.check("LBRACE"):
+                return self.parse_map_literal()
             return self.parse_list_literal()
         elif tok.type == "LPAREN":
             self.consume()
@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import time
+
+# === Structured Tracing ===
+#
+# Compiler diagnostics go through named channels instead of print(). Messages
+# use %-style arguments and are only formatted once a channel's level lets
+# them through, so a disabled channel costs one integer comparison.
+#
+#   FORGE_TRACE="debug"                 every channel at debug
+#   FORGE_TRACE="types=debug,parser=info"
+#   FORGE_TRACE_JSON="trace.jsonl"      also append JSON lines to a file
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR", OFF: "OFF"}
+LEVELS = {
+    "debug": DEBUG, "info": INFO, "warn": WARN, "warning": WARN,
+    "error": ERROR, "off": OFF, "none": OFF,
+}
+
+CHANNEL_NAMES = ("lexer", "parser", "types", "codegen", "build", "vm", "server")
+DEFAULT_LEVEL = WARN
+
+
+class Channel:
+    __slots__ = ("name", "level")
+
+    def __init__(self, name, level=DEFAULT_LEVEL):
+        self.name = name
+        self.level = level
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def debug(self, msg, *args):
+        if self.level <= DEBUG:
+            _emit(self.name, DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        if self.level <= INFO:
+            _emit(self.name, INFO, msg, args)
+
+    def warn(self, msg, *args):
+        if self.level <= WARN:
+            _emit(self.name, WARN, msg, args)
+
+    def error(self, msg, *args):
+        if self.level <= ERROR:
+            _emit(self.name, ERROR, msg, args)
+
+
+_channels = {}
+_stream = sys.stderr
+_json_sink = None
+
+
+def channel(name):
+    ch = _channels.get(name)
+    if ch is None:
+        ch = _channels[name] = Channel(name)
+    return ch
+
+
+def _emit(name, level, msg, args):
+    text = msg % args if args else msg
+    if _stream is not None:
+        _stream.write(f"[{LEVEL_NAMES[level]} {name}] {text}\n")
+    if _json_sink is not None:
+        record = {
+            "ts": time.time(),
+            "channel": name,
+            "level": LEVEL_NAMES[level].lower(),
+            "msg": text,
+        }
+        _json_sink.write(json.dumps(record) + "\n")
+
+
+def parse_spec(spec):
+    # "debug" or "types=debug,parser=info" -> {channel or "*": level}
+    levels = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, level = part.rpartition("=")
+        if not sep:
+            name = "*"
+        if level.lower() not in LEVELS:
+            raise ValueError(f"Unknown trace level: {level}")
+        levels[name or "*"] = LEVELS[level.lower()]
+    return levels
+
+
+def configure(spec=None, json_path=None, stream=sys.stderr):
+    global _stream, _json_sink
+    levels = parse_spec(spec) if spec else {}
+    default = levels.get("*", DEFAULT_LEVEL)
+    for name in set(CHANNEL_NAMES) | set(_channels):
+        channel(name).level = levels.get(name, default)
+
+    _stream = stream
+    if _json_sink is not None:
+        _json_sink.close()
+        _json_sink = None
+    if json_path:
+        _json_sink = open(json_path, "a", buffering=1)
+
+
+def configure_from_env():
+    configure(os.environ.get("FORGE_TRACE"), os.environ.get("FORGE_TRACE_JSON"))
+
+
+configure_from_env()
@@ -0,0 +1,221 @@
+#ifndef FORGE_ARENA_H
+#define FORGE_ARENA_H
+
+#include <stdlib.h>
+#include <string.h>
+
+// ==============================
+// 🧱 Arena for temporaries
+// ==============================
+// Strings the generated code creates along the way (concatenations, input())
+// are bump-allocated here instead of being strdup'd and leaked. The
+// transpiler takes a mark at the start of every function and loop that
+// allocates, and releases back to it on each iteration and before returning,
+// so everything allocated since the mark is dropped in one step.
+//
+// Strings cross scopes without being leaked:
+// - passed to a function: borrowed as-is, the caller's scope outlives the call
+// - returned: moved down into the caller's scope by forge_arena_return
+// - assigned to an outer variable: copied into a heap slot the variable owns
+//   (forge_replace), freed when the function returns
+// - stored in a struct, list or map: copied to the heap with forge_persist
+//   (or forge_keep when the value may or may not be in the arena)
+
+#define FORGE_ARENA_BLOCK_SIZE (64 * 1024)
+
+typedef struct ForgeArenaBlock {
+    struct ForgeArenaBlock* prev;
+    size_t size;
+    size_t used;
+    char data[];
+} ForgeArenaBlock;
+
+typedef struct {
+    ForgeArenaBlock* current;
+    ForgeArenaBlock* spare;  // one released block kept for reuse
+} ForgeArena;
+
+typedef struct {
+    ForgeArenaBlock* block;
+    size_t used;
+} ForgeArenaMark;
+
+#ifdef FORGE_SEPARATE_UNITS
+// Shared by every unit of a separately compiled program; defined in main.c
+extern ForgeArena forge_arena;
+#else
+static ForgeArena forge_arena;
+#endif
+
+static inline void* forge_arena_alloc(size_t size) {
+    size = (size + 15) & ~(size_t)15;
+    ForgeArenaBlock* block = forge_arena.current;
+    if (block == NULL || block->used + size > block->size) {
+        ForgeArenaBlock* spare = forge_arena.spare;
+        if (spare != NULL && spare->size >= size) {
+            forge_arena.spare = NULL;
+            block = spare;
+        } else {
+            size_t block_size = size > FORGE_ARENA_BLOCK_SIZE ? size : FORGE_ARENA_BLOCK_SIZE;
+            block = malloc(sizeof(ForgeArenaBlock) + block_size);
+            block->size = block_size;
+        }
+        block->used = 0;
+        block->prev = forge_arena.current;
+        forge_arena.current = block;
+    }
+    void* ptr = block->data + block->used;
+    block->used += size;
+    return ptr;
+}
+
+static inline ForgeArenaMark forge_arena_mark(void) {
+    ForgeArenaMark mark;
+    mark.block = forge_arena.current;
+    mark.used = mark.block ? mark.block->used : 0;
+    return mark;
+}
+
+static inline void forge_arena_release(ForgeArenaMark mark) {
+    while (forge_arena.current != mark.block) {
+        ForgeArenaBlock* block = forge_arena.current;
+        forge_arena.current = block->prev;
+        if (forge_arena.spare == NULL) {
+            forge_arena.spare = block;
+        } else {
+            free(block);
+        }
+    }
+    if (mark.block != NULL) {
+        mark.block->used = mark.used;
+    }
+}
+
+static inline char* forge_arena_strdup(const char* s) {
+    size_t length = strlen(s);
+    char* copy = forge_arena_alloc(length + 1);
+    memcpy(copy, s, length + 1);
+    return copy;
+}
+
+static inline char* forge_arena_concat(const char* left, const char* right) {
+    size_t left_length = strlen(left);
+    size_t right_length = strlen(right);
+    char* result = forge_arena_alloc(left_length + right_length + 1);
+    memcpy(result, left, left_length);
+    memcpy(result + left_length, right, right_length + 1);
+    return result;
+}
+
+// A whole `a + b + c + ...` chain in one exact-size allocation
+static inline char* forge_arena_concat_n(int count, const char* const* parts) {
+    size_t lengths[count];
+    size_t total = 0;
+    for (int i = 0; i < count; i++) {
+        lengths[i] = strlen(parts[i]);
+        total += lengths[i];
+    }
+    char* result = forge_arena_alloc(total + 1);
+    char* out = result;
+    for (int i = 0; i < count; i++) {
+        memcpy(out, parts[i], lengths[i]);
+        out += lengths[i];
+    }
+    *out = '\0';
+    return result;
+}
+
+// Heap copy of an arena string that has to outlive the current scope
+static inline char* forge_persist(const char* s) {
+    return strdup(s);
+}
+
+// True if p points into memory allocated since mark
+static inline int forge_arena_since(ForgeArenaMark mark, const void* p) {
+    const char* c = p;
+    for (ForgeArenaBlock* block = forge_arena.current; block != NULL; block = block->prev) {
+        if (block == mark.block) {
+            return c >= block->data + mark.used && c < block->data + block->used;
+        }
+        if (c >= block->data && c < block->data + block->used) {
+            return 1;
+        }
+    }
+    return 0;
+}
+
+// True if p points into any live arena allocation
+static inline int forge_arena_owns(const void* p) {
+    ForgeArenaMark everything = {NULL, 0};
+    return forge_arena_since(everything, p);
+}
+
+// A string that may or may not be in the arena (a borrowed parameter), copied
+// to the heap only if it is
+static inline char* forge_keep(const char* s) {
+    return forge_arena_owns(s) ? strdup(s) : (char*)s;
+}
+
+// Releases a function's mark and returns s in the caller's scope: a string
+// allocated since the mark is moved down to where the mark was, anything else
+// (a literal, a borrowed string, a struct field) is returned as-is
+static inline char* forge_arena_return(ForgeArenaMark mark, const char* s) {
+    if (!forge_arena_since(mark, s)) {
+        forge_arena_release(mark);
+        return (char*)s;
+    }
+    size_t size = strlen(s) + 1;
+    if (forge_arena.current == mark.block) {
+        // Same block: the copy lands at or below s, and the block stays
+        forge_arena_release(mark);
+        char* result = forge_arena_alloc(size);
+        memmove(result, s, size);
+        return result;
+    }
+    // s may be in a block the release frees
+    char* held = malloc(size);
+    memcpy(held, s, size);
+    forge_arena_release(mark);
+    char* result = forge_arena_alloc(size);
+    memcpy(result, held, size);
+    free(held);
+    return result;
+}
+
+// Heap buffer a string variable owns when it outlives the scopes of the
+// values assigned to it (see forge_replace)
+typedef struct {
+    char* data;
+    size_t capacity;
+} ForgeSlot;
+
+// `name = s` for such a variable: s is copied into the slot, which is reused
+// while the string fits and grows to at least twice its size when it does
+// not. Whatever the variable held before its first assignment is never in
+// the slot, so it is not freed.
+static inline void forge_replace(char** name, ForgeSlot* slot, const char* s) {
+    size_t size = strlen(s) + 1;
+    if (size > slot->capacity) {
+        size_t capacity = slot->capacity * 2 > size ? slot->capacity * 2 : size;
+        char* data = malloc(capacity);
+        memcpy(data, s, size);
+        free(slot->data);
+        slot->data = data;
+        slot->capacity = capacity;
+    } else {
+        memmove(slot->data, s, size);  // s may be part of the old value
+    }
+    *name = slot->data;
+}
+
+// Frees a slot when its function returns; a result still pointing into it is
+// moved into the caller's scope first
+static inline char* forge_disown(ForgeSlot* slot, char* result) {
+    if (result != NULL && result >= slot->data && result < slot->data + slot->capacity) {
+        result = forge_arena_strdup(result);
+    }
+    free(slot->data);
+    return result;
+}
+
+#endif
@@ -13,7 +13,7 @@ typedef struct {
 } Array;
 
 // Function to create an array
-Array array_create(size_t element_size, size_t length) {
+static inline Array array_create(size_t element_size, size_t length) {
     Array arr;
     arr.data = malloc(element_size * length);
     arr.element_size = element_size;
@@ -22,7 +22,7 @@ Array array_create(size_t element_size, size_t length) {
 }
 
 // Function to get an element from the array
-void* array_get(Array* arr, size_t index) {
+static inline void* array_get(Array* arr, size_t index) {
     if (index >= arr->length) {
         fprintf(stderr, "Array index out of bounds\n");
         exit(EXIT_FAILURE);
@@ -31,7 +31,7 @@ void* array_get(Array* arr, size_t index) {
 }
 
 // Function to set an element in the array
-void array_set(Array* arr, size_t index, void* value) {
+static inline void array_set(Array* arr, size_t index, void* value) {
     if (index >= arr->length) {
         fprintf(stderr, "Array index out of bounds\n");
         exit(EXIT_FAILURE);
@@ -51,7 +51,7 @@ static inline void array_to_string(Array* arr, char* buffer, size_t size) {
 }
 
 // Function to free the array
-void array_free(Array* arr) {
+static inline void array_free(Array* arr) {
     free(arr->data);
 }
 
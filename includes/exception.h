@@ -10,12 +10,18 @@ typedef struct {
     int has_error;
 } ExceptionContext;
 
+#ifdef FORGE_SEPARATE_UNITS
+// Shared by every unit of a separately compiled program; defined in main.c
+extern ExceptionContext __context;
+#else
 static ExceptionContext __context;
+#endif
 
 #define Attempt if (!setjmp(__context.env))
 #define Rescue else
 
 static inline void raise(const char* msg) {
+    fflush(NULL);  // stdout and open files: output written before the error must not be lost if nothing rescues it
     __context.error = msg;
     __context.has_error = 1;
     longjmp(__context.env, 1);
@@ -4,8 +4,97 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
 
-int write_file(const char* filename, const char* content, const char* mode, int spacing) {
+#include "arena.h"
+
+// ==============================
+// 📂 Open append handles
+// ==============================
+// addto() keeps the files it appends to open, so a loop of addto calls is
+// one fopen and buffered writes instead of an fopen/fclose per line. Up to
+// FORGE_OPEN_FILES paths stay open; the oldest is closed to make room for
+// another. Anything else that touches one of these paths (write, read,
+// read_mapped, lines) flushes or closes its handle first, and stdio flushes
+// all of them at exit (raise() flushes too).
+
+#define FORGE_OPEN_FILES 8
+
+typedef struct {
+    char* path;
+    FILE* file;
+} ForgeOpenFile;
+
+#ifdef FORGE_SEPARATE_UNITS
+// Shared by every unit of a separately compiled program; defined in main.c
+extern ForgeOpenFile forge_open_files[FORGE_OPEN_FILES];
+extern int forge_open_files_next;
+#else
+static ForgeOpenFile forge_open_files[FORGE_OPEN_FILES];
+static int forge_open_files_next;
+#endif
+
+static inline ForgeOpenFile* forge_find_open_file(const char* filename) {
+    for (int i = 0; i < FORGE_OPEN_FILES; i++) {
+        if (forge_open_files[i].file && strcmp(forge_open_files[i].path, filename) == 0) {
+            return &forge_open_files[i];
+        }
+    }
+    return NULL;
+}
+
+static inline void forge_close_open_file(ForgeOpenFile* open_file) {
+    fclose(open_file->file);
+    free(open_file->path);
+    open_file->file = NULL;
+    open_file->path = NULL;
+}
+
+// Makes whatever addto() buffered for this file visible to a reader
+static inline void forge_flush_open_file(const char* filename) {
+    ForgeOpenFile* open_file = forge_find_open_file(filename);
+    if (open_file) {
+        fflush(open_file->file);
+    }
+}
+
+static inline FILE* forge_append_handle(const char* filename) {
+    ForgeOpenFile* open_file = forge_find_open_file(filename);
+    if (open_file) {
+        return open_file->file;
+    }
+    FILE* f = fopen(filename, "a");
+    if (!f) return NULL;
+
+    open_file = &forge_open_files[forge_open_files_next];
+    forge_open_files_next = (forge_open_files_next + 1) % FORGE_OPEN_FILES;
+    if (open_file->file) {
+        forge_close_open_file(open_file);
+    }
+    open_file->path = strdup(filename);
+    open_file->file = f;
+    return f;
+}
+
+static inline int write_file(const char* filename, const char* content, const char* mode, int spacing) {
+    if (strcmp(mode, "a") == 0) {
+        FILE* f = forge_append_handle(filename);
+        if (!f) return 0;
+        fputs(content, f);
+        for (int i = 0; i < spacing; i++) {
+            fputc('\n', f);
+        }
+        return 1;
+    }
+
+    // Replacing the file: drop the append handle so it cannot write after us
+    ForgeOpenFile* open_file = forge_find_open_file(filename);
+    if (open_file) {
+        forge_close_open_file(open_file);
+    }
     FILE* f = fopen(filename, mode);
     if (!f) return 0;
 
@@ -18,7 +107,8 @@ int write_file(const char* filename, const char* content, const char* mode, int
     return 1;
 }
 
-char* read_file(const char* filename) {
+static inline char* read_file(const char* filename) {
+    forge_flush_open_file(filename);
     FILE* f = fopen(filename, "r");
     if (!f) return NULL;
 
@@ -38,4 +128,136 @@ char* read_file(const char* filename) {
     return buffer;
 }
 
+// ==============================
+// 🗺️ Memory-mapped reads
+// ==============================
+// read_mapped() returns the file's contents without copying them: the file is
+// mapped read-only and its pages are loaded as they are touched, so even a
+// file larger than memory can be scanned. The mapping sits one page into an
+// anonymous reservation whose first page records the total length for
+// unmap_file(), and which is one byte longer than the file so the string is
+// always NUL-terminated (by the zeroed tail of the file's last page, or by
+// the anonymous page after it when the size is a multiple of the page size).
+
+static inline char* read_mapped(const char* filename) {
+    forge_flush_open_file(filename);
+    int fd = open(filename, O_RDONLY);
+    if (fd < 0) return NULL;
+
+    struct stat st;
+    if (fstat(fd, &st) != 0) {
+        close(fd);
+        return NULL;
+    }
+    size_t page = (size_t)sysconf(_SC_PAGESIZE);
+    size_t size = (size_t)st.st_size;
+    size_t length = page + size + 1;
+
+    char* base = mmap(NULL, length, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+    if (base == MAP_FAILED) {
+        close(fd);
+        return NULL;
+    }
+    char* data = base + page;
+    if (size > 0 && mmap(data, size, PROT_READ, MAP_PRIVATE | MAP_FIXED, fd, 0) == MAP_FAILED) {
+        munmap(base, length);
+        close(fd);
+        return NULL;
+    }
+    close(fd);
+    *(size_t*)base = length;
+    return data;
+}
+
+static inline void unmap_file(char* data) {
+    if (!data) return;  // a failed read_mapped()
+    char* base = data - (size_t)sysconf(_SC_PAGESIZE);
+    munmap(base, *(size_t*)base);
+}
+
+// ==============================
+// 📜 Line iterator
+// ==============================
+// Backs `for line in lines(path)`: one reused buffer, so memory stays
+// constant however long the file is. Each line comes without its line
+// ending and is only valid until the next one is read.
+//
+// The readers of the loops currently running sit on a stack, innermost
+// last. A loop closes its own reader when it ends; a return from inside
+// one closes the readers its function opened, and an attempt that rescues
+// a raise closes every reader opened since it started (forge_lines_close_to
+// with the depth it saved), since the raise skipped their loops' ends.
+
+#define FORGE_LINES_MAX 64
+
+typedef struct {
+    FILE* file;
+    char* line;
+    size_t capacity;
+} ForgeLines;
+
+#ifdef FORGE_SEPARATE_UNITS
+// Shared by every unit of a separately compiled program; defined in main.c
+extern ForgeLines forge_lines_stack[FORGE_LINES_MAX];
+extern int forge_lines_depth;
+#else
+static ForgeLines forge_lines_stack[FORGE_LINES_MAX];
+static int forge_lines_depth;
+#endif
+
+// A reader whose file is NULL failed to open (or nests too deep)
+static inline ForgeLines* forge_lines_open(const char* filename) {
+    static ForgeLines too_deep;
+    if (forge_lines_depth == FORGE_LINES_MAX) {
+        return &too_deep;
+    }
+    forge_flush_open_file(filename);
+    ForgeLines* lines = &forge_lines_stack[forge_lines_depth++];
+    lines->file = fopen(filename, "r");
+    lines->line = NULL;
+    lines->capacity = 0;
+    return lines;
+}
+
+static inline char* forge_lines_next(ForgeLines* lines) {
+    ssize_t length = getline(&lines->line, &lines->capacity, lines->file);
+    if (length < 0) {
+        return NULL;
+    }
+    if (length > 0 && lines->line[length - 1] == '\n') {
+        lines->line[--length] = '\0';
+        if (length > 0 && lines->line[length - 1] == '\r') {
+            lines->line[--length] = '\0';
+        }
+    }
+    return lines->line;
+}
+
+static inline void forge_lines_close(ForgeLines* lines) {
+    free(lines->line);
+    if (lines->file) {
+        fclose(lines->file);
+    }
+    lines->file = NULL;
+    lines->line = NULL;
+    forge_lines_depth = (int)(lines - forge_lines_stack);
+}
+
+// Closes the readers above depth, innermost first
+static inline void forge_lines_close_to(int depth) {
+    while (forge_lines_depth > depth) {
+        forge_lines_close(&forge_lines_stack[forge_lines_depth - 1]);
+    }
+}
+
+// Closes a reader on a return from inside its loop; a result that is still
+// the reader's current line is moved into the caller's scope first
+static inline char* forge_lines_return(ForgeLines* lines, char* result) {
+    if (result != NULL && lines->line != NULL && result >= lines->line && result < lines->line + lines->capacity) {
+        result = forge_arena_strdup(result);
+    }
+    forge_lines_close(lines);
+    return result;
+}
+
 #endif
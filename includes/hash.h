@@ -4,6 +4,18 @@
 #include <stdint.h>
 #include <string.h>
 #include <stdio.h>
+#include "fileio.h"
+
+// ==============================
+// 🔐 SHA-256
+// ==============================
+// sha256_update hashes whole 64-byte blocks straight from the caller's
+// buffer and only copies a partial block into ctx->data, so the data is
+// never copied byte by byte. Digests are hex-encoded through a lookup table.
+// hash_string() hashes a C string, hash_bytes() any buffer, hash_file()
+// streams a file from disk in FORGE_HASH_CHUNK-byte reads.
+
+#define FORGE_HASH_CHUNK (64 * 1024)
 
 typedef struct {
     uint8_t data[64];
@@ -40,24 +52,37 @@ static const uint32_t k[64] = {
     0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
 };
 
-void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
-    uint32_t a, b, c, d, e, f, g, h, i, t1, t2, m[64];
+// One round; the caller rotates the roles of a..h instead of moving values
+#define SHA256_ROUND(a, b, c, d, e, f, g, h, i)                 \
+    do {                                                        \
+        uint32_t t1 = (h) + EP1(e) + CH(e, f, g) + k[i] + m[i]; \
+        uint32_t t2 = EP0(a) + MAJ(a, b, c);                    \
+        (d) += t1;                                              \
+        (h) = t1 + t2;                                          \
+    } while (0)
+
+static inline void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
+    uint32_t a, b, c, d, e, f, g, h, i, m[64];
     for (i = 0; i < 16; ++i)
-        m[i] = (data[i * 4] << 24) |
-               (data[i * 4 + 1] << 16) |
-               (data[i * 4 + 2] << 8) |
-               (data[i * 4 + 3]);
+        m[i] = ((uint32_t)data[i * 4] << 24) |
+               ((uint32_t)data[i * 4 + 1] << 16) |
+               ((uint32_t)data[i * 4 + 2] << 8) |
+               ((uint32_t)data[i * 4 + 3]);
     for (; i < 64; ++i)
         m[i] = SIG1(m[i - 2]) + m[i - 7] + SIG0(m[i - 15]) + m[i - 16];
 
     a = ctx->state[0]; b = ctx->state[1]; c = ctx->state[2]; d = ctx->state[3];
     e = ctx->state[4]; f = ctx->state[5]; g = ctx->state[6]; h = ctx->state[7];
 
-    for (i = 0; i < 64; ++i) {
-        t1 = h + EP1(e) + CH(e, f, g) + k[i] + m[i];
-        t2 = EP0(a) + MAJ(a, b, c);
-        h = g; g = f; f = e; e = d + t1;
-        d = c; c = b; b = a; a = t1 + t2;
+    for (i = 0; i < 64; i += 8) {
+        SHA256_ROUND(a, b, c, d, e, f, g, h, i);
+        SHA256_ROUND(h, a, b, c, d, e, f, g, i + 1);
+        SHA256_ROUND(g, h, a, b, c, d, e, f, i + 2);
+        SHA256_ROUND(f, g, h, a, b, c, d, e, i + 3);
+        SHA256_ROUND(e, f, g, h, a, b, c, d, i + 4);
+        SHA256_ROUND(d, e, f, g, h, a, b, c, i + 5);
+        SHA256_ROUND(c, d, e, f, g, h, a, b, i + 6);
+        SHA256_ROUND(b, c, d, e, f, g, h, a, i + 7);
     }
 
     ctx->state[0] += a; ctx->state[1] += b;
@@ -66,7 +91,7 @@ void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
     ctx->state[6] += g; ctx->state[7] += h;
 }
 
-void sha256_init(SHA256_CTX *ctx) {
+static inline void sha256_init(SHA256_CTX *ctx) {
     ctx->datalen = 0; ctx->bitlen = 0;
     ctx->state[0] = 0x6a09e667; ctx->state[1] = 0xbb67ae85;
     ctx->state[2] = 0x3c6ef372; ctx->state[3] = 0xa54ff53a;
@@ -74,22 +99,41 @@ void sha256_init(SHA256_CTX *ctx) {
     ctx->state[6] = 0x1f83d9ab; ctx->state[7] = 0x5be0cd19;
 }
 
-void sha256_update(SHA256_CTX *ctx, const uint8_t data[], size_t len) {
-    for (size_t i = 0; i < len; ++i) {
-        ctx->data[ctx->datalen] = data[i];
-        if (++ctx->datalen == 64) {
-            sha256_transform(ctx, ctx->data);
-            ctx->bitlen += 512;
-            ctx->datalen = 0;
+static inline void sha256_update(SHA256_CTX *ctx, const uint8_t data[], size_t len) {
+    if (ctx->datalen > 0) {
+        // Top up the block left over from the previous call
+        size_t take = 64 - ctx->datalen;
+        if (take > len) take = len;
+        memcpy(ctx->data + ctx->datalen, data, take);
+        ctx->datalen += take;
+        data += take;
+        len -= take;
+        if (ctx->datalen < 64) {
+            return;
         }
+        sha256_transform(ctx, ctx->data);
+        ctx->bitlen += 512;
+        ctx->datalen = 0;
     }
+    for (; len >= 64; data += 64, len -= 64) {
+        sha256_transform(ctx, data);
+        ctx->bitlen += 512;
+    }
+    memcpy(ctx->data, data, len);
+    ctx->datalen = len;
 }
 
-void sha256_final(SHA256_CTX *ctx, uint8_t hash[]) {
+static inline void sha256_final(SHA256_CTX *ctx, uint8_t hash[]) {
     size_t i = ctx->datalen;
 
     ctx->data[i++] = 0x80;
-    while (i < 56) ctx->data[i++] = 0x00;
+    if (i > 56) {
+        // No room for the length in this block: pad it out and use another
+        memset(ctx->data + i, 0, 64 - i);
+        sha256_transform(ctx, ctx->data);
+        i = 0;
+    }
+    memset(ctx->data + i, 0, 56 - i);
 
     ctx->bitlen += ctx->datalen * 8;
     ctx->data[63] = ctx->bitlen;
@@ -114,17 +158,66 @@ void sha256_final(SHA256_CTX *ctx, uint8_t hash[]) {
     }
 }
 
-void hash_string(const char* input, char* output_hex) {
+static const char forge_hex_digits[16] = "0123456789abcdef";
+
+// 32-byte digest -> 64 hex characters plus the terminator
+static inline void sha256_hex(const uint8_t hash[32], char* output_hex) {
+    for (int i = 0; i < 32; ++i) {
+        output_hex[i * 2] = forge_hex_digits[hash[i] >> 4];
+        output_hex[i * 2 + 1] = forge_hex_digits[hash[i] & 0x0f];
+    }
+    output_hex[64] = '\0';
+}
+
+// Backs Hasher(): a context ready for sha256_update
+static inline SHA256_CTX sha256_create(void) {
     SHA256_CTX ctx;
+    sha256_init(&ctx);
+    return ctx;
+}
+
+// Finishes ctx into output_hex and starts it over, ready for the next message
+static inline void sha256_final_hex(SHA256_CTX *ctx, char* output_hex) {
     uint8_t hash[32];
+    sha256_final(ctx, hash);
+    sha256_hex(hash, output_hex);
+    sha256_init(ctx);
+}
+
+static inline void sha256_update_str(SHA256_CTX *ctx, const char* s) {
+    sha256_update(ctx, (const uint8_t*)s, strlen(s));
+}
+
+static inline void hash_bytes(const void* data, size_t len, char* output_hex) {
+    SHA256_CTX ctx;
     sha256_init(&ctx);
-    sha256_update(&ctx, (const uint8_t*)input, strlen(input));
-    sha256_final(&ctx, hash);
+    sha256_update(&ctx, (const uint8_t*)data, len);
+    sha256_final_hex(&ctx, output_hex);
+}
 
-    for (int i = 0; i < 32; ++i) {
-        sprintf(output_hex + (i * 2), "%02x", hash[i]);
+static inline void hash_string(const char* input, char* output_hex) {
+    hash_bytes(input, strlen(input), output_hex);
+}
+
+// Returns 0 if the file cannot be read
+static inline int hash_file(const char* filename, char* output_hex) {
+    forge_flush_open_file(filename);
+    FILE* f = fopen(filename, "rb");
+    if (!f) return 0;
+
+    static uint8_t chunk[FORGE_HASH_CHUNK];
+    SHA256_CTX ctx;
+    sha256_init(&ctx);
+    size_t n;
+    while ((n = fread(chunk, 1, sizeof(chunk), f)) > 0) {
+        sha256_update(&ctx, chunk, n);
     }
-    output_hex[64] = '\0';
+    int ok = !ferror(f);
+    fclose(f);
+    if (ok) {
+        sha256_final_hex(&ctx, output_hex);
+    }
+    return ok;
 }
 
 #endif // FORGE_HASH_H
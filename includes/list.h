@@ -47,18 +47,6 @@ static inline char* list_get_str(List* list, int index) {
     return (char*)(intptr_t)(list->items[index]);
 }
 
-static inline void list_remove(List* list, double value) {
-    for (int i = 0; i < list->size; ++i) {
-        if (list->items[i] == value) {
-            for (int j = i; j < list->size - 1; ++j) {
-                list->items[j] = list->items[j + 1];
-            }
-            list->size--;
-            return;
-        }
-    }
-}
-
 static inline int list_index(List* list, double value) {
     for (int i = 0; i < list->size; ++i) {
         if (list->items[i] == value) {
@@ -68,6 +56,46 @@ static inline int list_index(List* list, double value) {
     return -1;
 }
 
+static inline void list_remove_at(List* list, int index) {
+    if (index < 0 || index >= list->size) {
+        return;
+    }
+    memmove(list->items + index, list->items + index + 1,
+            sizeof(double) * (list->size - index - 1));
+    list->size--;
+}
+
+static inline void list_remove(List* list, double value) {
+    list_remove_at(list, list_index(list, value));
+}
+
+// O(1): the last item takes the removed one's place, so order is not kept
+static inline void list_swap_remove(List* list, int index) {
+    if (index < 0 || index >= list->size) {
+        return;
+    }
+    list->items[index] = list->items[--list->size];
+}
+
+// Grows the list once so it holds at least capacity items without reallocating
+static inline void list_reserve(List* list, int capacity) {
+    if (capacity > list->capacity) {
+        list->capacity = capacity;
+        list->items = realloc(list->items, sizeof(double) * list->capacity);
+    }
+}
+
+static inline void list_extend(List* list, List* other) {
+    int count = other->size;  // other may be list itself
+    list_reserve(list, list->size + count);
+    memcpy(list->items + list->size, other->items, sizeof(double) * count);
+    list->size += count;
+}
+
+static inline void list_clear(List* list) {
+    list->size = 0;
+}
+
 static inline void list_free(List* list) {
     free(list->items);
 }
@@ -92,6 +120,129 @@ static inline void list_to_string(List* list, char* buffer, size_t buffer_size)
     }
 }
 
+// ==============================
+// 🔢 Typed lists
+// ==============================
+// FORGE_DEFINE_LIST declares an unboxed list of T called Name with
+// prefix##_create / _add / _reserve / _extend / _remove_at / _swap_remove /
+// _clear / _free. FORGE_DEFINE_LIST_SEARCH adds _index and _remove for
+// element types that compare with ==. The transpiler picks
+// IntList, FloatList or PtrList when it can infer a list's element type, and
+// defines a <Struct>List for lists of structs.
+
+#define FORGE_DEFINE_LIST(Name, T, prefix)                                      \
+    typedef struct {                                                            \
+        T* items;                                                               \
+        int size;                                                               \
+        int capacity;                                                           \
+    } Name;                                                                     \
+                                                                                \
+    static inline Name prefix##_create(void) {                                  \
+        Name list;                                                              \
+        list.size = 0;                                                          \
+        list.capacity = INITIAL_CAPACITY;                                       \
+        list.items = malloc(sizeof(T) * list.capacity);                         \
+        return list;                                                            \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_add(Name* list, T value) {                      \
+        if (list->size == list->capacity) {                                     \
+            list->capacity *= 2;                                                \
+            list->items = realloc(list->items, sizeof(T) * list->capacity);     \
+        }                                                                       \
+        list->items[list->size++] = value;                                      \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_reserve(Name* list, int capacity) {             \
+        if (capacity > list->capacity) {                                        \
+            list->capacity = capacity;                                          \
+            list->items = realloc(list->items, sizeof(T) * list->capacity);     \
+        }                                                                       \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_extend(Name* list, Name* other) {               \
+        int count = other->size;                                                \
+        prefix##_reserve(list, list->size + count);                             \
+        memcpy(list->items + list->size, other->items, sizeof(T) * count);      \
+        list->size += count;                                                    \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_remove_at(Name* list, int index) {              \
+        if (index < 0 || index >= list->size) {                                 \
+            return;                                                             \
+        }                                                                       \
+        memmove(list->items + index, list->items + index + 1,                   \
+                sizeof(T) * (list->size - index - 1));                          \
+        list->size--;                                                           \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_swap_remove(Name* list, int index) {            \
+        if (index < 0 || index >= list->size) {                                 \
+            return;                                                             \
+        }                                                                       \
+        list->items[index] = list->items[--list->size];                         \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_clear(Name* list) {                             \
+        list->size = 0;                                                         \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_free(Name* list) {                              \
+        free(list->items);                                                      \
+    }
+
+// Keeps the items of a List or typed list for which keep(item) is true, in
+// order, in one pass. A macro so any function whose parameter the item
+// converts to can be used as the predicate.
+#define FORGE_LIST_FILTER_IN_PLACE(list, keep)                                  \
+    do {                                                                        \
+        int kept_ = 0;                                                          \
+        for (int read_ = 0; read_ < (list)->size; read_++) {                    \
+            if (keep((list)->items[read_])) {                                   \
+                (list)->items[kept_++] = (list)->items[read_];                  \
+            }                                                                   \
+        }                                                                       \
+        (list)->size = kept_;                                                   \
+    } while (0)
+
+#define FORGE_DEFINE_LIST_SEARCH(Name, T, prefix)                               \
+    static inline int prefix##_index(Name* list, T value) {                     \
+        for (int i = 0; i < list->size; ++i) {                                  \
+            if (list->items[i] == value) {                                      \
+                return i;                                                       \
+            }                                                                   \
+        }                                                                       \
+        return -1;                                                              \
+    }                                                                           \
+                                                                                \
+    static inline void prefix##_remove(Name* list, T value) {                   \
+        prefix##_remove_at(list, prefix##_index(list, value));                  \
+    }
+
+FORGE_DEFINE_LIST(IntList, int, int_list)
+FORGE_DEFINE_LIST_SEARCH(IntList, int, int_list)
+FORGE_DEFINE_LIST(FloatList, double, float_list)
+FORGE_DEFINE_LIST_SEARCH(FloatList, double, float_list)
+FORGE_DEFINE_LIST(PtrList, void*, ptr_list)
+FORGE_DEFINE_LIST_SEARCH(PtrList, void*, ptr_list)
+
+#define FORGE_DEFINE_LIST_TO_STRING(Name, prefix, format)                       \
+    static inline void prefix##_to_string(Name* list, char* buffer, size_t buffer_size) { \
+        buffer[0] = '\0';                                                       \
+        for (int i = 0; i < list->size; i++) {                                  \
+            char temp[64];                                                      \
+            snprintf(temp, sizeof(temp), format, list->items[i]);               \
+            strncat(buffer, temp, buffer_size - strlen(buffer) - 1);            \
+            if (i < list->size - 1) {                                           \
+                strncat(buffer, ", ", buffer_size - strlen(buffer) - 1);        \
+            }                                                                   \
+        }                                                                       \
+    }
+
+FORGE_DEFINE_LIST_TO_STRING(IntList, int_list, "%d")
+FORGE_DEFINE_LIST_TO_STRING(FloatList, float_list, "%.2f")
+FORGE_DEFINE_LIST_TO_STRING(PtrList, ptr_list, "%p")
+
 // ==============================
 // 📜 StringList
 // ==============================
@@ -118,6 +269,83 @@ static inline void string_list_add(StringList* list, const char* str) {
     list->items[list->size++] = strdup(str);
 }
 
+static inline void string_list_to_string(StringList* list, char* buffer, size_t buffer_size) {
+    buffer[0] = '\0';
+    for (int i = 0; i < list->size; i++) {
+        char temp[64];
+        snprintf(temp, sizeof(temp), "\"%s\"", list->items[i]);
+        strncat(buffer, temp, buffer_size - strlen(buffer) - 1);
+        if (i < list->size - 1) {
+            strncat(buffer, ", ", buffer_size - strlen(buffer) - 1);
+        }
+    }
+}
+
+static inline int string_list_index(StringList* list, const char* str) {
+    for (int i = 0; i < list->size; ++i) {
+        if (strcmp(list->items[i], str) == 0) {
+            return i;
+        }
+    }
+    return -1;
+}
+
+static inline void string_list_remove_at(StringList* list, int index) {
+    if (index < 0 || index >= list->size) {
+        return;
+    }
+    free(list->items[index]);
+    memmove(list->items + index, list->items + index + 1,
+            sizeof(char*) * (list->size - index - 1));
+    list->size--;
+}
+
+static inline void string_list_remove(StringList* list, const char* str) {
+    string_list_remove_at(list, string_list_index(list, str));
+}
+
+static inline void string_list_swap_remove(StringList* list, int index) {
+    if (index < 0 || index >= list->size) {
+        return;
+    }
+    free(list->items[index]);
+    list->items[index] = list->items[--list->size];
+}
+
+static inline void string_list_reserve(StringList* list, int capacity) {
+    if (capacity > list->capacity) {
+        list->capacity = capacity;
+        list->items = realloc(list->items, sizeof(char*) * list->capacity);
+    }
+}
+
+static inline void string_list_extend(StringList* list, StringList* other) {
+    int count = other->size;
+    string_list_reserve(list, list->size + count);
+    for (int i = 0; i < count; i++) {
+        list->items[list->size++] = strdup(other->items[i]);
+    }
+}
+
+static inline void string_list_clear(StringList* list) {
+    for (int i = 0; i < list->size; i++) {
+        free(list->items[i]);
+    }
+    list->size = 0;
+}
+
+static inline void string_list_filter_in_place(StringList* list, int (*keep)(char*)) {
+    int kept = 0;
+    for (int i = 0; i < list->size; i++) {
+        if (keep(list->items[i])) {
+            list->items[kept++] = list->items[i];
+        } else {
+            free(list->items[i]);
+        }
+    }
+    list->size = kept;
+}
+
 static inline void string_list_free(StringList* list) {
     for (int i = 0; i < list->size; i++) {
         free(list->items[i]);
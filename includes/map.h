@@ -0,0 +1,219 @@
+#ifndef FORGE_MAP_H
+#define FORGE_MAP_H
+
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+// ==============================
+// 🗺️ Hash maps
+// ==============================
+// Open addressing with linear probing over a power-of-two slot array.
+// Deleted slots become tombstones so probe chains stay intact; the table
+// is rebuilt (dropping tombstones) once live + deleted slots pass 3/4 of
+// the capacity. String keys are copied on insert and freed on delete;
+// values are stored as-is.
+//
+// FORGE_DEFINE_MAP(Name, K, V, prefix, KEY) declares Name with
+// prefix##_create / _set / _get / _has / _delete / _next / _free, where
+// KEY is STR or INT and picks the hash, equality and key ownership.
+
+#define FORGE_MAP_INITIAL_CAPACITY 8
+
+#define FORGE_SLOT_EMPTY   0
+#define FORGE_SLOT_FULL    1
+#define FORGE_SLOT_DELETED 2
+
+static inline uint64_t forge_hash_str(const char* s) {
+    uint64_t h = 1469598103934665603ULL;  // FNV-1a
+    while (*s) {
+        h ^= (unsigned char)*s++;
+        h *= 1099511628211ULL;
+    }
+    return h;
+}
+
+static inline uint64_t forge_hash_int(int key) {
+    uint64_t h = (uint64_t)(int64_t)key;  // splitmix64 finalizer
+    h = (h ^ (h >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    h = (h ^ (h >> 27)) * 0x94d049bb133111ebULL;
+    return h ^ (h >> 31);
+}
+
+#define FORGE_KEY_HASH_STR(k)    forge_hash_str(k)
+#define FORGE_KEY_EQ_STR(a, b)   (strcmp((a), (b)) == 0)
+#define FORGE_KEY_COPY_STR(k)    strdup(k)
+#define FORGE_KEY_FREE_STR(k)    free(k)
+
+#define FORGE_KEY_HASH_INT(k)    forge_hash_int(k)
+#define FORGE_KEY_EQ_INT(a, b)   ((a) == (b))
+#define FORGE_KEY_COPY_INT(k)    (k)
+#define FORGE_KEY_FREE_INT(k)    ((void)(k))
+
+#define FORGE_DEFINE_MAP(Name, K, V, prefix, KEY)                                   \
+    typedef struct {                                                                \
+        K key;                                                                      \
+        V value;                                                                    \
+        unsigned char state;                                                        \
+    } Name##Slot;                                                                   \
+                                                                                    \
+    typedef struct {                                                                \
+        Name##Slot* slots;                                                          \
+        int size;                                                                   \
+        int tombstones;                                                             \
+        int capacity;                                                               \
+    } Name;                                                                         \
+                                                                                    \
+    static inline Name prefix##_create(void) {                                      \
+        Name map;                                                                   \
+        map.size = 0;                                                               \
+        map.tombstones = 0;                                                         \
+        map.capacity = FORGE_MAP_INITIAL_CAPACITY;                                  \
+        map.slots = calloc(map.capacity, sizeof(Name##Slot));                       \
+        return map;                                                                 \
+    }                                                                               \
+                                                                                    \
+    static inline int prefix##_find(Name* map, K key) {                             \
+        int mask = map->capacity - 1;                                               \
+        int i = (int)(FORGE_KEY_HASH_##KEY(key) & (uint64_t)mask);                  \
+        while (map->slots[i].state != FORGE_SLOT_EMPTY) {                           \
+            if (map->slots[i].state == FORGE_SLOT_FULL                              \
+                && FORGE_KEY_EQ_##KEY(map->slots[i].key, key)) {                    \
+                return i;                                                           \
+            }                                                                       \
+            i = (i + 1) & mask;                                                     \
+        }                                                                           \
+        return -1;                                                                  \
+    }                                                                               \
+                                                                                    \
+    static inline void prefix##_rehash(Name* map, int capacity) {                   \
+        Name##Slot* old = map->slots;                                               \
+        int old_capacity = map->capacity;                                           \
+        int mask = capacity - 1;                                                    \
+        map->slots = calloc(capacity, sizeof(Name##Slot));                          \
+        map->capacity = capacity;                                                   \
+        map->tombstones = 0;                                                        \
+        for (int j = 0; j < old_capacity; j++) {                                    \
+            if (old[j].state != FORGE_SLOT_FULL) {                                  \
+                continue;                                                           \
+            }                                                                       \
+            int i = (int)(FORGE_KEY_HASH_##KEY(old[j].key) & (uint64_t)mask);       \
+            while (map->slots[i].state == FORGE_SLOT_FULL) {                        \
+                i = (i + 1) & mask;                                                 \
+            }                                                                       \
+            map->slots[i] = old[j];                                                 \
+        }                                                                           \
+        free(old);                                                                  \
+    }                                                                               \
+                                                                                    \
+    static inline void prefix##_set(Name* map, K key, V value) {                    \
+        if ((map->size + map->tombstones + 1) * 4 > map->capacity * 3) {            \
+            int grow = (map->size + 1) * 2 > map->capacity;                         \
+            prefix##_rehash(map, grow ? map->capacity * 2 : map->capacity);         \
+        }                                                                           \
+        int mask = map->capacity - 1;                                               \
+        int i = (int)(FORGE_KEY_HASH_##KEY(key) & (uint64_t)mask);                  \
+        int reuse = -1;                                                             \
+        while (map->slots[i].state != FORGE_SLOT_EMPTY) {                           \
+            if (map->slots[i].state == FORGE_SLOT_FULL) {                           \
+                if (FORGE_KEY_EQ_##KEY(map->slots[i].key, key)) {                   \
+                    map->slots[i].value = value;                                    \
+                    return;                                                         \
+                }                                                                   \
+            } else if (reuse < 0) {                                                 \
+                reuse = i;                                                          \
+            }                                                                       \
+            i = (i + 1) & mask;                                                     \
+        }                                                                           \
+        if (reuse >= 0) {                                                           \
+            i = reuse;                                                              \
+            map->tombstones--;                                                      \
+        }                                                                           \
+        map->slots[i].key = FORGE_KEY_COPY_##KEY(key);                              \
+        map->slots[i].value = value;                                                \
+        map->slots[i].state = FORGE_SLOT_FULL;                                      \
+        map->size++;                                                                \
+    }                                                                               \
+                                                                                    \
+    static inline V prefix##_get(Name* map, K key) {                                \
+        int i = prefix##_find(map, key);                                            \
+        if (i < 0) {                                                                \
+            V missing;                                                              \
+            memset(&missing, 0, sizeof(missing));                                   \
+            return missing;                                                         \
+        }                                                                           \
+        return map->slots[i].value;                                                 \
+    }                                                                               \
+                                                                                    \
+    static inline int prefix##_has(Name* map, K key) {                              \
+        return prefix##_find(map, key) >= 0;                                        \
+    }                                                                               \
+                                                                                    \
+    static inline int prefix##_delete(Name* map, K key) {                           \
+        int i = prefix##_find(map, key);                                            \
+        if (i < 0) {                                                                \
+            return 0;                                                               \
+        }                                                                           \
+        FORGE_KEY_FREE_##KEY(map->slots[i].key);                                    \
+        map->slots[i].state = FORGE_SLOT_DELETED;                                   \
+        map->size--;                                                                \
+        map->tombstones++;                                                          \
+        return 1;                                                                   \
+    }                                                                               \
+                                                                                    \
+    /* Index of the next live slot after `slot` (start with -1), or -1 at the end */ \
+    static inline int prefix##_next(Name* map, int slot) {                          \
+        for (int i = slot + 1; i < map->capacity; i++) {                            \
+            if (map->slots[i].state == FORGE_SLOT_FULL) {                           \
+                return i;                                                           \
+            }                                                                       \
+        }                                                                           \
+        return -1;                                                                  \
+    }                                                                               \
+                                                                                    \
+    static inline void prefix##_free(Name* map) {                                   \
+        for (int i = 0; i < map->capacity; i++) {                                   \
+            if (map->slots[i].state == FORGE_SLOT_FULL) {                           \
+                FORGE_KEY_FREE_##KEY(map->slots[i].key);                            \
+            }                                                                       \
+        }                                                                           \
+        free(map->slots);                                                           \
+        map->slots = NULL;                                                          \
+        map->size = map->tombstones = map->capacity = 0;                            \
+    }
+
+#define FORGE_DEFINE_MAP_TO_STRING(Name, prefix, key_format, value_format)          \
+    static inline void prefix##_to_string(Name* map, char* buffer, size_t buffer_size) { \
+        buffer[0] = '\0';                                                           \
+        strncat(buffer, "{", buffer_size - strlen(buffer) - 1);                     \
+        int first = 1;                                                              \
+        for (int i = prefix##_next(map, -1); i >= 0; i = prefix##_next(map, i)) {   \
+            char temp[128];                                                         \
+            snprintf(temp, sizeof(temp), "%s" key_format ": " value_format,         \
+                     first ? "" : ", ", map->slots[i].key, map->slots[i].value);    \
+            strncat(buffer, temp, buffer_size - strlen(buffer) - 1);                \
+            first = 0;                                                              \
+        }                                                                           \
+        strncat(buffer, "}", buffer_size - strlen(buffer) - 1);                     \
+    }
+
+FORGE_DEFINE_MAP(StrIntMap, char*, int, str_int_map, STR)
+FORGE_DEFINE_MAP(StrFloatMap, char*, double, str_float_map, STR)
+FORGE_DEFINE_MAP(StrStrMap, char*, char*, str_str_map, STR)
+FORGE_DEFINE_MAP(StrPtrMap, char*, void*, str_ptr_map, STR)
+FORGE_DEFINE_MAP(IntIntMap, int, int, int_int_map, INT)
+FORGE_DEFINE_MAP(IntFloatMap, int, double, int_float_map, INT)
+FORGE_DEFINE_MAP(IntStrMap, int, char*, int_str_map, INT)
+FORGE_DEFINE_MAP(IntPtrMap, int, void*, int_ptr_map, INT)
+
+FORGE_DEFINE_MAP_TO_STRING(StrIntMap, str_int_map, "\"%s\"", "%d")
+FORGE_DEFINE_MAP_TO_STRING(StrFloatMap, str_float_map, "\"%s\"", "%.2f")
+FORGE_DEFINE_MAP_TO_STRING(StrStrMap, str_str_map, "\"%s\"", "\"%s\"")
+FORGE_DEFINE_MAP_TO_STRING(StrPtrMap, str_ptr_map, "\"%s\"", "%p")
+FORGE_DEFINE_MAP_TO_STRING(IntIntMap, int_int_map, "%d", "%d")
+FORGE_DEFINE_MAP_TO_STRING(IntFloatMap, int_float_map, "%d", "%.2f")
+FORGE_DEFINE_MAP_TO_STRING(IntStrMap, int_str_map, "%d", "\"%s\"")
+FORGE_DEFINE_MAP_TO_STRING(IntPtrMap, int_ptr_map, "%d", "%p")
+
+#endif
@@ -0,0 +1,99 @@
+#ifndef FORGE_OUTPUT_H
+#define FORGE_OUTPUT_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <unistd.h>
+
+// ==============================
+// 🖨️ Buffered stdout
+// ==============================
+// print and printp write through stdio, with stdout set up once at the top
+// of main. A pipe or file gets a large buffer that is only written out when
+// it fills, at exit, or when raise() reports an error; a terminal still sees
+// every line as soon as it ends. The buffer is FORGE_OUTPUT_BUFFER_SIZE bytes
+// (a compile-time define), or FORGE_OUTPUT_BUFFER bytes if that is set in the
+// environment. Values are written directly instead of through a printf
+// format that has to be parsed on every call.
+
+#ifndef FORGE_OUTPUT_BUFFER_SIZE
+#define FORGE_OUTPUT_BUFFER_SIZE (64 * 1024)
+#endif
+
+static inline void forge_output_init(void) {
+    static char buffer[FORGE_OUTPUT_BUFFER_SIZE];
+    char* data = buffer;
+    size_t size = sizeof(buffer);
+    const char* env = getenv("FORGE_OUTPUT_BUFFER");
+    if (env != NULL && atol(env) > 0) {
+        size = (size_t)atol(env);
+        data = malloc(size);  // kept until exit, when stdio flushes it
+    }
+    setvbuf(stdout, data, isatty(STDOUT_FILENO) ? _IOLBF : _IOFBF, size);
+}
+
+// Forge programs are single-threaded, so stdout is written without taking
+// its lock for every character
+static inline void forge_print_str(const char* s) {
+    while (*s) {
+        putc_unlocked(*s++, stdout);
+    }
+}
+
+// Text known at compile time; the length is a constant, not a strlen
+#define forge_print_literal(s) forge_print_n((s), sizeof(s) - 1)
+
+static inline void forge_print_n(const char* s, size_t n) {
+    for (size_t i = 0; i < n; i++) {
+        putc_unlocked(s[i], stdout);
+    }
+}
+
+static inline void forge_print_int(long value) {
+    char digits[24];
+    char* end = digits + sizeof(digits);
+    char* p = end;
+    unsigned long n = value < 0 ? 0UL - (unsigned long)value : (unsigned long)value;
+    do {
+        *--p = (char)('0' + n % 10);
+        n /= 10;
+    } while (n != 0);
+    if (value < 0) {
+        *--p = '-';
+    }
+    forge_print_n(p, (size_t)(end - p));
+}
+
+static inline void forge_print_float(double value, int precision) {
+    printf("%.*f", precision, value);
+}
+
+static inline void forge_print_double(double value) {
+    forge_print_float(value, 6);
+}
+
+static inline void forge_print_pointer(const void* p) {
+    printf("%p", p);
+}
+
+// A value the compiler has no Forge type for: the writer is chosen from its
+// C type, and anything that is neither a number nor a string goes through
+// printf as a pointer
+#define forge_print_value(x) _Generic((x), \
+    char*: forge_print_str, \
+    const char*: forge_print_str, \
+    _Bool: forge_print_int, \
+    char: forge_print_int, \
+    signed char: forge_print_int, \
+    unsigned char: forge_print_int, \
+    short: forge_print_int, \
+    unsigned short: forge_print_int, \
+    int: forge_print_int, \
+    unsigned int: forge_print_int, \
+    long: forge_print_int, \
+    long long: forge_print_int, \
+    float: forge_print_double, \
+    double: forge_print_double, \
+    default: forge_print_pointer)(x)
+
+#endif
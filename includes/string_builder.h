@@ -0,0 +1,81 @@
+#ifndef FORGE_STRING_BUILDER_H
+#define FORGE_STRING_BUILDER_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+// ==============================
+// 🧵 StringBuilder
+// ==============================
+// A growable string that is always NUL-terminated, so data can be read as a
+// plain char* between appends. The capacity doubles as it fills, which makes
+// building a long string piece by piece linear, where `s = s + piece` copies
+// everything built so far on every step.
+
+#define STRING_BUILDER_INITIAL_CAPACITY 64
+
+typedef struct {
+    char* data;
+    size_t length;
+    size_t capacity;
+} StringBuilder;
+
+static inline StringBuilder string_builder_create(void) {
+    StringBuilder sb;
+    sb.length = 0;
+    sb.capacity = STRING_BUILDER_INITIAL_CAPACITY;
+    sb.data = malloc(sb.capacity);
+    sb.data[0] = '\0';
+    return sb;
+}
+
+// Makes room for `extra` more bytes (plus the terminator) in one realloc
+static inline void string_builder_reserve(StringBuilder* sb, size_t extra) {
+    size_t needed = sb->length + extra + 1;
+    if (needed <= sb->capacity) {
+        return;
+    }
+    size_t capacity = sb->capacity * 2;
+    while (capacity < needed) {
+        capacity *= 2;
+    }
+    sb->data = realloc(sb->data, capacity);
+    sb->capacity = capacity;
+}
+
+static inline void string_builder_append_n(StringBuilder* sb, const char* s, size_t n) {
+    string_builder_reserve(sb, n);
+    memcpy(sb->data + sb->length, s, n);
+    sb->length += n;
+    sb->data[sb->length] = '\0';
+}
+
+static inline void string_builder_append(StringBuilder* sb, const char* s) {
+    string_builder_append_n(sb, s, strlen(s));
+}
+
+static inline void string_builder_append_int(StringBuilder* sb, long value) {
+    char digits[24];
+    int n = snprintf(digits, sizeof(digits), "%ld", value);
+    string_builder_append_n(sb, digits, (size_t)n);
+}
+
+static inline void string_builder_append_float(StringBuilder* sb, double value) {
+    char digits[64];
+    int n = snprintf(digits, sizeof(digits), "%f", value);
+    string_builder_append_n(sb, digits, (size_t)n);
+}
+
+static inline void string_builder_clear(StringBuilder* sb) {
+    sb->length = 0;
+    sb->data[0] = '\0';
+}
+
+static inline void string_builder_free(StringBuilder* sb) {
+    free(sb->data);
+    sb->data = NULL;
+    sb->length = sb->capacity = 0;
+}
+
+#endif
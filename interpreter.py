@@ -0,0 +1,1340 @@
+import argparse
+import hashlib
+import math
+import random
+import re
+import sys
+from array import array
+
+import forge_trace
+from lexer import Lexer
+from forge_parser import (
+    Parser,
+    Block,
+    LetStatement,
+    Assignment,
+    ExpressionStatement,
+    ReturnStatement,
+    BreakStatement,
+    FunctionDef,
+    StructDef,
+    IfExpr,
+    WhileLoop,
+    ForStatement,
+    ForInStatement,
+    AttemptRescue,
+    AttemptRescueExpr,
+    LoadStmt,
+    NumberLiteral,
+    StringLiteral,
+    NullLiteral,
+    Identifier,
+    BinaryExpr,
+    UnaryExpr,
+    PostfixExpr,
+    CallExpr,
+    MemberAccess,
+    SubscriptExpr,
+    ListLiteral,
+    ArrayLiteral,
+    MapLiteral,
+    AddressOf,
+    ExternExpr,
+)
+from module_graph import module_name_for, resolve_module
+
+vm_log = forge_trace.channel("vm")
+
+# === Bytecode VM ===
+#
+# Runs Forge programs without a C toolchain. The Compiler turns the AST into
+# one Code object per function (plus one for the top-level statements): the
+# instructions are two parallel arrays, opcodes and their integer arguments,
+# and an argument refers to a local slot, a constant, a jump target or a
+# function, struct or built-in by index. Names are all resolved at compile
+# time, so the VM never looks anything up by name while running.
+#
+# The VM is a stack machine. Each Forge call is one call of VM.run, whose
+# dispatch loop keeps everything it touches in Python locals. attempt/rescue
+# pushes a handler (target pc and stack depth) for the current frame; an
+# error unwinds to the innermost handler, through as many frames as needed.
+#
+# Values are plain Python objects: int, float, str, list (lists and arrays),
+# dict (maps) and one class per struct. Arithmetic follows C where it
+# differs from Python (integer division and % truncate toward zero, `^` is
+# xor) and values print the way the transpiled program prints them:
+# numeric comparisons are ints, while the results the C code types as bool
+# (string comparisons, `!`, has()) are Python bools and print as true/false.
+
+# Opcodes are numbered in the order VM.run tests for them, most frequent
+# first; the dispatch chain compares against the numbers as literals, since
+# a global name lookup per test would cost more than the test itself.
+(
+    LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, JUMP_IF_FALSE, JUMP, JUMP_UNLESS_LT, ADD, LT, INC_LOCAL,
+    ADD_TO_LOCAL, JUMP_UNLESS_LE, JUMP_UNLESS_GT, JUMP_UNLESS_GE, JUMP_UNLESS_EQ, JUMP_UNLESS_NE,
+    SUB, MUL, CALL, RETURN, SUBSCRIPT, GET_FIELD, LE, GT, GE, EQ, NE, DIV, MOD, CALL_BUILTIN,
+    CALL_METHOD, POP, DUP, JUMP_IF_TRUE, DEC_LOCAL, NEG, NOT, TRUTH, XOR, SET_FIELD, NEW_STRUCT,
+    BUILD_LIST, BUILD_MAP, GET_ITER, FOR_ITER, SETUP_ATTEMPT, POP_ATTEMPT, TO_INT, TO_FLOAT,
+    LOAD_FUNCTION, CONVERT_LOCAL,
+) = range(50)
+
+OPNAMES = (
+    "LOAD_LOCAL", "LOAD_CONST", "STORE_LOCAL", "JUMP_IF_FALSE", "JUMP", "JUMP_UNLESS_LT", "ADD",
+    "LT", "INC_LOCAL", "ADD_TO_LOCAL", "JUMP_UNLESS_LE", "JUMP_UNLESS_GT", "JUMP_UNLESS_GE",
+    "JUMP_UNLESS_EQ", "JUMP_UNLESS_NE", "SUB", "MUL", "CALL", "RETURN", "SUBSCRIPT", "GET_FIELD",
+    "LE", "GT", "GE", "EQ", "NE", "DIV", "MOD", "CALL_BUILTIN", "CALL_METHOD", "POP", "DUP",
+    "JUMP_IF_TRUE", "DEC_LOCAL", "NEG", "NOT", "TRUTH", "XOR", "SET_FIELD", "NEW_STRUCT",
+    "BUILD_LIST", "BUILD_MAP", "GET_ITER", "FOR_ITER", "SETUP_ATTEMPT", "POP_ATTEMPT", "TO_INT",
+    "TO_FLOAT", "LOAD_FUNCTION", "CONVERT_LOCAL",
+)
+
+BINARY_OPS = {
+    "PLUS": ADD, "MINUS": SUB, "MUL": MUL, "DIV": DIV, "MOD": MOD, "POW": XOR,
+    "LT": LT, "LTE": LE, "GT": GT, "GTE": GE, "EQEQ": EQ, "NEQ": NE,
+}
+
+# Type hints the VM converts values to, like the C declarations they become
+NUMERIC_HINTS = {"int": "int", "number": "int", "float": "float"}
+CONVERSIONS = {"int": TO_INT, "float": TO_FLOAT}
+# A comparison followed by JUMP_IF_FALSE is emitted as one instruction
+FUSED_JUMPS = {
+    LT: JUMP_UNLESS_LT, LE: JUMP_UNLESS_LE, GT: JUMP_UNLESS_GT,
+    GE: JUMP_UNLESS_GE, EQ: JUMP_UNLESS_EQ, NE: JUMP_UNLESS_NE,
+}
+ARITHMETIC_OPS = {"PLUS", "MINUS", "MUL", "DIV", "MOD", "POW"}
+
+# Forge calls nest as Python calls of VM.run
+MAX_CALL_DEPTH = 20000
+
+
+class ForgeError(Exception):
+    # A runtime error attempt/rescue can catch; the rescue variable gets message
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Code:
+    __slots__ = ("name", "ops", "args", "consts", "nparams", "nlocals")
+
+    def __init__(self, name, nparams):
+        self.name = name
+        self.ops = array("B")
+        self.args = array("l")
+        self.consts = []
+        self.nparams = nparams
+        self.nlocals = nparams
+
+
+class StructBase:
+    __slots__ = ()
+
+
+def disassemble(code):
+    lines = [f"{code.name} ({code.nparams} params, {code.nlocals} locals)"]
+    for pc, (op, arg) in enumerate(zip(code.ops, code.args)):
+        note = f"  ({code.consts[arg]!r})" if op in (LOAD_CONST, GET_FIELD, SET_FIELD, CALL_METHOD) else ""
+        lines.append(f"{pc:5d}  {OPNAMES[op]:<14}{arg:6d}{note}")
+    return "\n".join(lines)
+
+
+# --- Values ---
+
+def forge_str(value):
+    # Text of a value as print() and string concatenation write it
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind is int:
+        return str(value)
+    if kind is float:
+        return "%f" % value
+    if kind is bool:
+        return "true" if value else "false"
+    if value is None:
+        return "(null)"
+    if kind is list:
+        return ", ".join(item_str(item) for item in value)
+    if kind is dict:
+        return "{" + ", ".join(f"{item_str(k)}: {item_str(v)}" for k, v in value.items()) + "}"
+    if kind is StringBuilder:
+        return value.to_string()
+    if isinstance(value, StructBase):
+        return f"<{type(value).__name__}>"
+    return str(value)
+
+
+def item_str(value):
+    # Lists and maps quote their strings and show floats to two places
+    if type(value) is str:
+        return f'"{value}"'
+    if type(value) is float:
+        return "%.2f" % value
+    return forge_str(value)
+
+
+def c_div(a, b):
+    if type(a) is int and type(b) is int:
+        q = a // b
+        if q < 0 and q * b != a:
+            q += 1
+        return q
+    return a / b
+
+
+def c_mod(a, b):
+    if type(a) is int and type(b) is int:
+        r = a % b
+        if r and (a < 0) != (b < 0):
+            r -= b
+        return r
+    return math.fmod(a, b)
+
+
+def c_add(a, b):
+    # Slow path of ADD: string concatenation with numbers formatted as in C
+    if type(a) is str or type(b) is str:
+        return forge_str(a) + forge_str(b)
+    raise ForgeError(f"Cannot add {type(a).__name__} and {type(b).__name__}")
+
+
+LEADING_INT = re.compile(r"\s*[+-]?\d+")
+LEADING_FLOAT = re.compile(r"\s*[+-]?(\d+\.?\d*([eE][+-]?\d+)?|\.\d+([eE][+-]?\d+)?)")
+
+
+def to_int(value):
+    # (int) casts for numbers, atoi() for strings
+    if type(value) is str:
+        m = LEADING_INT.match(value)
+        return int(m.group()) if m else 0
+    return int(value)
+
+
+def to_float(value):
+    # (double) casts for numbers, atof() for strings
+    if type(value) is str:
+        m = LEADING_FLOAT.match(value)
+        return float(m.group()) if m else 0.0
+    return float(value)
+
+
+class StringBuilder:
+    __slots__ = ("parts",)
+
+    def __init__(self):
+        self.parts = []
+
+    def append(self, value):
+        self.parts.append(forge_str(value))
+
+    def to_string(self):
+        text = "".join(self.parts)
+        self.parts = [text]
+        return text
+
+    def clear(self):
+        self.parts = []
+
+    free = clear
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+
+class Hasher:
+    __slots__ = ("sha",)
+
+    def __init__(self):
+        self.sha = hashlib.sha256()
+
+    def update(self, value):
+        self.sha.update(forge_str(value).encode("utf-8", "surrogateescape"))
+
+    def final(self):
+        digest = self.sha.hexdigest()
+        self.sha = hashlib.sha256()
+        return digest
+
+
+class File:
+    __slots__ = ("file",)
+
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, value):
+        self.file.write(forge_str(value))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# --- Built-ins ---
+# Each takes (vm, args) and returns the call's value (None for none)
+
+def open_text(path, mode="r"):
+    return open(path, mode, encoding="utf-8", errors="surrogateescape", newline="")
+
+
+def builtin_print(vm, args):
+    vm.out.write(" ".join(map(forge_str, args)) + "\n")
+
+
+def builtin_printp(vm, args):
+    precision = int(args[1]) if len(args) > 1 else 6
+    vm.out.write("%.*f\n" % (precision, args[0]))
+
+
+def builtin_input(vm, args):
+    if args:
+        vm.out.write(forge_str(args[0]))
+    vm.out.flush()
+    line = vm.stdin.readline()
+    return line[:-1] if line.endswith("\n") else line
+
+
+def builtin_len(vm, args):
+    value = args[0]
+    if type(value) in (int, float, bool):
+        return 1
+    return len(value)
+
+
+def builtin_number(vm, args):
+    value = args[0]
+    if type(value) is not str:
+        return int(value)
+    if value and not LEADING_INT.fullmatch(value):
+        raise ForgeError("Cannot convert to number")
+    return int(value) if value else 0
+
+
+def builtin_string(vm, args):
+    return forge_str(args[0])
+
+
+def builtin_float(vm, args):
+    return to_float(args[0])
+
+
+def builtin_int(vm, args):
+    return to_int(args[0])
+
+
+def builtin_read(vm, args):
+    try:
+        with open_text(args[0]) as f:
+            return f.read()
+    except OSError:
+        raise ForgeError("File read failed")
+
+
+def write_builtin(mode):
+    def write(vm, args):
+        path, content = args[0], args[1]
+        spacing = args[2] if len(args) > 2 else 0
+        try:
+            with open_text(path, mode) as f:
+                f.write(forge_str(content) + "\n" * spacing)
+        except OSError:
+            raise ForgeError("File write failed")
+        return 0
+    return write
+
+
+def builtin_lines(vm, args):
+    try:
+        f = open_text(args[0])
+    except OSError:
+        raise ForgeError("File read failed")
+    return read_lines(f)
+
+
+def read_lines(f):
+    with f:
+        for line in f:
+            if line.endswith("\n"):
+                line = line[:-2] if line.endswith("\r\n") else line[:-1]
+            yield line
+
+
+def builtin_open(vm, args):
+    try:
+        return File(open_text(args[0], args[1]))
+    except (OSError, ValueError):
+        raise ForgeError("File open failed")
+
+
+def builtin_hash(vm, args):
+    return hashlib.sha256(forge_str(args[0]).encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def builtin_hash_file(vm, args):
+    sha = hashlib.sha256()
+    try:
+        with open(args[0], "rb") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                sha.update(chunk)
+    except OSError:
+        raise ForgeError("File read failed")
+    return sha.hexdigest()
+
+
+def builtin_rf(vm, args):
+    if len(args) == 2:
+        return random.random() * (args[1] - args[0]) + args[0]
+    return random.random()
+
+
+def builtin_ri(vm, args):
+    return random.randint(args[0], args[1])
+
+
+BUILTINS = {
+    "print": builtin_print,
+    "printp": builtin_printp,
+    "input": builtin_input,
+    "len": builtin_len,
+    "number": builtin_number,
+    "string": builtin_string,
+    "float": builtin_float,
+    "int": builtin_int,
+    "read": builtin_read,
+    "read_mapped": builtin_read,
+    "unmap": lambda vm, args: None,
+    "write": write_builtin("w"),
+    "addto": write_builtin("a"),
+    "lines": builtin_lines,
+    "open": builtin_open,
+    "hash": builtin_hash,
+    "hash_file": builtin_hash_file,
+    "Hasher": lambda vm, args: Hasher(),
+    "StringBuilder": lambda vm, args: StringBuilder(),
+    "rf": builtin_rf,
+    "random_float": builtin_rf,
+    "ri": builtin_ri,
+    "random_int": builtin_ri,
+}
+BUILTIN_NAMES = list(BUILTINS)
+BUILTIN_FUNCS = [BUILTINS[name] for name in BUILTIN_NAMES]
+BUILTIN_INDEX = {name: i for i, name in enumerate(BUILTIN_NAMES)}
+BUILTIN_KINDS = {"len": "int", "number": "int", "int": "int", "float": "float"}
+
+
+# --- Methods of lists and maps ---
+
+def list_remove(vm, items, args):
+    if args[0] in items:
+        items.remove(args[0])
+
+
+def list_index(vm, items, args):
+    return items.index(args[0]) if args[0] in items else -1
+
+
+def list_remove_at(vm, items, args):
+    if 0 <= args[0] < len(items):
+        del items[args[0]]
+
+
+def list_swap_remove(vm, items, args):
+    if 0 <= args[0] < len(items):
+        items[args[0]] = items[-1]
+        items.pop()
+
+
+def list_filter_in_place(vm, items, args):
+    keep = args[0]
+    items[:] = [item for item in items if vm.run(keep, [item])]
+
+
+LIST_METHODS = {
+    "add": lambda vm, items, args: items.append(args[0]),
+    "remove": list_remove,
+    "index": list_index,
+    "remove_at": list_remove_at,
+    "swap_remove": list_swap_remove,
+    "extend": lambda vm, items, args: items.extend(args[0]),
+    "reserve": lambda vm, items, args: None,
+    "clear": lambda vm, items, args: items.clear(),
+    "free": lambda vm, items, args: items.clear(),
+    "filter_in_place": list_filter_in_place,
+}
+
+
+def map_delete(vm, entries, args):
+    return int(entries.pop(args[0], entries) is not entries)
+
+
+MAP_METHODS = {
+    "set": lambda vm, entries, args: entries.__setitem__(args[0], args[1]),
+    "get": lambda vm, entries, args: entries.get(args[0], 0),
+    "has": lambda vm, entries, args: args[0] in entries,
+    "delete": map_delete,
+    "keys": lambda vm, entries, args: list(entries),
+    "values": lambda vm, entries, args: list(entries.values()),
+    "free": lambda vm, entries, args: entries.clear(),
+}
+
+# Methods callable on the runtime objects, by type
+OBJECT_METHODS = {
+    StringBuilder: {"append", "to_string", "clear", "free"},
+    Hasher: {"update", "final"},
+    File: {"write", "flush", "close"},
+}
+
+
+class VM:
+    def __init__(self, functions, structs, out=None, stdin=None):
+        self.functions = functions  # Code by index
+        self.structs = structs      # struct class by index
+        self.out = out or sys.stdout
+        self.stdin = stdin or sys.stdin
+        if sys.getrecursionlimit() < MAX_CALL_DEPTH:
+            sys.setrecursionlimit(MAX_CALL_DEPTH)
+
+    def call_method(self, obj, name, args):
+        kind = type(obj)
+        if kind is list:
+            method = LIST_METHODS.get(name)
+            if method is not None:
+                return method(self, obj, args)
+        elif kind is dict:
+            method = MAP_METHODS.get(name)
+            if method is not None:
+                return method(self, obj, args)
+        elif name in OBJECT_METHODS.get(kind, ()):
+            return getattr(obj, name)(*args)
+        raise ForgeError(f"{kind.__name__} does not support '{name}'")
+
+    def run(self, code, args):
+        ops = code.ops
+        opargs = code.args
+        consts = code.consts
+        functions = self.functions
+        run = self.run
+        fast = args
+        if code.nlocals > len(args):
+            fast.extend([None] * (code.nlocals - len(args)))
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        handlers = []
+        pc = 0
+        while True:
+            try:
+                while True:
+                    op = ops[pc]
+                    arg = opargs[pc]
+                    pc += 1
+                    if op == 0:  # LOAD_LOCAL
+                        push(fast[arg])
+                    elif op == 1:  # LOAD_CONST
+                        push(consts[arg])
+                    elif op == 2:  # STORE_LOCAL
+                        fast[arg] = pop()
+                    elif op == 3:  # JUMP_IF_FALSE
+                        if not pop():
+                            pc = arg
+                    elif op == 4:  # JUMP
+                        pc = arg
+                    elif op == 5:  # JUMP_UNLESS_LT
+                        b = pop()
+                        if not pop() < b:
+                            pc = arg
+                    elif op == 6:  # ADD
+                        b = pop()
+                        try:
+                            stack[-1] = stack[-1] + b
+                        except TypeError:
+                            stack[-1] = c_add(stack[-1], b)
+                    elif op == 7:  # LT
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a < b if type(a) is str else (a < b) + 0
+                    elif op == 8:  # INC_LOCAL
+                        fast[arg] += 1
+                    elif op == 9:  # ADD_TO_LOCAL
+                        # x = x + a + b ...: arg is slot << 8 | number of terms
+                        n = arg & 0xFF
+                        terms = stack[-n:]
+                        del stack[-n:]
+                        slot = arg >> 8
+                        value = fast[slot]
+                        if type(value) is str:
+                            # Dropping the slot's reference leaves value the
+                            # only one, so CPython extends it in place
+                            fast[slot] = None
+                            for term in terms:
+                                value += term if type(term) is str else forge_str(term)
+                        else:
+                            for term in terms:
+                                try:
+                                    value = value + term
+                                except TypeError:
+                                    value = c_add(value, term)
+                        fast[slot] = value
+                    elif op == 10:  # JUMP_UNLESS_LE
+                        b = pop()
+                        if not pop() <= b:
+                            pc = arg
+                    elif op == 11:  # JUMP_UNLESS_GT
+                        b = pop()
+                        if not pop() > b:
+                            pc = arg
+                    elif op == 12:  # JUMP_UNLESS_GE
+                        b = pop()
+                        if not pop() >= b:
+                            pc = arg
+                    elif op == 13:  # JUMP_UNLESS_EQ
+                        b = pop()
+                        if pop() != b:
+                            pc = arg
+                    elif op == 14:  # JUMP_UNLESS_NE
+                        b = pop()
+                        if pop() == b:
+                            pc = arg
+                    elif op == 15:  # SUB
+                        b = pop()
+                        stack[-1] = stack[-1] - b
+                    elif op == 16:  # MUL
+                        b = pop()
+                        stack[-1] = stack[-1] * b
+                    elif op == 17:  # CALL
+                        callee = functions[arg]
+                        n = callee.nparams
+                        if n == 1:
+                            call_args = [pop()]
+                        elif n:
+                            call_args = stack[-n:]
+                            del stack[-n:]
+                        else:
+                            call_args = []
+                        push(run(callee, call_args))
+                    elif op == 18:  # RETURN
+                        return pop()
+                    elif op == 19:  # SUBSCRIPT
+                        index = pop()
+                        target = stack[-1]
+                        if type(target) is dict:
+                            stack[-1] = target.get(index, 0)
+                        elif index < 0:
+                            raise IndexError(index)
+                        elif type(target) is str:
+                            stack[-1] = ord(target[index])  # a char, as in C
+                        else:
+                            stack[-1] = target[index]
+                    elif op == 20:  # GET_FIELD
+                        stack[-1] = getattr(stack[-1], consts[arg])
+                    elif op == 21:  # LE
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a <= b if type(a) is str else (a <= b) + 0
+                    elif op == 22:  # GT
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a > b if type(a) is str else (a > b) + 0
+                    elif op == 23:  # GE
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a >= b if type(a) is str else (a >= b) + 0
+                    elif op == 24:  # EQ
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a == b if type(a) is str else (a == b) + 0
+                    elif op == 25:  # NE
+                        b = pop()
+                        a = stack[-1]
+                        stack[-1] = a != b if type(a) is str else (a != b) + 0
+                    elif op == 26:  # DIV
+                        b = pop()
+                        stack[-1] = c_div(stack[-1], b)
+                    elif op == 27:  # MOD
+                        b = pop()
+                        stack[-1] = c_mod(stack[-1], b)
+                    elif op == 28:  # CALL_BUILTIN
+                        n = arg & 0xFF
+                        if n:
+                            call_args = stack[-n:]
+                            del stack[-n:]
+                        else:
+                            call_args = []
+                        push(BUILTIN_FUNCS[arg >> 8](self, call_args))
+                    elif op == 29:  # CALL_METHOD
+                        name, n = consts[arg]
+                        if n:
+                            call_args = stack[-n:]
+                            del stack[-n:]
+                        else:
+                            call_args = []
+                        stack[-1] = self.call_method(stack[-1], name, call_args)
+                    elif op == 30:  # POP
+                        pop()
+                    elif op == 31:  # DUP
+                        push(stack[-1])
+                    elif op == 32:  # JUMP_IF_TRUE
+                        if pop():
+                            pc = arg
+                    elif op == 33:  # DEC_LOCAL
+                        fast[arg] -= 1
+                    elif op == 34:  # NEG
+                        stack[-1] = -stack[-1]
+                    elif op == 35:  # NOT
+                        stack[-1] = not stack[-1]
+                    elif op == 36:  # TRUTH
+                        stack[-1] = 1 if stack[-1] else 0
+                    elif op == 37:  # XOR
+                        b = pop()
+                        stack[-1] = stack[-1] ^ b
+                    elif op == 38:  # SET_FIELD
+                        value = pop()
+                        setattr(pop(), consts[arg], value)
+                    elif op == 39:  # NEW_STRUCT
+                        cls = self.structs[arg >> 8]
+                        n = arg & 0xFF
+                        obj = cls()
+                        if n:
+                            for field, convert, value in zip(cls.__slots__, cls.conversions, stack[-n:]):
+                                setattr(obj, field, convert(value) if convert else value)
+                            del stack[-n:]
+                        push(obj)
+                    elif op == 40:  # BUILD_LIST
+                        if arg:
+                            items = stack[-arg:]
+                            del stack[-arg:]
+                        else:
+                            items = []
+                        push(items)
+                    elif op == 41:  # BUILD_MAP
+                        flat = stack[-2 * arg:] if arg else []
+                        del stack[len(stack) - 2 * arg:]
+                        push(dict(zip(flat[::2], flat[1::2])))
+                    elif op == 42:  # GET_ITER
+                        stack[-1] = iter(stack[-1])
+                    elif op == 43:  # FOR_ITER
+                        for item in stack[-1]:
+                            push(item)
+                            break
+                        else:
+                            pop()
+                            pc = arg
+                    elif op == 44:  # SETUP_ATTEMPT
+                        handlers.append((arg, len(stack)))
+                    elif op == 45:  # POP_ATTEMPT
+                        handlers.pop()
+                    elif op == 46:  # TO_INT
+                        stack[-1] = to_int(stack[-1])
+                    elif op == 47:  # TO_FLOAT
+                        stack[-1] = to_float(stack[-1])
+                    elif op == 48:  # LOAD_FUNCTION
+                        push(functions[arg])
+                    elif op == 49:  # CONVERT_LOCAL
+                        # A typed parameter: arg is slot << 1 | is_float
+                        value = fast[arg >> 1]
+                        if arg & 1:
+                            if type(value) is not float:
+                                fast[arg >> 1] = to_float(value)
+                        elif type(value) is not int:
+                            fast[arg >> 1] = to_int(value)
+                    else:
+                        raise RuntimeError(f"bad opcode {op} at {code.name}:{pc - 1}")
+            except ForgeError as e:
+                message = e.message
+            except ZeroDivisionError:
+                message = "Division by zero"
+            except IndexError:
+                message = "Array index out of bounds"
+            except (TypeError, AttributeError) as e:
+                message = f"Type error: {e}"
+            if not handlers:
+                raise ForgeError(message)
+            pc, depth = handlers.pop()
+            del stack[depth:]
+            push(message)
+
+
+# --- Compiler ---
+
+class Loop:
+    __slots__ = ("breaks", "attempts", "iterators")
+
+    def __init__(self, attempts, iterators):
+        self.breaks = []          # jumps to patch to the loop's end
+        self.attempts = attempts  # attempt handlers open outside the loop
+        self.iterators = iterators
+
+
+class Unit:
+    # Compile state of one Code object
+    __slots__ = ("code", "const_index", "scopes", "loops", "attempts", "module", "kinds", "label")
+
+    def __init__(self, code, module):
+        self.code = code
+        self.const_index = {}
+        self.scopes = [{}]
+        self.loops = []
+        self.attempts = 0
+        self.module = module
+        self.kinds = {}  # slot -> "int" / "float" for locals declared with a type hint
+        self.label = -1  # latest position taken as a jump target
+
+
+class Compiler:
+    def __init__(self, search_paths=None):
+        self.search_paths = search_paths or ["./", "./modules/", "./lib/"]
+        self.function_index = {}  # qualified name -> index into functions
+        self.functions = []       # Code, filled in by compile_functions
+        self.pending = []         # (FunctionDef, module, index) still to compile
+        self.definitions = {}     # index -> FunctionDef, for arity checks
+        self.struct_index = {}
+        self.structs = []
+        self.modules = {}         # load path -> (module name, Program)
+        self.loaded = set()
+        self.unit = None
+
+    # --- Entry points ---
+
+    def compile_program(self, program):
+        main = Code("<main>", 0)
+        self.register(program.statements, None)
+        self.unit = Unit(main, None)
+        self.statements(program.statements)
+        self.emit(LOAD_CONST, self.const(None))
+        self.emit(RETURN)
+        self.compile_functions()
+        vm_log.debug("compiled %d functions, %d structs", len(self.functions), len(self.structs))
+        return main
+
+    def compile_functions(self):
+        while self.pending:
+            node, module, index = self.pending.pop(0)
+            self.functions[index] = self.function(node, module)
+
+    # --- Declarations, found before any code is compiled ---
+
+    def register(self, statements, module):
+        for stmt in statements:
+            if isinstance(stmt, FunctionDef):
+                name = self.qualified(stmt.name, module)
+                if name not in self.function_index:
+                    self.function_index[name] = len(self.functions)
+                    self.functions.append(None)
+                self.pending.append((stmt, module, self.function_index[name]))
+                self.definitions[self.function_index[name]] = stmt
+            elif isinstance(stmt, StructDef):
+                fields = tuple(field for field, _ in stmt.fields)
+                cls = type(stmt.name, (StructBase,), {"__slots__": fields})
+                # int and float fields convert like the C struct's members
+                cls.conversions = tuple(
+                    {"int": to_int, "float": to_float}.get(NUMERIC_HINTS.get(typ)) for _, typ in stmt.fields
+                )
+                if stmt.name in self.struct_index:
+                    self.structs[self.struct_index[stmt.name]] = cls
+                else:
+                    self.struct_index[stmt.name] = len(self.structs)
+                    self.structs.append(cls)
+            elif isinstance(stmt, LoadStmt):
+                self.register_module(stmt.path)
+
+    def register_module(self, path):
+        path = path.strip('"')
+        if path in self.modules:
+            return
+        if not path.endswith(".forge"):
+            raise Exception(f"Only .forge files supported, got: {path}")
+        full_path = resolve_module(path, self.search_paths)
+        if not full_path:
+            raise FileNotFoundError(f"Cannot find module file: {path}")
+        with open(full_path, "r") as f:
+            program = Parser(Lexer(f.read()).iter_tokens()).parse()
+        name = module_name_for(full_path)
+        self.modules[path] = (name, program)
+        self.register(program.statements, name)
+
+    def qualified(self, name, module):
+        # Module functions are named <module>_<name>, as in the generated C
+        if module and not name.startswith(module + "_"):
+            return f"{module}_{name}"
+        return name
+
+    def function(self, node, module):
+        params = [name for name, _ in node.params]
+        code = Code(self.qualified(node.name, module), len(params))
+        outer, self.unit = self.unit, Unit(code, module)
+        for slot, (name, hint) in enumerate(node.params):
+            self.unit.scopes[-1][name] = slot
+            kind = NUMERIC_HINTS.get(hint)
+            if kind:
+                self.unit.kinds[slot] = kind
+                self.emit(CONVERT_LOCAL, slot << 1 | (kind == "float"))
+        if isinstance(node.body, Block):
+            self.statements(node.body.statements, return_type=node.return_type)
+            self.emit(LOAD_CONST, self.const(None))
+        else:
+            self.expr(node.body)
+            self.convert(node.return_type, node.body)
+        self.emit(RETURN)
+        self.unit = outer
+        vm_log.debug("%s", disassemble(code))
+        return code
+
+    # --- Emitting ---
+
+    def emit(self, op, arg=0):
+        code = self.unit.code
+        if op == JUMP_IF_FALSE and code.ops and code.ops[-1] in FUSED_JUMPS and self.unit.label != len(code.ops):
+            # Nothing jumps in between the comparison and the branch
+            code.ops[-1] = FUSED_JUMPS[code.ops[-1]]
+            code.args[-1] = arg
+            return len(code.ops) - 1
+        code.ops.append(op)
+        code.args.append(arg)
+        return len(code.ops) - 1
+
+    def here(self):
+        # Every jump target is taken from here()
+        self.unit.label = len(self.unit.code.ops)
+        return self.unit.label
+
+    def patch(self, at, target=None):
+        self.unit.code.args[at] = self.here() if target is None else target
+
+    def const(self, value):
+        key = (type(value), value)
+        index = self.unit.const_index.get(key)
+        if index is None:
+            index = self.unit.const_index[key] = len(self.unit.code.consts)
+            self.unit.code.consts.append(value)
+        return index
+
+    def convert(self, hint, node):
+        # Converts the value of node, just compiled, to a typed destination
+        kind = NUMERIC_HINTS.get(hint)
+        if kind and self.static_kind(node) != kind:
+            self.emit(CONVERSIONS[kind])
+
+    def static_kind(self, node):
+        # "int" or "float" when node's value is known to be one at compile time
+        if isinstance(node, NumberLiteral):
+            return "float" if node.is_float else "int"
+        if isinstance(node, Identifier):
+            slot = self.lookup(node.name)
+            return self.unit.kinds.get(slot) if slot is not None else None
+        if isinstance(node, BinaryExpr):
+            if node.op in ("AND", "OR"):
+                return "int"
+            if node.op in ARITHMETIC_OPS:
+                kinds = {self.static_kind(node.left), self.static_kind(node.right)}
+                if kinds == {"int"}:
+                    return "int"
+                if kinds <= {"int", "float"} and node.op != "POW":
+                    return "float"
+            return None
+        if isinstance(node, (UnaryExpr, PostfixExpr)):
+            if getattr(node, "op", None) == "!":
+                return None
+            return self.static_kind(node.operand)
+        if isinstance(node, CallExpr) and isinstance(node.func, Identifier):
+            name = node.func.name
+            if name in self.struct_index:
+                return None
+            if name in BUILTIN_INDEX:
+                return BUILTIN_KINDS.get(name)
+            index = self.function_named(name)
+            if index is not None:
+                return NUMERIC_HINTS.get(self.definitions[index].return_type)
+        return None
+
+    # --- Names ---
+
+    def declare(self, name):
+        scope = self.unit.scopes[-1]
+        if name not in scope:
+            scope[name] = self.unit.code.nlocals
+            self.unit.code.nlocals += 1
+        return scope[name]
+
+    def lookup(self, name):
+        for scope in reversed(self.unit.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def function_named(self, name):
+        index = self.function_index.get(name)
+        if index is None and self.unit.module:
+            index = self.function_index.get(f"{self.unit.module}_{name}")
+        return index
+
+    def local(self, name):
+        slot = self.lookup(name)
+        if slot is None:
+            raise Exception(f"Undefined variable '{name}' in {self.unit.code.name}")
+        return slot
+
+    # --- Statements ---
+
+    def statements(self, statements, return_type=None):
+        for stmt in statements:
+            self.statement(stmt, return_type)
+
+    def block(self, block, return_type=None):
+        self.unit.scopes.append({})
+        self.statements(block.statements, return_type)
+        self.unit.scopes.pop()
+
+    def statement(self, stmt, return_type=None):
+        if isinstance(stmt, ExpressionStatement):
+            expr = stmt.expr
+            if isinstance(expr, Assignment):
+                self.assignment(expr)
+            elif isinstance(expr, PostfixExpr) and isinstance(expr.operand, Identifier):
+                self.emit(INC_LOCAL if expr.op == "INC" else DEC_LOCAL, self.local(expr.operand.name))
+            else:
+                self.expr(expr)
+                self.emit(POP)
+        elif isinstance(stmt, LetStatement):
+            self.expr(stmt.expr)
+            self.convert(stmt.type_hint, stmt.expr)
+            slot = self.declare(stmt.name)
+            self.emit(STORE_LOCAL, slot)
+            kind = NUMERIC_HINTS.get(stmt.type_hint)
+            if kind:
+                self.unit.kinds[slot] = kind
+            else:
+                self.unit.kinds.pop(slot, None)
+        elif isinstance(stmt, Assignment):
+            self.assignment(stmt)
+        elif isinstance(stmt, IfExpr):
+            self.if_statement(stmt, return_type)
+        elif isinstance(stmt, WhileLoop):
+            self.while_loop(stmt, return_type)
+        elif isinstance(stmt, ForStatement):
+            self.for_loop(stmt, return_type)
+        elif isinstance(stmt, ForInStatement):
+            self.for_in(stmt, return_type)
+        elif isinstance(stmt, ReturnStatement):
+            self.expr(stmt.expr)
+            self.convert(return_type, stmt.expr)
+            self.emit(RETURN)
+        elif isinstance(stmt, BreakStatement):
+            self.break_statement()
+        elif isinstance(stmt, AttemptRescue):
+            self.attempt(stmt, return_type)
+        elif isinstance(stmt, Block):
+            self.block(stmt, return_type)
+        elif isinstance(stmt, LoadStmt):
+            self.load(stmt)
+        elif isinstance(stmt, (FunctionDef, StructDef)):
+            pass  # registered up front
+        elif isinstance(stmt, PostfixExpr):
+            self.statement(ExpressionStatement(stmt))
+        else:
+            self.expr(stmt)
+            self.emit(POP)
+
+    def load(self, stmt):
+        # A module's top-level statements run where it is first loaded
+        path = stmt.path.strip('"')
+        if path in self.loaded:
+            return
+        self.loaded.add(path)
+        module, program = self.modules[path]
+        outer, self.unit.module = self.unit.module, module
+        self.statements(program.statements)
+        self.unit.module = outer
+
+    def assignment(self, node):
+        target = node.target
+        if isinstance(target, MemberAccess):
+            self.expr(target.obj)
+            self.expr(node.expr)
+            self.emit(SET_FIELD, self.const(target.name))
+            return
+        name = target.name if isinstance(target, Identifier) else target
+        slot = self.local(name)
+        kind = self.unit.kinds.get(slot)
+        terms = self.appended_terms(name, node.expr)
+        if terms and not kind:
+            for term in terms:
+                self.expr(term)
+            self.emit(ADD_TO_LOCAL, slot << 8 | len(terms))
+            return
+        self.expr(node.expr)
+        if kind:
+            self.convert(kind, node.expr)
+        self.emit(STORE_LOCAL, slot)
+
+    def appended_terms(self, name, expr):
+        # [a, b, ...] for `name + a + b ...`, which builds strings in place
+        terms = []
+        while isinstance(expr, BinaryExpr) and expr.op == "PLUS":
+            terms.append(expr.right)
+            expr = expr.left
+        if terms and isinstance(expr, Identifier) and expr.name == name and len(terms) < 256:
+            return terms[::-1]
+        return None
+
+    def if_statement(self, node, return_type):
+        ends = []
+        branches = [(node.condition, node.then_branch)] + list(node.elif_branches)
+        for i, (condition, body) in enumerate(branches):
+            self.expr(condition)
+            skip = self.emit(JUMP_IF_FALSE)
+            self.block(body, return_type)
+            if i < len(branches) - 1 or node.else_branch:
+                ends.append(self.emit(JUMP))
+            self.patch(skip)
+        if node.else_branch:
+            self.block(node.else_branch, return_type)
+        for end in ends:
+            self.patch(end)
+
+    def loop_body(self, body, return_type, iterators=0):
+        loop = Loop(self.unit.attempts, iterators)
+        self.unit.loops.append(loop)
+        self.block(body, return_type)
+        self.unit.loops.pop()
+        return loop
+
+    def while_loop(self, node, return_type):
+        top = self.here()
+        self.expr(node.condition)
+        exit_jump = self.emit(JUMP_IF_FALSE)
+        loop = self.loop_body(node.body, return_type)
+        self.emit(JUMP, top)
+        self.patch(exit_jump)
+        for at in loop.breaks:
+            self.patch(at)
+
+    def for_loop(self, node, return_type):
+        self.unit.scopes.append({})
+        self.statement(node.init)
+        top = self.here()
+        self.expr(node.condition)
+        exit_jump = self.emit(JUMP_IF_FALSE)
+        loop = self.loop_body(node.body, return_type)
+        self.statement(ExpressionStatement(node.increment))
+        self.emit(JUMP, top)
+        self.patch(exit_jump)
+        for at in loop.breaks:
+            self.patch(at)
+        self.unit.scopes.pop()
+
+    def for_in(self, node, return_type):
+        self.expr(node.iterable)
+        self.emit(GET_ITER)
+        top = self.emit(FOR_ITER)
+        self.unit.scopes.append({})
+        self.emit(STORE_LOCAL, self.declare(node.name))
+        loop = self.loop_body(node.body, return_type, iterators=1)
+        self.unit.scopes.pop()
+        self.emit(JUMP, top)
+        self.patch(top)
+        for at in loop.breaks:
+            self.patch(at)
+
+    def break_statement(self):
+        if not self.unit.loops:
+            raise Exception("break outside of a loop")
+        loop = self.unit.loops[-1]
+        for _ in range(self.unit.attempts - loop.attempts):
+            self.emit(POP_ATTEMPT)
+        for _ in range(loop.iterators):
+            self.emit(POP)
+        loop.breaks.append(self.emit(JUMP))
+
+    def attempt(self, node, return_type):
+        setup = self.emit(SETUP_ATTEMPT)
+        self.unit.attempts += 1
+        self.block(node.try_block, return_type)
+        self.unit.attempts -= 1
+        self.emit(POP_ATTEMPT)
+        end = self.emit(JUMP)
+        self.patch(setup)
+        self.unit.scopes.append({})
+        self.emit(STORE_LOCAL, self.declare(node.error_name))
+        self.block(node.rescue_block, return_type)
+        self.unit.scopes.pop()
+        self.patch(end)
+
+    # --- Expressions ---
+
+    def expr(self, node):
+        if isinstance(node, NumberLiteral):
+            self.emit(LOAD_CONST, self.const(node.value))
+        elif isinstance(node, Identifier):
+            slot = self.lookup(node.name)
+            if slot is not None:
+                self.emit(LOAD_LOCAL, slot)
+            elif self.function_named(node.name) is not None:
+                self.emit(LOAD_FUNCTION, self.function_named(node.name))
+            else:
+                raise Exception(f"Undefined variable '{node.name}' in {self.unit.code.name}")
+        elif isinstance(node, BinaryExpr):
+            self.binary(node)
+        elif isinstance(node, StringLiteral):
+            self.emit(LOAD_CONST, self.const(node.value))
+        elif isinstance(node, CallExpr):
+            self.call(node)
+        elif isinstance(node, SubscriptExpr):
+            self.expr(node.target)
+            self.expr(node.index)
+            self.emit(SUBSCRIPT)
+        elif isinstance(node, MemberAccess):
+            self.expr(node.obj)
+            self.emit(GET_FIELD, self.const(node.name))
+        elif isinstance(node, UnaryExpr):
+            self.expr(node.operand)
+            self.emit(NEG if node.op == "-" else NOT)
+        elif isinstance(node, (ListLiteral, ArrayLiteral)):
+            for element in node.elements:
+                self.expr(element)
+            self.emit(BUILD_LIST, len(node.elements))
+        elif isinstance(node, MapLiteral):
+            for key, value in node.entries:
+                self.expr(key)
+                self.expr(value)
+            self.emit(BUILD_MAP, len(node.entries))
+        elif isinstance(node, NullLiteral):
+            self.emit(LOAD_CONST, self.const(None))
+        elif isinstance(node, AttemptRescueExpr):
+            setup = self.emit(SETUP_ATTEMPT)
+            self.expr(node.try_expr)
+            self.emit(POP_ATTEMPT)
+            end = self.emit(JUMP)
+            self.patch(setup)
+            self.emit(POP)
+            self.expr(node.rescue_expr)
+            self.patch(end)
+        elif isinstance(node, PostfixExpr):
+            # x++ as a value: the old value, then the increment
+            slot = self.local(node.operand.name)
+            self.emit(LOAD_LOCAL, slot)
+            self.emit(INC_LOCAL if node.op == "INC" else DEC_LOCAL, slot)
+        elif isinstance(node, Assignment):
+            self.assignment(node)
+            self.expr(node.target if isinstance(node.target, (Identifier, MemberAccess)) else Identifier(node.target))
+        elif isinstance(node, AddressOf):
+            self.expr(node.expr)  # values are shared by reference already
+        elif isinstance(node, ExpressionStatement):
+            self.expr(node.expr)  # read(...) in expression position
+        elif isinstance(node, ExternExpr):
+            raise Exception(f"extern(\"{node.name}\") needs the C backend (transpile_to_c.py)")
+        else:
+            raise Exception(f"Unsupported expression in the VM: {type(node).__name__}")
+
+    def binary(self, node):
+        if node.op in ("AND", "OR"):
+            # Short-circuit; the result is a truth value like C's && and ||
+            self.expr(node.left)
+            self.emit(TRUTH)
+            self.emit(DUP)
+            skip = self.emit(JUMP_IF_FALSE if node.op == "AND" else JUMP_IF_TRUE)
+            self.emit(POP)
+            self.expr(node.right)
+            self.emit(TRUTH)
+            self.patch(skip)
+            return
+        op = BINARY_OPS.get(node.op)
+        if op is None:
+            raise Exception(f"Unsupported operator: {node.op}")
+        self.expr(node.left)
+        self.expr(node.right)
+        self.emit(op)
+
+    def call(self, node):
+        func = node.func
+        if isinstance(func, MemberAccess):
+            obj = func.obj
+            if isinstance(obj, Identifier) and self.lookup(obj.name) is None:
+                # Module function: math.sum(...) -> math_sum
+                index = self.function_index.get(f"{obj.name}_{func.name}")
+                if index is None:
+                    raise Exception(f"Unknown function '{obj.name}.{func.name}'")
+                self.call_function(index, node.args)
+                return
+            self.expr(obj)
+            for arg in node.args:
+                self.expr(arg)
+            self.emit(CALL_METHOD, self.const((func.name, len(node.args))))
+            return
+
+        if not isinstance(func, Identifier):
+            raise Exception("Unsupported call expression structure")
+        name = func.name
+        if name in self.struct_index:
+            for arg in node.args:
+                self.expr(arg)
+            self.emit(NEW_STRUCT, self.struct_index[name] << 8 | len(node.args))
+        elif name in BUILTIN_INDEX:
+            for arg in node.args:
+                self.expr(arg)
+            self.emit(CALL_BUILTIN, BUILTIN_INDEX[name] << 8 | len(node.args))
+        elif self.function_named(name) is not None:
+            self.call_function(self.function_named(name), node.args)
+        else:
+            raise Exception(f"Unknown function '{name}'")
+
+    def call_function(self, index, args):
+        node = self.pending_node(index)
+        if node is not None and len(args) != len(node.params):
+            raise Exception(f"{node.name}() takes {len(node.params)} arguments, got {len(args)}")
+        for arg in args:
+            self.expr(arg)
+        self.emit(CALL, index)
+
+    def pending_node(self, index):
+        return self.definitions.get(index)
+
+
+class Interpreter:
+    # Front end for main.py: compiles a parsed Program and runs it
+    def __init__(self, search_paths=None, out=None, stdin=None):
+        self.search_paths = search_paths
+        self.out = out
+        self.stdin = stdin
+
+    def eval(self, program):
+        compiler = Compiler(self.search_paths)
+        main = compiler.compile_program(program)
+        vm = VM(compiler.functions, compiler.structs, self.out, self.stdin)
+        return vm.run(main, [])
+
+
+def run_source(source, search_paths=None):
+    return Interpreter(search_paths).eval(Parser(Lexer(source).iter_tokens()).parse())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a Forge program on the bytecode VM")
+    ap.add_argument("source", help="Forge source file")
+    ap.add_argument("--dis", action="store_true", help="print the bytecode instead of running it")
+    ap.add_argument("--trace", help='trace levels, e.g. "vm=debug"')
+    args = ap.parse_args()
+    if args.trace:
+        forge_trace.configure(args.trace)
+
+    with open(args.source, "r") as f:
+        program = Parser(Lexer(f.read()).iter_tokens()).parse()
+    compiler = Compiler()
+    main_code = compiler.compile_program(program)
+    if args.dis:
+        for code in [main_code] + compiler.functions:
+            print(disassemble(code) + "\n")
+        return
+
+    vm = VM(compiler.functions, compiler.structs)
+    try:
+        vm.run(main_code, [])
+    except ForgeError as e:
+        sys.stdout.flush()
+        sys.stderr.write(f"Error: {e.message}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
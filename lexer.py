@@ -1,5 +1,8 @@
 import re
-from typing import List, Tuple, NamedTuple
+from typing import Iterator, List, Tuple, NamedTuple
+import forge_trace
+
+lexer_log = forge_trace.channel("lexer")
 
 # === Token Definitions ===
 
@@ -92,9 +95,14 @@ class Lexer:
         self.source = source
 
     def tokenize(self) -> List[Token]:
+        tokens = list(self.iter_tokens())
+        lexer_log.debug("tokenized %d tokens", len(tokens))
+        return tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        # Generator form of tokenize(): tokens are produced as the parser asks for them
         line_num = 1
         line_start = 0
-        tokens = []
 
         for mo in MASTER_PATTERN.finditer(self.source):
             kind = mo.lastgroup
@@ -115,9 +123,5 @@ class Lexer:
                     kind = value.upper()
                 elif value in TYPES:
                     kind = "TYPE"
-            # for token in tokens:
-            #      print(token)
 
-            tokens.append(Token(kind, value, line_num, column))
-
-        return tokens
+            yield Token(kind, value, line_num, column)
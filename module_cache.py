@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+# === Persistent Module Cache ===
+#
+# Loaded modules are stored on disk keyed by the module source, its name and
+# the compiler fingerprint, so an unchanged module never has to be lexed,
+# parsed or type-registered twice. Each entry holds the module AST (with its
+# function names already qualified) and the symbols its registration pass
+# added, recorded per environment fingerprint since return-type inference
+# can see whatever was registered before the load.
+
+CACHE_FORMAT = 1
+
+# Files whose contents decide what an AST / registration looks like
+COMPILER_SOURCES = (
+    "lexer.py", "forge_parser.py", "transpile_to_c.py", "module_cache.py", "module_graph.py",
+    "c_templates.py", "c_emit.py",
+)
+
+# Keep a handful of registration results per module before dropping old ones
+MAX_ENVIRONMENTS = 8
+
+# Entries a MemoryModuleCache holds before evicting the least recently used
+MAX_MEMORY_ENTRIES = 256
+
+_compiler_version = None
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.environ.get("FORGE_CACHE_DIR") or os.path.join(base, "forge")
+
+
+def compiler_version():
+    global _compiler_version
+    if _compiler_version is None:
+        h = hashlib.sha256(f"forge-cache-{CACHE_FORMAT}".encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in COMPILER_SOURCES:
+            path = os.path.join(here, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    h.update(f.read())
+        _compiler_version = h.hexdigest()[:16]
+    return _compiler_version
+
+
+def environment_fingerprint(function_types, defined_functions, scopes, struct_names):
+    h = hashlib.sha256()
+    h.update(repr(sorted(function_types.items())).encode())
+    h.update(repr(sorted(defined_functions)).encode())
+    for scope in scopes:
+        h.update(repr(sorted(scope.items())).encode())
+    h.update(repr(sorted(struct_names)).encode())
+    return h.hexdigest()
+
+
+class ModuleCache:
+    def __init__(self, cache_dir=None, enabled=True):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "modules")
+        self.enabled = enabled and os.environ.get("FORGE_NO_CACHE") is None
+
+    def key(self, module_name, source):
+        h = hashlib.sha256()
+        h.update(compiler_version().encode())
+        h.update(b"\0" + module_name.encode() + b"\0")
+        h.update(source.encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".pickle")
+
+    def load(self, key):
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        if entry.get("format") != CACHE_FORMAT:
+            return None
+        return entry
+
+    def store(self, key, entry):
+        entry["format"] = CACHE_FORMAT
+        envs = entry.get("registrations", {})
+        while len(envs) > MAX_ENVIRONMENTS:
+            envs.pop(next(iter(envs)))
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so concurrent builds never see half an entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class MemoryModuleCache(ModuleCache):
+    # For long-lived processes (compile_server.py): entries stay in memory in
+    # front of the disk cache, so a module that was loaded once is neither
+    # re-read from disk nor re-registered. Keys hash the module source, so an
+    # edited module simply misses. Memory is used even when the disk cache is
+    # disabled.
+    def __init__(self, cache_dir=None, enabled=True, max_entries=MAX_MEMORY_ENTRIES):
+        super().__init__(cache_dir, enabled)
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        entry = super().load(key)
+        if entry is not None:
+            self.remember(key, entry)
+        return entry
+
+    def store(self, key, entry):
+        self.remember(key, entry)
+        super().store(key, entry)
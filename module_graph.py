@@ -0,0 +1,102 @@
+import os
+import pickle
+import re
+
+import forge_trace
+from lexer import Lexer
+from forge_parser import Parser, LoadStmt
+
+build_log = forge_trace.channel("build")
+
+# === Module Graph + Parallel Parsing ===
+#
+# Before transpiling, the whole `load` graph is discovered by scanning module
+# sources for load statements, and every module that is not already cached is
+# lexed and parsed in a worker process. Workers only produce pickled ASTs,
+# which depend on nothing but the module source. Symbol registration still
+# happens in the transpiler in load order, so the generated C never depends
+# on worker scheduling.
+
+LOAD_PATTERN = re.compile(r'^[ \t]*load[ \t]+"([^"]+)"', re.M)
+# Below this much source to parse, parsing in-process beats starting workers:
+# importing concurrent.futures and spawning them costs ~70 ms, while the
+# parser gets through ~0.3 MB/s
+PARALLEL_PARSE_MIN_BYTES = 64 * 1024
+
+
+def resolve_module(path, search_paths):
+    for base in search_paths:
+        candidate = os.path.join(base, path)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def module_name_for(full_path):
+    return os.path.splitext(os.path.basename(full_path))[0]
+
+
+def discover_modules(entry_ast, search_paths):
+    # Returns [(load_path, full_path, source)] in first-seen (dependency discovery) order
+    pending = [stmt.path.strip('"') for stmt in entry_ast.statements if isinstance(stmt, LoadStmt)]
+    seen = set()
+    modules = []
+    while pending:
+        path = pending.pop(0)
+        if path in seen or not path.endswith(".forge"):
+            continue
+        seen.add(path)
+        full_path = resolve_module(path, search_paths)
+        if full_path is None:
+            continue  # reported properly when the load itself is transpiled
+        with open(full_path, "r") as f:
+            source = f.read()
+        modules.append((path, full_path, source))
+        pending.extend(LOAD_PATTERN.findall(source))
+    return modules
+
+
+def parse_module(source):
+    # Errors are left for the real load to report, in program order
+    try:
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        return pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def parse_modules(entry_ast, search_paths, module_cache, jobs):
+    # Returns {full path: (cache key, cache entry)} for every reachable module,
+    # so a load reads its file and looks up the cache only here. A module
+    # missing from the cache gets a new entry holding its parsed AST; one that
+    # does not parse is left out for the load to report.
+    prefetched = {}
+    todo = {}  # cache key -> (source, [full paths])
+    for path, full_path, source in discover_modules(entry_ast, search_paths):
+        key = module_cache.key(module_name_for(full_path), source)
+        entry = module_cache.load(key) if key not in todo else None
+        if entry is not None:
+            prefetched[full_path] = (key, entry)
+        else:
+            todo.setdefault(key, (source, []))[1].append(full_path)
+    if not todo:
+        return prefetched
+
+    keys = sorted(todo)
+    size = sum(len(todo[key][0]) for key in keys)
+    workers = min(jobs, len(keys)) if size >= PARALLEL_PARSE_MIN_BYTES else 1
+    build_log.info("parsing %d modules (%d bytes) with %d workers", len(keys), size, workers)
+    if workers <= 1:
+        blobs = [parse_module(todo[key][0]) for key in keys]
+    else:
+        # Imported here: it is most of the import time of this module, and
+        # interpreter.py only needs resolve_module
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blobs = list(pool.map(parse_module, [todo[key][0] for key in keys]))
+    for key, blob in zip(keys, blobs):
+        if blob is not None:
+            entry = {"ast": blob, "registrations": {}}
+            for full_path in todo[key][1]:
+                prefetched[full_path] = (key, entry)
+    return prefetched
@@ -0,0 +1,177 @@
+import ctypes
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+import forge_trace
+from build_manifest import INCLUDES_DIR, digest_files
+from build_profiles import PROFILES, gcc_command
+from forge_parser import Parser
+from interpreter import ForgeError
+from lexer import Lexer
+from module_cache import default_cache_dir
+from transpile_to_c import CTranspiler
+
+build_log = forge_trace.channel("build")
+
+# === Native Libraries ===
+#
+# Compiles a Forge program into a shared library and loads it into the
+# calling process with ctypes, so Python code can call Forge functions
+# directly and a program can run without spawning ./output. Libraries are
+# cached under FORGE_CACHE_DIR/native by the hash of the generated C, the
+# runtime headers and the gcc command, next to a JSON file with the exported
+# signatures, so loading an unchanged program again is a transpile and a
+# dlopen with no gcc.
+#
+# Functions whose parameters and result are int, float or str are exported
+# (see CTranspiler.gen_Library). Arguments are converted on the way in and
+# the result on the way out; a raise() that nothing in the Forge code rescues
+# becomes a ForgeError. Forge functions are not reentrant (the runtime keeps
+# its arena and error context in globals), so calls into one library are
+# serialized. Strings a function returns are copied into Python, and the
+# library's arena is reset after every call, so nothing a call allocated
+# outlives it.
+
+NATIVE_CFLAGS = ["-w", "-shared", "-fPIC"]
+
+CTYPES = {
+    "int": ctypes.c_int,
+    "double": ctypes.c_double,
+    "char*": ctypes.c_char_p,
+}
+
+
+def to_native(c_type, value):
+    if c_type == "char*":
+        return value if isinstance(value, bytes) else str(value).encode("utf-8", "surrogateescape")
+    if c_type == "double":
+        return float(value)
+    return int(value)
+
+
+def from_native(c_type, value):
+    if c_type == "char*" and value is not None:
+        return value.decode("utf-8", "surrogateescape")
+    return value
+
+
+class NativeFunction:
+    def __init__(self, library, name, return_type, param_types):
+        self.library = library
+        self.name = name
+        self.return_type = return_type
+        self.param_types = param_types
+        self.result_type = CTYPES.get(return_type)
+        self.wrapper = getattr(library.dll, f"forge_export_{name}")
+        argtypes = [CTYPES[c_type] for c_type in param_types]
+        if self.result_type is not None:
+            argtypes.append(ctypes.POINTER(self.result_type))
+        self.wrapper.argtypes = argtypes
+        self.wrapper.restype = ctypes.c_int
+
+    def __call__(self, *args):
+        if len(args) != len(self.param_types):
+            raise TypeError(f"{self.name}() takes {len(self.param_types)} arguments, got {len(args)}")
+        native_args = [to_native(c_type, arg) for c_type, arg in zip(self.param_types, args)]
+        if self.result_type is None:
+            self.library.call(self.wrapper, native_args)
+            return None
+        result = self.result_type()
+        value = self.library.call(self.wrapper, native_args + [ctypes.byref(result)], result)
+        return from_native(self.return_type, value)
+
+    def __repr__(self):
+        return f"<native {self.return_type} {self.name}({', '.join(self.param_types)})>"
+
+
+class NativeLibrary:
+    def __init__(self, path, exports):
+        self.path = path
+        self.dll = ctypes.CDLL(path)
+        self.lock = threading.Lock()
+        self.dll.forge_export_error.restype = ctypes.c_char_p
+        self.dll.forge_export_reset.restype = None
+        self.dll.forge_export_main.argtypes = [ctypes.POINTER(ctypes.c_int)]
+        self.dll.forge_export_main.restype = ctypes.c_int
+        self.functions = {
+            name: NativeFunction(self, name, return_type, param_types)
+            for name, (return_type, param_types) in exports.items()
+        }
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["functions"][name]
+        except KeyError:
+            raise AttributeError(f"{os.path.basename(self.path)} exports no function '{name}'") from None
+
+    def call(self, wrapper, args, result=None):
+        # Returns result's value, read (and so copied) before the strings the
+        # call left in the arena are released. Output already written by
+        # Python goes first, the library's after it.
+        sys.stdout.flush()
+        with self.lock:
+            try:
+                if not wrapper(*args):
+                    message = self.dll.forge_export_error()
+                    raise ForgeError(message.decode("utf-8", "surrogateescape") if message else "error")
+                return None if result is None else result.value
+            finally:
+                self.dll.forge_export_reset()
+
+    def run(self):
+        # Runs the program's top-level statements, as ./output would
+        self.call(self.dll.forge_export_main, [ctypes.byref(ctypes.c_int())])
+
+
+def library_key(c_source, command):
+    h = hashlib.sha256()
+    h.update(repr(list(command)).encode())
+    h.update(repr(sorted(digest_files(os.path.join(INCLUDES_DIR, "*.h")).items())).encode())
+    h.update(c_source.encode())
+    return h.hexdigest()
+
+
+def build_library(source_path, profile="release", cache_dir=None, jobs=1):
+    # Returns (path of the .so, exports), compiling only if the cache has no copy
+    if PROFILES[profile]["pgo"]:
+        raise ValueError("the pgo profile needs a training run; pick another profile for a library")
+    with open(source_path) as f:
+        source = f.read()
+    transpiler = CTranspiler(jobs=jobs)
+    c_source, exports = transpiler.gen_Library(Parser(Lexer(source).iter_tokens()).parse())
+
+    library_dir = os.path.join(cache_dir or default_cache_dir(), "native")
+    cflags = NATIVE_CFLAGS + ["-I", INCLUDES_DIR]
+    key = library_key(c_source, gcc_command(profile, cflags, ["library.c"], "library.so"))
+    library_path = os.path.join(library_dir, key[:2], key + ".so")
+    exports_path = library_path[:-3] + ".json"
+    if os.path.exists(library_path) and os.path.exists(exports_path):
+        build_log.info("native: %s is up to date (%s)", source_path, key[:12])
+        with open(exports_path) as f:
+            return library_path, {name: tuple(sig) for name, sig in json.load(f).items()}
+
+    build_log.info("native: compiling %s", source_path)
+    os.makedirs(os.path.dirname(library_path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(library_path)) as workdir:
+        c_path = os.path.join(workdir, "library.c")
+        with open(c_path, "w") as f:
+            f.write(c_source)
+        tmp_library = os.path.join(workdir, "library.so")
+        subprocess.run(gcc_command(profile, cflags, [c_path], tmp_library), check=True)
+        tmp_exports = os.path.join(workdir, "exports.json")
+        with open(tmp_exports, "w") as f:
+            json.dump(exports, f, indent=2, sort_keys=True)
+        # The signatures go in first: a .so without its .json is rebuilt, never misread
+        os.replace(tmp_exports, exports_path)
+        os.replace(tmp_library, library_path)
+    return library_path, exports
+
+
+def load_library(source_path, profile="release", cache_dir=None, jobs=1):
+    library_path, exports = build_library(source_path, profile, cache_dir, jobs)
+    return NativeLibrary(library_path, exports)
@@ -1,6 +1,8 @@
 import sys
+import argparse
 from lexer import Lexer
 from forge_parser import (
+    ASTNode,
     Parser,
     Program,
     LetStatement,
@@ -12,7 +14,9 @@ from forge_parser import (
     BinaryExpr,
     Assignment,
     ForStatement,
+    ForInStatement,
     ListLiteral,
+    MapLiteral,
     SubscriptExpr,
     MemberAccess,
     PostfixExpr,
@@ -29,20 +33,116 @@ from forge_parser import (
     ExternExpr,
     PropertyAccess,
     AttemptRescueExpr,
-    AddressOf
+    AddressOf,
+    IfExpr,
+    WhileLoop,
 )
-from jinja2 import Environment, FileSystemLoader
 import os
+import pickle
 import subprocess
 import platform
+from module_cache import ModuleCache, environment_fingerprint
+from module_graph import module_name_for, parse_modules, resolve_module
+from build_manifest import INCLUDES_DIR, BuildManifest, file_digest
+from unit_build import UNIT_CFLAGS, build_units
+from build_profiles import DEFAULT_PROFILE, PROFILES, build_program, gcc_command
+import forge_trace
+from c_emit import block, lines
+from c_templates import templates
+
+types_log = forge_trace.channel("types")
+codegen_log = forge_trace.channel("codegen")
 
-env = Environment(loader=FileSystemLoader("templates"))
 def escape_c_string(s):
         return s.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# Built-in functions by Forge name -> CTranspiler handler(self, node)
+BUILTINS = {}
+
+def builtin(*names):
+    def register(handler):
+        for name in names:
+            BUILTINS[name] = handler
+        return handler
+    return register
+
+PROGRAM_INCLUDES = [
+    '#include <stdio.h>',
+    '#include <stdlib.h>',
+    '#include "list.h"',
+    '#include "map.h"',
+    '#include "arena.h"',
+    '#include "string_builder.h"',
+    '#include "output.h"',
+    '#include "exception.h"',
+    '#include "fileio.h"',
+    '#include "hash.h"',
+    '#include "array.h"',
+    '#include <stddef.h>',
+    '#include <time.h>',
+    '#include "runtime.h"',
+    "#include <sys/socket.h>",
+    "#include <arpa/inet.h>",
+    "#include <unistd.h>",
+    "#include <netinet/in.h>",
+]
+
+# Shared header of the separately compiled units (see gen_Units)
+UNIT_HEADER = "forge_program.h"
+
+# C types native.py can pass to and return from exported functions (see gen_Library)
+NATIVE_ARG_TYPES = {"int", "double", "char*"}
+NATIVE_RESULT_TYPES = NATIVE_ARG_TYPES | {"void"}
+
+# Typed lists: element type -> (C type, runtime function prefix). Forge code
+# sees them as "list:<element>"; lists of structs become "<Struct>List".
+TYPED_LISTS = {
+    "int": ("IntList", "int_list"),
+    "float": ("FloatList", "float_list"),
+    "pointer": ("PtrList", "ptr_list"),
+}
+
+# Bulk list methods shared by List, typed lists and StringList (see
+# CTranspiler.gen_list_bulk_method)
+LIST_BULK_METHODS = {"remove_at", "swap_remove", "extend", "reserve", "clear", "filter_in_place"}
+
+# List methods a typed list supports (see CTranspiler.infer_list_element)
+LIST_METHODS = {"add", "remove", "index", "free"} | LIST_BULK_METHODS
+
+# Built-ins that only read a string argument, so an arena string passed to
+# them does not need to outlive its scope (see CTranspiler.arena_eligible)
+ARENA_SAFE_BUILTINS = {"print", "printp", "len", "write", "addto", "number", "hash", "hash_file", "string"}
+
+# Hash maps (includes/map.h): Forge code sees them as "map:<key>:<value>".
+# Key and value kinds -> (C type part, runtime prefix part), e.g.
+# "map:string:int" -> StrIntMap / str_int_map.
+MAP_KEYS = {"int": ("Int", "int"), "string": ("Str", "str")}
+MAP_VALUES = {"int": ("Int", "int"), "float": ("Float", "float"), "string": ("Str", "str"),
+              "pointer": ("Ptr", "ptr")}
+
+def walk_scope(nodes):
+    # Pre-order walk over statements and expressions that stays out of nested
+    # function definitions, which have a scope of their own
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, ASTNode) or isinstance(node, FunctionDef):
+            continue
+        yield node
+        children = []
+        for cls in type(node).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                children.append(getattr(node, slot, None))
+        stack.extend(reversed(children))
+
 class CTranspiler:
-    def __init__(self):
+    def __init__(self, module_cache=None, jobs=1):
         self.includes = [] 
         self.loaded_modules = set()
+        self.module_files = {}  # load path -> resolved file, recorded for the build manifest
         self.body_lines = []
         self.function_types = {}  # fn_name -> "int", "string", etc.
         self.temp_counter = 0
@@ -55,8 +155,26 @@ class CTranspiler:
         self.types = {}  # maps variable/function names to types
         self.externs = {}  # { "socket": ["int", "int", "int", "int"], ... }
         self.module_search_paths = ["./", "./modules/", "./lib/"]
+        self.module_cache = module_cache or ModuleCache()
+        self.jobs = jobs
+        self.prefetched_modules = {}  # module full path -> (cache key, cache entry) from parse_modules
         self.scope_stack = [self.global_scope]
         self.functions = []
+        self.function_units = []
+        self.function_signatures = {}
+        self.current_module = None
+        self.struct_lists = []  # structs that need a <Struct>List definition
+        self.block_position = None  # (statements, index) of the statement being transpiled
+        self.arena_temps = set()  # C temps holding strings in the temporaries arena
+        self.arena_allocs = 0  # arena allocations emitted so far
+        self.arena_scopes = [set()]  # per function / loop body: names bound to arena strings
+        self.function_arena = None  # (mark variable, arena_allocs at entry) of the current function
+        self.string_builders = {}  # string variable -> StringBuilder temp backing it (see builder_eligible)
+        self.owned_strings = {}  # string variable -> heap slot it owns (see slot_eligible)
+        self.owned_slots = []  # slots declared by the current function, freed when it returns
+        self.open_readers = []  # ForgeLines of the current function's enclosing lines() loops, innermost last
+        self.borrowed = set()  # string parameters: the caller's strings, arena or not
+        self.in_bounds = set()  # (array, index variable) pairs a for loop keeps in range (see loop_bounds)
 
 
     def set_type(self, name, type_):
@@ -101,9 +219,9 @@ class CTranspiler:
     def get_type(self, name):
         for i, scope in enumerate(reversed(self.scope_stack)):
             if name in scope:
-                print(f"[DEBUG] get_type({name}) -> {scope[name]} [scope depth {-i}]")
+                types_log.debug("get_type(%s) -> %s [scope depth %d]", name, scope[name], -i)
                 return scope[name]
-        print(f"[DEBUG] get_type({name}) -> NOT FOUND in any scope")
+        types_log.debug("get_type(%s) -> NOT FOUND in any scope", name)
         return "unknown"
 
     def gen_BreakStatement(self, node):
@@ -136,7 +254,7 @@ class CTranspiler:
             init_code, init_type = self.gen_expr(node.init.expr)
             var_type = self.map_type(init_type)
             var_name = node.init.name
-            print(f"[DEBUG] Let: {node.init.name}, Inferred Type: {var_type}, Code: {init_code}")
+            types_log.debug("Let: %s, Inferred Type: %s, Code: %s", node.init.name, var_type, init_code)
 
             if not self.is_declared(var_name):
                 self.declare_var(var_name, init_type)
@@ -170,48 +288,121 @@ class CTranspiler:
         else:
             raise NotImplementedError("Only assignment-style or postfix increments supported")
 
-        # Body
-        body_code = self.transpile_block(node.body)
+        # Body: a[i] skips its bounds check when the loop header proves it in range
+        saved_in_bounds = self.in_bounds
+        bounds = self.loop_bounds(node)
+        if bounds:
+            self.in_bounds = saved_in_bounds | {bounds}
+        body_code, arena_mark = self.transpile_loop_body(node.body)
+        self.in_bounds = saved_in_bounds
 
         self.pop_scope()  # End loop scope
 
         # Render
-        tpl = env.get_template("for_statement.c.j2")
-        rendered = tpl.render(init=init, condition=condition_code, update=update, body=body_code)
+        rendered = templates.for_statement(init=init, condition=condition_code, update=update, body=body_code)
         self.body_lines.append(rendered)
+        if arena_mark:
+            self.body_lines.append(f"forge_arena_release({arena_mark});")
 
 
-    def transpile(self, node):
-        if isinstance(node, FunctionDef):
-            self.add_include('<stdio.h>')
-            self.add_include('<stdlib.h>')
-            self.add_include('<stddef.h>')
-            self.add_include('<time.h>')
-            # Custom Headers
-            self.add_include('"fileio.h"')
-            self.add_include('"array.h"')
-            self.add_include('"list.h"')
-            self.add_include('"hash.h"')
-            self.add_include('"runtime.h"')
-            # Socket programming headers 
-            self.add_include('<sys/socket.h>')
-            self.add_include('<netinet/in.h>')
-            self.add_include('<arpa/inet.h>')
-            self.add_include('<unistd.h>')  # for close()
-            
-        elif isinstance(node, BreakStatement):
-            return self.gen_BreakStatement(node)
+    def loop_bounds(self, node):
+        # (array, index) for `for let i = <n >= 0>; i < len(a); i++` (or
+        # `i = i + <n > 0>`) when the body neither rebinds i or a nor takes
+        # their address: every a[i] in the body is then within 0 <= i < a.length
+        init, cond, inc = node.init, node.condition, node.increment
+        if not (isinstance(init.expr, NumberLiteral) and not init.expr.is_float and init.expr.value >= 0):
+            return None
+        index = init.name
+        if not (isinstance(cond, BinaryExpr) and cond.op == "LT"
+                and isinstance(cond.left, Identifier) and cond.left.name == index
+                and isinstance(cond.right, CallExpr) and isinstance(cond.right.func, Identifier)
+                and cond.right.func.name == "len" and len(cond.right.args) == 1
+                and isinstance(cond.right.args[0], Identifier)):
+            return None
+        array = cond.right.args[0].name
+        if self.normalize_type(self.get_type(array)) not in ("array", "array_value"):
+            return None
 
-        method = getattr(self, f"gen_{type(node).__name__}", None)
-        if method:
-            return method(node)
-        raise NotImplementedError(f"No transpiler for {type(node).__name__}")
+        if isinstance(inc, PostfixExpr):
+            steps_up = inc.op == "INC" and isinstance(inc.operand, Identifier) and inc.operand.name == index
+        else:
+            step = inc.expr
+            steps_up = (self.assigned_name(inc) == index and isinstance(step, BinaryExpr) and step.op == "PLUS"
+                        and isinstance(step.left, Identifier) and step.left.name == index
+                        and isinstance(step.right, NumberLiteral) and not step.right.is_float
+                        and step.right.value > 0)
+        if not steps_up:
+            return None
+
+        for n in walk_scope(node.body.statements):
+            if isinstance(n, Assignment) and self.assigned_name(n) in (index, array):
+                return None
+            if isinstance(n, LetStatement) and n.name in (index, array):
+                return None
+            target = n.operand if isinstance(n, PostfixExpr) else n.expr if isinstance(n, AddressOf) else None
+            if isinstance(target, Identifier) and target.name in (index, array):
+                return None
+        return array, index
+
+    def gen_ForInStatement(self, node):
+        # for line in lines(path): streams the file one line at a time
+        iterable = node.iterable
+        if not (isinstance(iterable, CallExpr) and isinstance(iterable.func, Identifier)
+                and iterable.func.name == "lines"):
+            raise NotImplementedError("Only `for ... in lines(path)` is supported")
+        path_code, _ = self.gen_expr(iterable.args[0])
+        reader = self.new_temp("lines")
+        self.body_lines.append(f"ForgeLines* {reader} = forge_lines_open({path_code});")
+        self.body_lines.append(f"if ({reader}->file == NULL) {{")
+        self.body_lines.append('    raise("File read failed");')
+        self.body_lines.append("}")
+
+        self.push_scope()
+        self.set_type(node.name, "string")
+        # The line lives in the reader's buffer until the next one is read,
+        # so it is copied only if the body keeps it around (a return copies
+        # it out itself, see gen_ReturnStatement)
+        outer = self.block_position
+        self.block_position = (node.body.statements, -1)
+        keeps_line = not self.arena_eligible(node.name, allow_return=True)
+        self.block_position = outer
+        self.open_readers.append(reader)
+        body, arena_mark = self.transpile_loop_body(node.body)
+        self.open_readers.pop()
+        self.pop_scope()
+        if keeps_line:
+            body = lines([f"{node.name} = forge_persist({node.name});", body])
+
+        self.body_lines.append(templates.for_statement(
+            init=f"char* {node.name}",
+            condition=f"({node.name} = forge_lines_next({reader})) != NULL",
+            update="",
+            body=body,
+        ))
+        if arena_mark:
+            self.body_lines.append(f"forge_arena_release({arena_mark});")
+        self.body_lines.append(f"forge_lines_close({reader});")
+
+    def transpile(self, node):
+        handler = self.STATEMENT_HANDLERS.get(type(node))
+        if handler is None:
+            raise NotImplementedError(f"No transpiler for {type(node).__name__}")
+        return handler(self, node)
     
-    def gen_Program(self, node: Program):
+    def program_code(self, node: Program):
+        # The whole program as a c_emit.Code tree; gen_Program writes it out
+        # as a string, main() straight into output.c
         self.includes = set()
         self.scope_stack = [{}]  # Use clean new scope for tracking vars
         self.functions = []      # Hold generated functions
+        self.function_units = []  # (module or None for the program, prototype, code)
+        self.function_signatures = {}  # C name -> (C return type, [C parameter types])
+        self.current_module = None
         self.body_lines = []
+        if self.jobs > 1:
+            self.prefetched_modules = parse_modules(
+                node, self.module_search_paths, self.module_cache, self.jobs
+            )
         if "net.forge" in self.loaded_modules:
             self.includes.update([
                 "#include <sys/socket.h>",
@@ -234,8 +425,7 @@ class CTranspiler:
                 self.defined_structs.add(stmt.name)
 
         # Transpile all statements — populates global scope
-        for stmt in node.statements:
-            self.transpile(stmt)
+        self.transpile_statements(node.statements)
     
         # Collect struct definitions
         struct_decls = []
@@ -246,6 +436,9 @@ class CTranspiler:
                 struct_lines.append(f"    {c_type} {field_name};")
             struct_lines.append(f"}} {struct_name};\n")
             struct_decls.append("\n".join(struct_lines))
+        for struct_name in self.struct_lists:
+            list_type, prefix = self.list_runtime(f"list:{struct_name}")
+            struct_decls.append(f"FORGE_DEFINE_LIST({list_type}, {struct_name}, {prefix})\n")
     
         # Collect global declarations AFTER transpile
         global_decls = []
@@ -260,40 +453,110 @@ class CTranspiler:
                 global_decls.append(f"int {name};")
             elif typ == "string":
                 global_decls.append(f"char* {name};")
+            elif self.list_element_type(typ) or self.map_key_value(typ):
+                global_decls.append(f"{self.map_type(typ)} {name};")
             else:
                 global_decls.append(f"{typ} {name};")
     
         # Put declarations at the top of main
+        global_decls += [f"ForgeSlot {slot} = {{NULL, 0}};" for slot in self.owned_slots]
         self.body_lines = global_decls + self.body_lines
     
-        includes = [
-            '#include <stdio.h>',
-            '#include <stdlib.h>',
-            '#include "list.h"',
-            '#include "exception.h"',
-            '#include "fileio.h"',
-            '#include "hash.h"',
-            '#include "array.h"',
-            '#include <stddef.h>',
-            '#include <time.h>',
-            '#include "runtime.h"',
-            "#include <sys/socket.h>",
-            "#include <arpa/inet.h>",
-            "#include <unistd.h>",
-            "#include <netinet/in.h>",
-            
-        ]
-    
-        main_template = env.get_template("main.c.j2")
-        main_code = main_template.render(body="\n".join(self.body_lines))
+        main_code = templates.main(body=lines(["forge_output_init();"] + self.body_lines))
+        self.struct_decls = struct_decls
+        self.main_code = main_code
     
         # Combine everything
-        return "\n".join(includes + [""] + struct_decls + [""] + self.functions + [""] + [main_code])
+        return lines(PROGRAM_INCLUDES + [""] + struct_decls + [""] + self.functions + [""] + [main_code])
+
+    def gen_Program(self, node: Program):
+        return str(self.program_code(node))
+
+    def gen_Units(self, node: Program, header=UNIT_HEADER):
+        # Separate compilation: one C file per loaded module plus one for the
+        # program itself, all sharing a header of includes, struct typedefs
+        # and prototypes. Returns {file name: C source}.
+        self.program_code(node)
+
+        header_lines = ["#ifndef FORGE_PROGRAM_H", "#define FORGE_PROGRAM_H", ""]
+        header_lines += PROGRAM_INCLUDES + [""] + self.struct_decls + [""]
+        header_lines += [prototype for _, prototype, _ in self.function_units]
+        header_lines += ["", "#endif"]
+        units = {header: "\n".join(header_lines) + "\n"}
+
+        modules = {}
+        for module, _, code in self.function_units:
+            modules.setdefault(module, []).append(code)
+        for module, functions in modules.items():
+            if module is not None:
+                units[f"mod_{module}.c"] = str(lines([f'#include "{header}"', ""] + functions)) + "\n"
+
+        # The program unit owns the state the runtime headers share across units
+        units["main.c"] = str(lines(
+            [f'#include "{header}"', "", "ExceptionContext __context;", "ForgeArena forge_arena;",
+             "ForgeOpenFile forge_open_files[FORGE_OPEN_FILES];", "int forge_open_files_next;",
+             "ForgeLines forge_lines_stack[FORGE_LINES_MAX];", "int forge_lines_depth;", ""]
+            + modules.get(None, []) + [""] + [self.main_code]
+        ))
+        return units
+
+    def gen_Library(self, node: Program):
+        # The program as a shared library for native.py: its functions, its
+        # top-level code as forge_main(), and a forge_export_<name> wrapper for
+        # every function whose parameters and result are ints, floats or
+        # strings. A wrapper runs the call under its own setjmp, so a raise()
+        # nothing rescues returns 0 (with the message left in __context.error)
+        # instead of jumping into a frame that does not exist; on success it
+        # stores the result through its last parameter and returns 1. Once the
+        # caller has read the result, forge_export_reset() drops the strings
+        # the call left in the arena, so a library called in a loop stays the
+        # same size. Returns (C source, {function name: (C return type,
+        # [C parameter types])}).
+        self.program_code(node)
+        definitions = [templates.function_def(name="forge_main", return_type="int", params=[],
+                                              body=lines(self.body_lines + ["return 0;"]))]
+        definitions.append(templates.function_def(name="forge_export_error", return_type="const char*", params=[],
+                                                  body="return __context.error;"))
+        definitions.append(templates.function_def(name="forge_export_reset", return_type="void", params=[],
+                                                  body="forge_arena_release((ForgeArenaMark){NULL, 0});"))
+        definitions.append(self.export_wrapper("forge_export_main", "forge_main", "int", []))
+        exports = {}
+        for name, (return_type, param_types) in self.function_signatures.items():
+            if return_type in NATIVE_RESULT_TYPES and all(t in NATIVE_ARG_TYPES for t in param_types):
+                definitions.append(self.export_wrapper(f"forge_export_{name}", name, return_type, param_types))
+                exports[name] = (return_type, param_types)
+            else:
+                codegen_log.info("not exporting %s: no marshalling for its signature", name)
+        source = PROGRAM_INCLUDES + [""] + self.struct_decls + [""] + self.functions + [""] + definitions
+        return str(lines(source)) + "\n", exports
+
+    def export_wrapper(self, wrapper, name, return_type, param_types):
+        params = [f"{c_type} a{i}" for i, c_type in enumerate(param_types)]
+        call = f"{name}({', '.join(f'a{i}' for i in range(len(param_types)))})"
+        if return_type != "void":
+            params.append(f"{return_type}* result")
+            call = f"*result = {call}"
+        body = "\n".join([
+            "int lines_depth = forge_lines_depth;",
+            "if (setjmp(__context.env)) {",
+            "    forge_lines_close_to(lines_depth);",
+            "    fflush(stdout);",
+            "    return 0;",
+            "}",
+            f"{call};",
+            "fflush(stdout);",
+            "return 1;",
+        ])
+        return templates.function_def(name=wrapper, return_type="int", params=params, body=body)
 
     def gen_LetStatement(self, node):
         expr = node.expr
         if isinstance(expr, ExpressionStatement):
             expr = expr.expr
+        if isinstance(expr, ListLiteral) and not expr._forced_type_hint and node.name not in self.scope_stack[-1]:
+            expr._forced_type_hint = self.infer_list_element(node.name, expr.elements)
+        if isinstance(expr, MapLiteral) and not expr._forced_type_hint and node.name not in self.scope_stack[-1]:
+            expr._forced_type_hint = self.infer_map_type(node.name, expr.entries)
         if isinstance(node.expr, ListLiteral):
             type_hint = "list"
             inferred_type = "list"
@@ -318,6 +581,25 @@ class CTranspiler:
         else:
             raise Exception(f"gen_expr did not return (code, type) for: {type(expr).__name__}")
 
+        if node.name not in self.scope_stack[-1]:
+            self.string_builders.pop(node.name, None)
+            self.owned_strings.pop(node.name, None)
+            if inferred_type == "string" and self.builder_eligible(node.name):
+                builder = self.new_temp("sb")
+                self.body_lines.append(f"StringBuilder {builder} = string_builder_create();")
+                self.body_lines.append(f"string_builder_append(&{builder}, {value_code});")
+                self.string_builders[node.name] = builder
+                value_code = f"{builder}.data"
+            elif inferred_type == "string" and self.slot_eligible(node.name):
+                # The first value is only read in this scope; reassignments copy
+                self.own_string(node.name)
+
+        if (value_code in self.arena_temps or value_code in self.borrowed) and node.name not in self.owned_strings:
+            if self.arena_eligible(node.name, allow_return=True, allow_calls=True):
+                self.arena_scopes[-1].add(node.name)
+            else:
+                value_code = self.persist(value_code)
+
         var_type = self.map_type(inferred_type)
         if inferred_type in ("int",  "bool") and var_type == "string":
             tmp = self.new_temp()
@@ -328,7 +610,7 @@ class CTranspiler:
 
         if node.name not in self.scope_stack[-1]:
             self.set_type(node.name, inferred_type)
-            print(f"[DEBUG] Declared variable: {node.name}, Type: {inferred_type}")
+            types_log.debug("Declared variable: %s, Type: %s", node.name, inferred_type)
             # Decide correct C code based on actual Forge type or function return
             if inferred_type == "array_value":
                 self.body_lines.append(f"Array {node.name} = {value_code};")
@@ -343,19 +625,22 @@ class CTranspiler:
                     func_name = node.expr.func.name
                 elif hasattr(node.expr.func, "prop"):
                     func_name = f"{node.expr.func.object.name}_{node.expr.func.prop}"
-                    print(f"[DEBUG] CallExpr func resolved: {func_name}")
-                    print(f"[DEBUG] function_types[{func_name}] = {self.function_types.get(func_name)}")
-
-                ret_type_key = self.function_types.get(func_name)
+                    types_log.debug("CallExpr func resolved: %s", func_name)
+                    types_log.debug("function_types[%s] = %s", func_name, self.function_types.get(func_name))
+
+                receiver = getattr(node.expr.func, "obj", None)
+                if isinstance(receiver, Identifier) and self.map_key_value(self.get_type(receiver.name)):
+                    ret_type_key = inferred_type  # typed by gen_map_method
+                elif func_name in BUILTINS and func_name not in self.function_types:
+                    ret_type_key = inferred_type  # typed by the builtin's handler
+                else:
+                    ret_type_key = self.function_types.get(func_name)
                 if ret_type_key is None:
-                    print(f"[WARN] Missing return type for {func_name}, defaulting to inferred_type = {inferred_type}")
+                    types_log.warn("Missing return type for %s, defaulting to inferred_type = %s", func_name, inferred_type)
                     ret_type_key = inferred_type
 
                 ret_type = self.map_type(ret_type_key)
-                print(f"[DEBUG] Declaring {node.name} from {func_name} → {ret_type}")
-                print(f"[DEBUG] gen_LetStatement assigning from function: {func_name}")
-                print(f"[DEBUG] Raw return type from function_types: {ret_type_key}")
-                print(f"[DEBUG] C type after map_type: {ret_type}")
+                types_log.debug("Declaring %s from %s → %s (raw return type %s)", node.name, func_name, ret_type, ret_type_key)
 
                 self.body_lines.append(f"{ret_type} {node.name} = {value_code};")
 
@@ -388,27 +673,36 @@ class CTranspiler:
         if node.else_branch:
             else_body = self.transpile_block(node.else_branch)
 
-        tpl = env.get_template("if_statement.c.j2")
-        self.body_lines.append(tpl.render(condition=condition, then_body=then_body, elifs=elifs, else_body=else_body))
+        self.body_lines.append(templates.if_statement(condition=condition, then_body=then_body, elifs=elifs, else_body=else_body))
 
     def gen_WhileLoop(self, node):
         condition, _ = self.gen_expr(node.condition)
-        body = self.transpile_block(node.body)
-        tpl = env.get_template("while_statement.c.j2")
-        self.body_lines.append(tpl.render(condition=condition, body=body))
+        body, arena_mark = self.transpile_loop_body(node.body)
+        self.body_lines.append(templates.while_statement(condition=condition, body=body))
+        if arena_mark:
+            self.body_lines.append(f"forge_arena_release({arena_mark});")
 
     def gen_CallExpr(self, node):
        # --- Handle method-style and module function calls ---
-        print("Entering")
         if isinstance(node.func, MemberAccess):            
             obj_code, obj_type = self.gen_expr(node.func.obj)
             method_name = node.func.name
-            args = [self.gen_expr(arg)[0] for arg in node.args]
+            arg_values = [self.gen_expr(arg) for arg in node.args]
+            args = [code for code, _ in arg_values]
 
             if obj_type == "array_value":
                 if method_name == "free":
                     return f"array_free(&{obj_code})", "void"
 
+            elif obj_type == "StringBuilder":
+                return self.gen_builder_method(obj_code, method_name, arg_values)
+
+            elif obj_type == "File":
+                return self.gen_file_method(obj_code, method_name, arg_values)
+
+            elif obj_type == "Hasher":
+                return self.gen_hasher_method(obj_code, method_name, arg_values)
+
             # 🔧 Move list method logic to the top
             elif obj_type == "list":
                 if method_name == "add":
@@ -425,40 +719,52 @@ class CTranspiler:
                     return f"list_index(&{obj_code}, {args[0]})", "int"
                 elif method_name == "free":
                     return f"list_free(&{obj_code})", "void"
+                elif method_name in LIST_BULK_METHODS:
+                    return self.gen_list_bulk_method(obj_code, obj_type, method_name, node.args, arg_values)
                 
+            elif self.list_element_type(obj_type):
+                list_type, prefix = self.list_runtime(obj_type)
+                if method_name == "add":
+                    return f"{prefix}_add(&{obj_code}, {args[0]})", "void"
+                elif method_name in ("remove", "index"):
+                    if self.list_element_type(obj_type) not in TYPED_LISTS:
+                        raise Exception(f"{list_type} does not support '{method_name}'")
+                    result_type = "int" if method_name == "index" else "void"
+                    return f"{prefix}_{method_name}(&{obj_code}, {args[0]})", result_type
+                elif method_name == "free":
+                    return f"{prefix}_free(&{obj_code})", "void"
+                elif method_name in LIST_BULK_METHODS:
+                    return self.gen_list_bulk_method(obj_code, obj_type, method_name, node.args, arg_values)
+
+            elif self.map_key_value(obj_type):
+                return self.gen_map_method(obj_code, obj_type, method_name, args)
+
             elif obj_type == "StringList":
                 if method_name == "add":
                     return f"string_list_add(&{obj_code}, {args[0]})", "void"
                 elif method_name == "remove":
-                    # StringList remove is not defined in your runtime yet! Optional.
-                    raise Exception("StringList does not support 'remove' yet")
+                    return f"string_list_remove(&{obj_code}, {args[0]})", "void"
                 elif method_name == "index":
-                    # StringList index not defined either. Optional.
-                    raise Exception("StringList does not support 'index' yet")
+                    return f"string_list_index(&{obj_code}, {args[0]})", "int"
                 elif method_name == "free":
                     return f"string_list_free(&{obj_code})", "void"
+                elif method_name in LIST_BULK_METHODS:
+                    return self.gen_list_bulk_method(obj_code, obj_type, method_name, node.args, arg_values)
 
             # Module-style function calls (math.sum -> math_sum)
             if isinstance(node.func.obj, Identifier):
                 module_name = node.func.obj.name
                 full_name = f"{module_name}_{method_name}"
                 if full_name in self.defined_functions:
-                    return f"{full_name}({', '.join(args)})", self.function_types.get(full_name, "int")
+                    return self.call_result(f"{full_name}({', '.join(args)})", self.function_types.get(full_name, "int"))
 
                 else:    
-                    print(f"[WARN] Function '{full_name}' not found in defined_functions")
+                    codegen_log.warn("Function '%s' not found in defined_functions", full_name)
                     return f"{full_name}({', '.join(args)})", "unknown"
 
             # Other unsupported member access
             raise Exception(f"Unsupported call on object of type: {obj_type}")
 
-        if isinstance(node.func, Identifier) and node.func.name == "hash":
-            arg_expr, arg_type = self.gen_expr(node.args[0])
-            tmp = self.new_temp()
-            self.body_lines.append(f"char {tmp}[65];")
-            self.body_lines.append(f"hash_string({arg_expr}, {tmp});")
-            return tmp, "string"
-
         if isinstance(node.func, PropertyAccess):
             obj_code, obj_type = self.gen_expr(node.func.object)
             method_name = node.func.prop
@@ -476,30 +782,15 @@ class CTranspiler:
         # Handle identifier-style calls (print, input, struct, user fn)
         if isinstance(node.func, Identifier):
             name = node.func.name
-            # if name in self.struct_defs:
-            # # --- Handle struct literal construction ---
-            #     fields = []
-            #     for arg in node.args:
-            #         expr_code, _ = self.gen_expr(arg)
-            #         fields.append(expr_code)
-            #     return f"{{ {', '.join(fields)} }}", name
-            # Special return types for certain built-ins
-            if name == "token_list_create":
-                return "token_list_create()", "TokenList"
-            if name == "token_list_add":
-                args = [self.gen_expr(arg)[0] for arg in node.args]
-                return f"token_list_add(&{args[0]}, {args[1]})", "int"
-            if name == "token_list_free":
-                args = [self.gen_expr(arg)[0] for arg in node.args]
-                return f"token_list_free(&{args[0]})", "void"
-            if name == "token_list_get":
-                args = [self.gen_expr(arg)[0] for arg in node.args]
-                return f"token_list_get(&{args[0]}, {args[1]})", "Token"
+            # Built-ins resolve in one lookup unless an extern or struct claims the name
+            handler = BUILTINS.get(name)
+            if handler is not None and name not in self.externs and name not in self.struct_defs:
+                return handler(self, node)
             if name not in self.defined_functions:
                 # try qualified match fallback
                 for fn in self.defined_functions:
                     if fn.endswith(f"_{name}"):
-                        print(f"[INFO] Resolved '{name}' → '{fn}'")
+                        codegen_log.info("Resolved '%s' → '%s'", name, fn)
                         name = fn
                         break
                 # Handle extern function calls with special argument casting
@@ -514,14 +805,14 @@ class CTranspiler:
                    
                     arg_codes.append(arg_code)
                 ret_type_key = self.function_types.get(name, "int")
-                print(f"[DEBUG] Extern call to {name}, return type = {ret_type_key}")
+                codegen_log.debug("Extern call to %s, return type = %s", name, ret_type_key)
                 return f"{name}({', '.join(arg_codes)})", ret_type_key
 
             # --- Struct instantiation ---
             if name in self.struct_defs:
                 struct_def = self.struct_defs[name]
                 tmp = self.new_temp()
-                arg_exprs = [self.gen_expr(arg)[0] for arg in node.args]
+                arg_exprs = [self.persist(self.gen_expr(arg)[0]) for arg in node.args]
 
                 if len(arg_exprs) != len(struct_def.fields):
                     raise Exception(f"Struct {name} expects {len(struct_def.fields)} fields, got {len(arg_exprs)}")
@@ -530,220 +821,15 @@ class CTranspiler:
                     f"{tmp}.{field_name} = {val};"
                     for (field_name, _), val in zip(struct_def.fields, arg_exprs)
                 ]
-                self.body_lines.append(f"{name} {tmp};\n" + "\n".join(assigns))
+                self.body_lines.append(lines([f"{name} {tmp};"] + assigns))
                 return tmp, name
            
-            if name == "string":
-                if not node.args:
-                    raise Exception("string() requires 1 argument")
-
-                value_code, value_type = self.gen_expr(node.args[0])
-                tmp = self.new_temp()
-                self.body_lines.append(f"char {tmp}[128];")
-
-                format_spec = "%s"
-                if value_type in ("int", "number", "bool"):
-                    format_spec = "%d"
-                elif value_type == "float":
-                    format_spec = "%f"
-
-                self.body_lines.append(f'snprintf({tmp}, sizeof({tmp}), "{format_spec}", {value_code});')
-                return tmp, "string"
-
-            # --- Built-in: len(...) ---
-            if name == "len":
-                arg_expr, arg_type = self.gen_expr(node.args[0])
-                print(f"[DEBUG] len() called with arg_expr = {arg_expr}, arg_type = {arg_type}")
-                if self.normalize_type(arg_type) == "list":
-                    return f"{arg_expr}.size", "int"
-                elif self.normalize_type(arg_type) == "array":
-                    return f"sizeof({arg_expr}) / sizeof({arg_expr}[0])", "int"
-                elif self.normalize_type(arg_type) == "string":
-                    return f"strlen({arg_expr})", "int"
-                elif self.normalize_type(arg_type) == "int":
-                    # Define behavior for integers
-                    return "1", "int"  # Treat an integer as a single element
-                else:
-                    raise Exception("len() only supported for lists, arrays, and strings")
-
-            # --- Built-in: number(...) ---
-            if name == "number":
-                value_code, value_type = self.gen_expr(node.args[0])
-                if value_type in ("int", "bool"):
-                    return value_code, "int"
-
-                tmp = self.new_temp()
-                end = self.new_temp()  
-
-                check_code = f"""
-                char* {end};
-                int {tmp} = strtol({value_code}, &{end}, 10);
-                if (*{end} != '\\0') {{
-                    raise("Cannot convert to number");
-                }}
-                """.strip()
-
-                self.body_lines.extend(check_code.splitlines())
-                return tmp, "int"
-            if name == "float":
-                value_code, _ = self.gen_expr(node.args[0])
-                return f"((float){value_code})", "float"
-            
-            if name == "int":
-                value_code, _ = self.gen_expr(node.args[0])
-                return f"((int){value_code})", "int"
-
-            # --- Built-in: input(...) ---
-            if name == "input":
-                tmp = self.new_temp()
-                buf = f"{tmp}_buf"
-
-                if node.args:
-                    prompt_code, _ = self.gen_expr(node.args[0])
-                    self.body_lines.extend([
-                        f"char {buf}[1024];",
-                        f'printf("%s", {prompt_code});',
-                        f"fgets({buf}, sizeof({buf}), stdin);",
-                        f"{buf}[strcspn({buf}, \"\\n\")] = 0;"
-                    ])
-                else:
-                    self.body_lines.extend([
-                        f"char {buf}[1024];",
-                        f"fgets({buf}, sizeof({buf}), stdin);",
-                        f"{buf}[strcspn({buf}, \"\\n\")] = 0;"
-                    ])
-
-                # NEW — depending on context type hint
-                expected_type = getattr(node, "_expected_type", None)
-
-                if expected_type == "float":
-                    return f"atof({buf})", "float"
-                elif expected_type == "int":
-                    return f"atoi({buf})", "int"
-                else:
-                    return f"strdup({buf})", "string"
-
-
-            # --- Built-in: print(...) ---
-            if name == "print":
-                print(node.args)
-                args = [self.gen_expr(arg) for arg in node.args]
-                if any(not isinstance(a, tuple) or len(a) != 2 for a in args):
-                    raise Exception(f"[ERROR] Malformed function args: {args}")
-
-                fmt_parts = []
-                arg_exprs = []
-
-                for code, arg_type in args:
-                    print("[DEBUG] print arg type:",args, arg_type)                    
-                    if arg_type == "list":
-                        tmp_buf = self.new_temp()
-                        if not code.isidentifier():
-                            tmp_list = self.new_temp()
-                            self.body_lines.append(f"List {tmp_list} = {code};")
-                            code = tmp_list
-                        self.body_lines.append(f"char {tmp_buf}[256];")
-                        self.body_lines.append(f"list_to_string(&{code}, {tmp_buf}, sizeof({tmp_buf}));")
-                        code = tmp_buf
-                        fmt_parts.append("%s")
-
-                    elif arg_type == "string":
-                        fmt_parts.append("%s")
-                    elif arg_type == "int":
-                        fmt_parts.append("%d")
-                    elif arg_type == "bool":
-                        fmt_parts.append("%s")
-                        code = f"({code} ? \"true\" : \"false\")"
-                    elif arg_type == "float":
-                        fmt_parts.append("%f")
-                    # elif arg_type == "list":
-                    #     self.body_lines.append(f"list_to_string({code});")
-                    else:
-                        fmt_parts.append("%s")
-                    arg_exprs.append(code)
-
-                fmt_str = " ".join(fmt_parts) + "\\n"
-                self.body_lines.append(f'printf("{fmt_str}", {", ".join(arg_exprs)});')
-                return "", "void"
-
-            # --- Built-in: write(...) / addto(...) ---
-            if name in ("write", "addto"):
-                filename_arg = self.gen_expr(node.args[0])[0]
-                content_arg = self.gen_expr(node.args[1])[0]
-                spacing_arg = self.gen_expr(node.args[2])[0]
-                mode = '"w"' if name == "write" else '"a"'
-
-                tpl = env.get_template("write_file.c.j2")
-                rendered = tpl.render(
-                    filename=filename_arg,
-                    content=content_arg,
-                    mode=mode,
-                    spacing=spacing_arg,
-                )
-                self.body_lines.append(rendered)
-                return "0", "int"
-            if name == "printp":
-                if len(node.args) < 2:
-                    prec_code = 6
-                else: 
-                    prec_code, _ = self.gen_expr(node.args[1])
-                val_code, val_type = self.gen_expr(node.args[0])
-                fmt_buf = self.new_temp()
-                self.body_lines.append(f"char {fmt_buf}[10];")
-                self.body_lines.append(f'snprintf({fmt_buf}, sizeof({fmt_buf}), "%%.%df\\n", {prec_code});')
-                self.body_lines.append(f'printf({fmt_buf}, {val_code});')
-                return "", "void"
-
-            if name == "rf" or name == "random_float":
-                if len(node.args) == 2:
-                    low_code, _ = self.gen_expr(node.args[0])
-                    high_code, _ = self.gen_expr(node.args[1])
-                    tmp = self.new_temp()
-                    self.body_lines.append(
-                        f"double {tmp} = ((double)rand() / RAND_MAX) * ({high_code} - {low_code}) + {low_code};"
-                    )
-                    return tmp, "float"
-                elif len(node.args) == 0:
-                    tmp = self.new_temp()
-                    self.body_lines.append(
-                        f"double {tmp} = (double)rand() / RAND_MAX;"
-                    )
-                    return tmp, "float"
-                else:
-                    raise Exception(f"rf() expects 0 or 2 arguments, got {len(node.args)}")
-            if name == "int":
-                value_code, value_type = self.gen_expr(node.args[0])
-                if value_type == "float":
-                    return f"(int)({value_code})", "int"
-                return value_code, "int"
-
-
-            if name == "ri" or name == "random_int":
-                if len(node.args) != 2:
-                    raise Exception(f"{name} requires 2 arguments")
-                low_code, _ = self.gen_expr(node.args[0])
-                high_code, _ = self.gen_expr(node.args[1])
-                tmp = self.new_temp()
-                self.body_lines.append(f"int {tmp} = rand() % ({high_code} - {low_code} + 1) + {low_code};")
-                return tmp, "int"
-
-
-
-            # --- Built-in: read(...) ---
-            if name == "read":
-                filename_code, _ = self.gen_expr(node.args[0])
-                tmp = self.new_temp()
-                tpl = env.get_template("read_file.c.j2")
-                rendered = tpl.render(tmp=tmp, filename=filename_code)
-                self.body_lines.append(rendered)
-                return tmp, "string"
-
             # --- User-defined function ---
             func_name = self.sanitize_name(name)
             args = [self.gen_expr(arg) for arg in node.args]
             if func_name in self.function_types:
                 return_type = self.function_types[func_name]
-                return f"{func_name}({', '.join(arg_code for arg_code, _ in args)})", return_type
+                return self.call_result(f"{func_name}({', '.join(arg_code for arg_code, _ in args)})", return_type)
            
             if name in self.defined_functions:
                 arg_codes = [arg_code for arg_code, _ in args]
@@ -753,27 +839,378 @@ class CTranspiler:
 
             # Check for unqualified calls and try to match them to qualified ones
             if name not in self.defined_functions:
-                print(f"[WARN] {name} not in {self.defined_functions}")
+                codegen_log.warn("%s not in %s", name, self.defined_functions)
 
                 # Attempt to resolve fully-qualified function name
                 matches = [fn for fn in self.defined_functions if fn.endswith(f"_{name}")]
                 if matches:
                     name = matches[0]  # Use the qualified match
-                    print(f"[INFO] Resolved call '{name}' via suffix match.")
+                    codegen_log.info("Resolved call '%s' via suffix match.", name)
                 else:
                     raise Exception(f"Unknown function: {name}")
 
-            print(f"[DEBUG] Attempting to call: {name}")
-            print(f"[DEBUG] Known functions: {self.defined_functions}")
+            codegen_log.debug("Attempting to call: %s", name)
+            codegen_log.debug("Known functions: %s", self.defined_functions)
 
             # Fallback if function has no return (void)
             return f"{name}({', '.join(arg_code for arg_code, _ in args)})", "void"
 
 # Final fallback — this runs *only* if node.func wasn't an Identifier
-        print(f"[ERROR] Unknown call expression structure: {type(node.func).__name__} - {repr(node.func)}")
+        codegen_log.error("Unknown call expression structure: %s - %r", type(node.func).__name__, node.func)
         raise Exception("Unsupported call expression structure or missing name.")
 
 
+    @builtin("hash")
+    def builtin_hash(self, node):
+        arg_expr, arg_type = self.gen_expr(node.args[0])
+        tmp = self.arena_string("forge_arena_alloc(65)")
+        self.body_lines.append(f"hash_string({arg_expr}, {tmp});")
+        return tmp, "string"
+
+    @builtin("hash_file")
+    def builtin_hash_file(self, node):
+        path_code, _ = self.gen_expr(node.args[0])
+        tmp = self.arena_string("forge_arena_alloc(65)")
+        self.body_lines.append(f"if (!hash_file({path_code}, {tmp})) {{")
+        self.body_lines.append('    raise("File read failed");')
+        self.body_lines.append("}")
+        return tmp, "string"
+
+    @builtin("Hasher")
+    def builtin_hasher(self, node):
+        return "sha256_create()", "Hasher"
+
+    def gen_hasher_method(self, obj_code, method_name, arg_values):
+        # Incremental SHA-256: update() any number of times, final() for the hex digest
+        if method_name == "update":
+            code, typ = arg_values[0]
+            return f"sha256_update_str(&{obj_code}, {self.concat_operand(code, typ)})", "void"
+        if method_name == "final":
+            tmp = self.arena_string("forge_arena_alloc(65)")
+            self.body_lines.append(f"sha256_final_hex(&{obj_code}, {tmp});")
+            return tmp, "string"
+        raise Exception(f"Hasher does not support '{method_name}'")
+
+    @builtin("token_list_create")
+    def builtin_token_list_create(self, node):
+        return "token_list_create()", "TokenList"
+
+    @builtin("token_list_add")
+    def builtin_token_list_add(self, node):
+        args = [self.gen_expr(arg)[0] for arg in node.args]
+        return f"token_list_add(&{args[0]}, {args[1]})", "int"
+
+    @builtin("token_list_free")
+    def builtin_token_list_free(self, node):
+        args = [self.gen_expr(arg)[0] for arg in node.args]
+        return f"token_list_free(&{args[0]})", "void"
+
+    @builtin("token_list_get")
+    def builtin_token_list_get(self, node):
+        args = [self.gen_expr(arg)[0] for arg in node.args]
+        return f"token_list_get(&{args[0]}, {args[1]})", "Token"
+
+    @builtin("StringBuilder")
+    def builtin_string_builder(self, node):
+        return "string_builder_create()", "StringBuilder"
+
+    @builtin("string")
+    def builtin_string(self, node):
+        if not node.args:
+            raise Exception("string() requires 1 argument")
+
+        value_code, value_type = self.gen_expr(node.args[0])
+        tmp = self.new_temp()
+        self.body_lines.append(f"char {tmp}[128];")
+
+        format_spec = "%s"
+        if value_type in ("int", "number", "bool"):
+            format_spec = "%d"
+        elif value_type == "float":
+            format_spec = "%f"
+
+        self.body_lines.append(f'snprintf({tmp}, sizeof({tmp}), "{format_spec}", {value_code});')
+        return tmp, "string"
+
+    # --- Built-in: len(...) ---
+    @builtin("len")
+    def builtin_len(self, node):
+        arg = node.args[0]
+        if isinstance(arg, Identifier) and arg.name in self.string_builders:
+            return f"{self.string_builders[arg.name]}.length", "int"
+        arg_expr, arg_type = self.gen_expr(arg)
+        codegen_log.debug("len() called with arg_expr = %s, arg_type = %s", arg_expr, arg_type)
+        if self.normalize_type(arg_type) == "list":
+            return f"{arg_expr}.size", "int"
+        elif self.list_element_type(arg_type) or arg_type == "StringList":
+            return f"{arg_expr}.size", "int"
+        elif self.map_key_value(arg_type):
+            return f"{arg_expr}.size", "int"
+        elif arg_type == "StringBuilder":
+            return f"{arg_expr}.length", "int"
+        elif arg_type == "array_value":
+            return f"(int){arg_expr}.length", "int"
+        elif self.normalize_type(arg_type) == "array":
+            return f"(int){arg_expr}->length", "int"
+        elif self.normalize_type(arg_type) == "string":
+            return f"strlen({arg_expr})", "int"
+        elif self.normalize_type(arg_type) == "int":
+            # Define behavior for integers
+            return "1", "int"  # Treat an integer as a single element
+        else:
+            raise Exception("len() only supported for lists, maps, arrays, and strings")
+
+    # --- Built-in: number(...) ---
+    @builtin("number")
+    def builtin_number(self, node):
+        value_code, value_type = self.gen_expr(node.args[0])
+        if value_type in ("int", "bool"):
+            return value_code, "int"
+
+        tmp = self.new_temp()
+        end = self.new_temp()  
+
+        self.body_lines.extend([
+            f"char* {end};",
+            f"int {tmp} = strtol({value_code}, &{end}, 10);",
+            f"if (*{end} != '\\0') {{",
+            '    raise("Cannot convert to number");',
+            "}",
+        ])
+        return tmp, "int"
+
+    @builtin("float")
+    def builtin_float(self, node):
+        value_code, _ = self.gen_expr(node.args[0])
+        return f"((float){value_code})", "float"
+
+    @builtin("int")
+    def builtin_int(self, node):
+        value_code, _ = self.gen_expr(node.args[0])
+        return f"((int){value_code})", "int"
+
+    # --- Built-in: input(...) ---
+    @builtin("input")
+    def builtin_input(self, node):
+        tmp = self.new_temp()
+        buf = f"{tmp}_buf"
+
+        if node.args:
+            prompt_code, _ = self.gen_expr(node.args[0])
+            self.body_lines.extend([
+                f"char {buf}[1024];",
+                f'printf("%s", {prompt_code});',
+                "fflush(stdout);",
+                f"if (!fgets({buf}, sizeof({buf}), stdin)) {buf}[0] = 0;",
+                f"{buf}[strcspn({buf}, \"\\n\")] = 0;"
+            ])
+        else:
+            self.body_lines.extend([
+                f"char {buf}[1024];",
+                f"if (!fgets({buf}, sizeof({buf}), stdin)) {buf}[0] = 0;",
+                f"{buf}[strcspn({buf}, \"\\n\")] = 0;"
+            ])
+
+        # NEW — depending on context type hint
+        expected_type = getattr(node, "_expected_type", None)
+
+        if expected_type == "float":
+            return f"atof({buf})", "float"
+        elif expected_type == "int":
+            return f"atoi({buf})", "int"
+        else:
+            return self.arena_string(f"forge_arena_strdup({buf})"), "string"
+
+    # --- Built-in: print(...) ---
+    @builtin("print")
+    def builtin_print(self, node):
+        args = [self.gen_expr(arg) for arg in node.args]
+        if any(not isinstance(a, tuple) or len(a) != 2 for a in args):
+            raise Exception(f"[ERROR] Malformed function args: {args}")
+
+        # Each value is written on its own; literal text, separators and the
+        # newline between them are merged into one fixed-size write
+        calls = []
+        literal = ""
+
+        for index, (arg_node, (code, arg_type)) in enumerate(zip(node.args, args)):
+            if index > 0:
+                literal += " "
+            if isinstance(arg_node, StringLiteral):
+                literal += code[1:-1]
+                continue
+            if literal:
+                calls.append(f'forge_print_literal("{literal}");')
+                literal = ""
+            codegen_log.debug("print arg type: %s %s", code, arg_type)
+            if arg_type == "list":
+                tmp_buf = self.new_temp()
+                if not code.isidentifier():
+                    tmp_list = self.new_temp()
+                    self.body_lines.append(f"List {tmp_list} = {code};")
+                    code = tmp_list
+                self.body_lines.append(f"char {tmp_buf}[256];")
+                self.body_lines.append(f"list_to_string(&{code}, {tmp_buf}, sizeof({tmp_buf}));")
+                code = tmp_buf
+                writer = "forge_print_str"
+
+            elif self.list_element_type(arg_type) or arg_type == "StringList":
+                list_type, prefix = self.list_runtime(arg_type)
+                if arg_type != "StringList" and self.list_element_type(arg_type) not in TYPED_LISTS:
+                    raise Exception(f"Cannot print a {list_type}")
+                tmp_buf = self.new_temp()
+                if not code.isidentifier():
+                    tmp_list = self.new_temp()
+                    self.body_lines.append(f"{list_type} {tmp_list} = {code};")
+                    code = tmp_list
+                self.body_lines.append(f"char {tmp_buf}[256];")
+                self.body_lines.append(f"{prefix}_to_string(&{code}, {tmp_buf}, sizeof({tmp_buf}));")
+                code = tmp_buf
+                writer = "forge_print_str"
+
+            elif self.map_key_value(arg_type):
+                map_type, prefix = self.map_runtime(arg_type)
+                tmp_buf = self.new_temp()
+                if not code.isidentifier():
+                    tmp_map = self.new_temp()
+                    self.body_lines.append(f"{map_type} {tmp_map} = {code};")
+                    code = tmp_map
+                self.body_lines.append(f"char {tmp_buf}[256];")
+                self.body_lines.append(f"{prefix}_to_string(&{code}, {tmp_buf}, sizeof({tmp_buf}));")
+                code = tmp_buf
+                writer = "forge_print_str"
+
+            elif arg_type in ("string", "str"):
+                writer = "forge_print_str"
+            elif arg_type == "StringBuilder":
+                writer = "forge_print_str"
+                code = f"{code}.data"
+            elif arg_type in ("int", "number"):
+                writer = "forge_print_int"
+            elif arg_type == "bool":
+                writer = "forge_print_str"
+                code = f"({code} ? \"true\" : \"false\")"
+            elif arg_type == "float":
+                calls.append(f"forge_print_float({code}, 6);")
+                continue
+            elif arg_type in self.struct_defs:
+                raise Exception(f"Cannot print a {arg_type}")
+            else:
+                # Untyped (an unresolved call, a rescued error): the C
+                # compiler picks the writer from the value's C type
+                writer = "forge_print_value"
+            calls.append(f"{writer}({code});")
+
+        calls.append(f'forge_print_literal("{literal}\\n");')
+        self.body_lines.append(" ".join(calls))
+        return "", "void"
+
+    # --- Built-in: write(...) / addto(...) ---
+    @builtin("write", "addto")
+    def builtin_write(self, node):
+        filename_arg = self.gen_expr(node.args[0])[0]
+        content_arg = self.gen_expr(node.args[1])[0]
+        spacing_arg = self.gen_expr(node.args[2])[0]
+        mode = '"w"' if node.func.name == "write" else '"a"'
+
+        rendered = templates.write_file(
+            filename=filename_arg,
+            content=content_arg,
+            mode=mode,
+            spacing=spacing_arg,
+        )
+        self.body_lines.append(rendered)
+        return "0", "int"
+
+    @builtin("printp")
+    def builtin_printp(self, node):
+        if len(node.args) < 2:
+            prec_code = 6
+        else: 
+            prec_code, _ = self.gen_expr(node.args[1])
+        val_code, val_type = self.gen_expr(node.args[0])
+        if str(prec_code).isdigit():
+            # Precision known at compile time: it goes straight into the format
+            self.body_lines.append(f'printf("%.{prec_code}f\\n", (double)({val_code}));')
+        else:
+            self.body_lines.append(f'printf("%.*f\\n", (int)({prec_code}), (double)({val_code}));')
+        return "", "void"
+
+    @builtin("rf", "random_float")
+    def builtin_rf(self, node):
+        if len(node.args) == 2:
+            low_code, _ = self.gen_expr(node.args[0])
+            high_code, _ = self.gen_expr(node.args[1])
+            tmp = self.new_temp()
+            self.body_lines.append(
+                f"double {tmp} = ((double)rand() / RAND_MAX) * ({high_code} - {low_code}) + {low_code};"
+            )
+            return tmp, "float"
+        elif len(node.args) == 0:
+            tmp = self.new_temp()
+            self.body_lines.append(
+                f"double {tmp} = (double)rand() / RAND_MAX;"
+            )
+            return tmp, "float"
+        else:
+            raise Exception(f"rf() expects 0 or 2 arguments, got {len(node.args)}")
+
+    @builtin("ri", "random_int")
+    def builtin_ri(self, node):
+        if len(node.args) != 2:
+            raise Exception(f"{node.func.name} requires 2 arguments")
+        low_code, _ = self.gen_expr(node.args[0])
+        high_code, _ = self.gen_expr(node.args[1])
+        tmp = self.new_temp()
+        self.body_lines.append(f"int {tmp} = rand() % ({high_code} - {low_code} + 1) + {low_code};")
+        return tmp, "int"
+
+    # --- Built-in: read(...) ---
+    @builtin("read", "read_mapped")
+    def builtin_read(self, node):
+        filename_code, _ = self.gen_expr(node.args[0])
+        tmp = self.new_temp()
+        reader = "read_mapped" if node.func.name == "read_mapped" else "read_file"
+        rendered = templates.read_file(tmp=tmp, reader=reader, filename=filename_code)
+        self.body_lines.append(rendered)
+        return tmp, "string"
+
+    @builtin("unmap")
+    def builtin_unmap(self, node):
+        text_code, _ = self.gen_expr(node.args[0])
+        return f"unmap_file({text_code})", "void"
+
+    @builtin("lines")
+    def builtin_lines(self, node):
+        raise Exception("lines() can only be iterated: for line in lines(path) { ... }")
+
+    @builtin("open")
+    def builtin_open(self, node):
+        if len(node.args) != 2:
+            raise Exception("open() takes a path and a mode, e.g. open(path, \"a\")")
+        path_code, _ = self.gen_expr(node.args[0])
+        mode_code, _ = self.gen_expr(node.args[1])
+        tmp = self.new_temp("file")
+        self.body_lines.append(f"FILE* {tmp} = fopen({path_code}, {mode_code});")
+        self.body_lines.append(f"if ({tmp} == NULL) {{")
+        self.body_lines.append('    raise("File open failed");')
+        self.body_lines.append("}")
+        return tmp, "File"
+
+    def gen_file_method(self, obj_code, method_name, arg_values):
+        # Methods of a handle from open(); writes go through its stdio buffer
+        if method_name == "write":
+            code, typ = arg_values[0]
+            if typ in ("string", "char*"):
+                return f"fputs({code}, {obj_code})", "void"
+            fmt = "%f" if typ == "float" else "%d"
+            return f'fprintf({obj_code}, "{fmt}", {code})', "void"
+        if method_name == "flush":
+            return f"fflush({obj_code})", "void"
+        if method_name == "close":
+            return f"fclose({obj_code})", "void"
+        raise Exception(f"File does not support '{method_name}'")
+
     def get_expr_type(self, expr):
 
         if isinstance(expr, Identifier):
@@ -791,6 +1228,12 @@ class CTranspiler:
             container_type = self.get_expr_type(expr.target)
             if container_type == "list":
                 return "int"  # or "string" if you tracked list types
+            if self.list_element_type(container_type):
+                return self.list_element_type(container_type)
+            if container_type == "StringList":
+                return "string"
+            if self.map_key_value(container_type):
+                return self.map_key_value(container_type)[1]
             if container_type == "string":
                 return "char"
             return None
@@ -801,16 +1244,35 @@ class CTranspiler:
 
 
     def gen_Assignment(self, node):
+        # Handle: s = s + ... on a builder-backed string
+        if self.assigned_name(node) in self.string_builders:
+            lhs = self.assigned_name(node)
+            builder = self.string_builders[lhs]
+            for operand in self.self_append_parts(lhs, node.expr):
+                code, typ = self.gen_expr(operand)
+                self.body_lines.append(self.builder_append(builder, code, typ) + ";")
+            self.body_lines.append(f"{lhs} = {builder}.data;")
+
+        # Handle: s = ... on a string that owns a heap slot
+        elif self.assigned_name(node) in self.owned_strings:
+            lhs = self.assigned_name(node)
+            rhs_code, _ = self.gen_expr(node.expr)
+            self.body_lines.append(f"forge_replace(&{lhs}, &{self.owned_strings[lhs]}, {rhs_code});")
+
         # Handle: x = 42
-        if isinstance(node.target, str):
+        elif isinstance(node.target, str):
             lhs = node.target
             rhs_code, _ = self.gen_expr(node.expr)
+            if lhs not in self.arena_scopes[-1]:
+                rhs_code = self.persist(rhs_code)
             self.body_lines.append(f"{lhs} = {rhs_code};")
 
         # Handle: x = 42 (Identifier node)
         elif isinstance(node.target, Identifier):
             lhs = node.target.name
             rhs_code, _ = self.gen_expr(node.expr)
+            if lhs not in self.arena_scopes[-1]:
+                rhs_code = self.persist(rhs_code)
             self.body_lines.append(f"{lhs} = {rhs_code};")
 
         # Handle: user.name = "John"
@@ -818,6 +1280,7 @@ class CTranspiler:
             obj_code, obj_type = self.gen_expr(node.target.obj)
             field_name = node.target.name
             rhs_code, _ = self.gen_expr(node.expr)
+            rhs_code = self.persist(rhs_code)
 
             if obj_type.startswith("*") or obj_type.startswith("&"):
                 self.body_lines.append(f"{obj_code}->{field_name} = {rhs_code};")
@@ -830,7 +1293,8 @@ class CTranspiler:
             target_code, target_type = self.gen_expr(node.target.target)
             index_code, _ = self.gen_expr(node.target.index)
             rhs_code, _ = self.gen_expr(node.expr)
-            if target_type == "list":
+            rhs_code = self.persist(rhs_code)
+            if target_type == "list" or self.list_element_type(target_type):
                 self.body_lines.append(f"{target_code}.items[{index_code}] = {rhs_code};")
             elif target_type == "array":
                 self.body_lines.append(f"{target_code}[{index_code}] = {rhs_code};")
@@ -849,57 +1313,92 @@ class CTranspiler:
                 value_code = f"(float)({value_code})"
             elif declared_type == "int" and actual_type == "float":
                 value_code = f"(int)({value_code})"
+        releases = self.function_arena and self.arena_allocs > self.function_arena[1]
+        slots = self.owned_slots if self.function_arena else []
+        readers = self.open_readers[::-1] if self.function_arena else []
+        if actual_type in ("string", "str"):
+            # A string goes back in the caller's arena scope (see call_result)
+            if releases or slots or readers:
+                result = self.new_temp("ret")
+                self.body_lines.append(f"char* {result} = {value_code};")
+                if releases:
+                    self.body_lines.append(f"{result} = forge_arena_return({self.function_arena[0]}, {result});")
+                for slot in slots:
+                    self.body_lines.append(f"{result} = forge_disown(&{slot}, {result});")
+                for reader in readers:
+                    self.body_lines.append(f"{result} = forge_lines_return({reader}, {result});")
+                value_code = result
+        elif releases or slots or readers:
+            # Evaluate before dropping the function's temporaries
+            result = self.new_temp("ret")
+            self.body_lines.append(f"__auto_type {result} = {self.persist(value_code)};")
+            self.body_lines.extend(f"free({slot}.data);" for slot in slots)
+            self.body_lines.extend(f"forge_lines_close({reader});" for reader in readers)
+            if releases:
+                self.body_lines.append(f"forge_arena_release({self.function_arena[0]});")
+            value_code = result
+        else:
+            value_code = self.persist(value_code)
         self.body_lines.append(f"return {value_code};")
 
     def map_type(self, forge_type):
         if forge_type.startswith("&"):
             inner = forge_type[1:]
             c_type = self.map_type(inner)
-            print(f"[DEBUG] map_type({forge_type}) → {c_type}*")
+            types_log.debug("map_type(%s) → %s*", forge_type, c_type)
             return f"{c_type}*"
 
         if forge_type in self.struct_defs:
             return forge_type
         if forge_type in ("int", "number"):
-            print(f"[DEBUG] map_type({forge_type}) → int")
+            types_log.debug("map_type(%s) → int", forge_type)
             return "int"
         if forge_type == "float":
-            print(f"[DEBUG] map_type({forge_type}) → double")
+            types_log.debug("map_type(%s) → double", forge_type)
             return "double"
         if forge_type in ("str", "string"):
-            print(f"[DEBUG] map_type({forge_type}) → char*")
+            types_log.debug("map_type(%s) → char*", forge_type)
             return "char*"
         if forge_type == "bool":
-            print(f"[DEBUG] map_type({forge_type}) → int")
+            types_log.debug("map_type(%s) → int", forge_type)
             return "int"
         if forge_type == "pointer":      
-            print(f"[DEBUG] map_type({forge_type}) → intptr_t")
+            types_log.debug("map_type(%s) → void*", forge_type)
             return "void*"
         if forge_type == "address" or forge_type == "handle":
             return "intptr_t"
         if forge_type == "list":
-            print(f"[DEBUG] map_type({forge_type}) → List")
+            types_log.debug("map_type(%s) → List", forge_type)
             return "List"
+        if self.list_element_type(forge_type):
+            return self.list_runtime(forge_type)[0]
+        if self.map_key_value(forge_type):
+            return self.map_runtime(forge_type)[0]
         if forge_type == "arr":
-            print(f"[DEBUG] map_type({forge_type}) → Array*")
+            types_log.debug("map_type(%s) → Array*", forge_type)
             return "Array*"
         if forge_type == "array_value":
-            print(f"[DEBUG] map_type({forge_type}) → Array")
+            types_log.debug("map_type(%s) → Array", forge_type)
             return "Array"
         if forge_type == "StringList":
             return "StringList"
         if forge_type == "TokenList":
             return "TokenList"
+        if forge_type == "StringBuilder":
+            return "StringBuilder"
+        if forge_type == "File":
+            return "FILE*"
+        if forge_type == "Hasher":
+            return "SHA256_CTX"
         if forge_type == "Token" or forge_type == "token":
             return "Token"
-            print("DEBUG: Setting", forge_type, " to Token")
         if forge_type == "Tokens" or forge_type == "tokens":
             return "TokenList"
         
         if forge_type == "Node":
             return "Node"  
         
-        print(f"[DEBUG] map_type({forge_type}) → int [fallback]")
+        types_log.debug("map_type(%s) → int [fallback]", forge_type)
         return "int"
 
         
@@ -917,6 +1416,22 @@ class CTranspiler:
 
 
     def gen_FunctionDef(self, node):
+        self.add_include('<stdio.h>')
+        self.add_include('<stdlib.h>')
+        self.add_include('<stddef.h>')
+        self.add_include('<time.h>')
+        # Custom Headers
+        self.add_include('"fileio.h"')
+        self.add_include('"array.h"')
+        self.add_include('"list.h"')
+        self.add_include('"hash.h"')
+        self.add_include('"runtime.h"')
+        # Socket programming headers 
+        self.add_include('<sys/socket.h>')
+        self.add_include('<netinet/in.h>')
+        self.add_include('<arpa/inet.h>')
+        self.add_include('<unistd.h>')  # for close()
+
         name = self.sanitize_name(node.name)
         sanitized = self.sanitize_name(name)
         self.defined_functions.add(sanitized)
@@ -930,20 +1445,22 @@ class CTranspiler:
             return_type_inferred = declared_ret  # ⬅️ override inferred
             self.function_types[sanitized] = declared_ret
             return_type = self.map_type(declared_ret)
-            print(f"[DEBUG] function_types['{name}'] (declared override) = {declared_ret}")
+            types_log.debug("function_types['%s'] (declared override) = %s", name, declared_ret)
 
             if sanitized not in self.function_types:
                 self.function_types[sanitized] = declared_ret
-                print(f"[DEBUG] function_types['{name}'] (declared) = {declared_ret}")
+                types_log.debug("function_types['%s'] (declared) = %s", name, declared_ret)
         else:
             return_type = "void"
 
         param_decls = []
+        param_types = []
+        string_params = []  # borrowed from the caller (see persist)
 
         for param_name, type_hint in node.params:
             # Default to "int" if no type hint
             if type_hint:
-                inferred_type = type_hint
+                inferred_type = self.normalize_type(type_hint)
             elif node.return_type == "float":
                 inferred_type = "float"  # if return is float, assume params should be too
             else:
@@ -959,7 +1476,7 @@ class CTranspiler:
             current_type = self.get_type(param_name)
             if current_type == "int" and param_name in str(node.body):
                 if f"{param_name}[" in str(node.body) or f"{param_name}.items" in str(node.body):
-                    print(f"[INFO] Overriding '{param_name}' as 'list' due to indexing pattern")
+                    types_log.info("Overriding '%s' as 'list' due to indexing pattern", param_name)
                     inferred_type = "list"
                     self.set_type(param_name, inferred_type)
 
@@ -982,6 +1499,9 @@ class CTranspiler:
                 c_type = self.map_type(inferred_type)
 
             param_decls.append(f"{c_type} {param_name}")
+            param_types.append(c_type)
+            if c_type == "char*":
+                string_params.append(param_name)
         
         # Infer return type
         ret_expr = None
@@ -1004,8 +1524,11 @@ class CTranspiler:
                     break
 
         if ret_expr:
-            
+            # Only the type is wanted here; the code is generated again with the body
+            saved_lines, saved_allocs = self.body_lines, self.arena_allocs
+            self.body_lines = []
             _, return_type_inferred = self.gen_expr(ret_expr)
+            self.body_lines, self.arena_allocs = saved_lines, saved_allocs
             # if isinstance(ret_expr, ListLiteral) or 'add(' in expr_code or '->data' in expr_code:
             #     return_type_inferred = "list"
             # Force float if .5 math involved
@@ -1025,11 +1548,11 @@ class CTranspiler:
             # Do not overwrite if already set (e.g., by ExternExpr)
             if sanitized not in self.function_types:
                 self.function_types[sanitized] = return_type_inferred
-                print(f"[DEBUG] function_types['{name}'] = {self.function_types[name]}")
+                types_log.debug("function_types['%s'] = %s", name, self.function_types[name])
             else:
-                print(f"[INFO] Skipped overwrite of function_types['{name}'] = {return_type_inferred} (already set to {self.function_types[sanitized]})")
+                types_log.info("Skipped overwrite of function_types['%s'] = %s (already set to %s)", name, return_type_inferred, self.function_types[sanitized])
 
-            print(f"[DEBUG] function_types['{name}'] = {self.function_types[name]}")
+            types_log.debug("function_types['%s'] = %s", name, self.function_types[name])
         else:
             return_type = "void"
 
@@ -1043,42 +1566,74 @@ class CTranspiler:
             for stmt in node.body.statements:
                 if isinstance(stmt, ReturnStatement):
                     stmt._force_return_type = node.return_type
+            saved_function_arena, saved_builders = self.function_arena, self.string_builders
+            saved_owned, saved_slots, saved_borrowed = self.owned_strings, self.owned_slots, self.borrowed
+            saved_readers = self.open_readers
+            self.string_builders, self.owned_strings, self.owned_slots = {}, {}, []
+            self.open_readers = []
+            # String arguments are the caller's and are not copied for the call
+            self.borrowed = set(string_params)
+            outer = self.block_position
+            self.block_position = (node.body.statements, -1)
+            for param_name in string_params:
+                if self.slot_eligible(param_name):
+                    self.own_string(param_name)
+            self.block_position = outer
+            arena_mark = self.new_temp("arena_mark")
+            self.function_arena = (arena_mark, self.arena_allocs)
+            self.arena_scopes.append(set())
             body = self.transpile_block(node.body)
+            self.arena_scopes.pop()
+            releases = self.arena_allocs > self.function_arena[1]
+            if releases or self.owned_slots:
+                body = [f"ForgeSlot {slot} = {{NULL, 0}};" for slot in self.owned_slots] + [body]
+                if releases:
+                    body.insert(0, f"ForgeArenaMark {arena_mark} = forge_arena_mark();")
+                if not (node.body.statements and isinstance(node.body.statements[-1], ReturnStatement)):
+                    body.extend(f"free({slot}.data);" for slot in self.owned_slots)
+                    if releases:
+                        body.append(f"forge_arena_release({arena_mark});")
+                body = lines(body)
+            self.function_arena, self.string_builders = saved_function_arena, saved_builders
+            self.owned_strings, self.owned_slots, self.borrowed = saved_owned, saved_slots, saved_borrowed
+            self.open_readers = saved_readers
         
 
         self.pop_scope()  # Exit function scope
 
-        tpl = env.get_template("function_def.c.j2")
         return_type = self.map_type(self.function_types.get(sanitized, return_type_inferred))
-        print(f"[RENDER] Emitting function {sanitized} with return type: {return_type}")
-        code = tpl.render(name=sanitized, return_type=return_type, params=param_decls, body=body)
+        codegen_log.debug("Emitting function %s with return type: %s", sanitized, return_type)
+        code = templates.function_def(name=sanitized, return_type=return_type, params=param_decls, body=body)
         self.functions.append(code)
-        print(f"[DEBUG] function_types['{sanitized}'] = {self.function_types.get(sanitized, 'NOT SET')}")
+        prototype = f"{return_type} {sanitized}({', '.join(param_decls) or 'void'});"
+        self.function_units.append((self.current_module, prototype, code))
+        # Without a declared or inferred result the C return value is garbage
+        result_type = return_type if sanitized in self.function_types else "void"
+        self.function_signatures[sanitized] = (result_type, param_types)
+        types_log.debug("function_types['%s'] = %s", sanitized, self.function_types.get(sanitized, "NOT SET"))
 
 
 
 
 
 
-    def indent(self, code, spaces=4):
-        return "\n".join(" " * spaces + line if line.strip() else "" for line in code.splitlines())
-
-
     def gen_AttemptRescue(self, node):
         try_code = self.transpile_block(node.try_block)
         rescue_code = self.transpile_block(node.rescue_block)
         rescue_name = node.error_name
-
-        rendered = f"""
-    if (!setjmp(__context.env)) {{
-    {self.indent(try_code)}
-    }} else {{
-        const char* {rescue_name} = __context.error;
-    {self.indent(rescue_code)}
-    }}
-    """.strip()
-
-        self.body_lines.append(rendered)
+        # A rescued raise skips the end of any lines() loop it left
+        depth = self.new_temp("lines_depth")
+
+        self.body_lines.append(lines([
+            f"int {depth} = forge_lines_depth;",
+            "if (!setjmp(__context.env)) {",
+            block(try_code),
+            "} else {",
+            f"    forge_lines_close_to({depth});",
+            f"    const char* {rescue_name} = __context.error;",
+            block(rescue_code),
+            "}",
+        ]))
 
     def gen_LoadStmt(self, node: LoadStmt):
         # Strip quotes from "math.forge"
@@ -1091,57 +1646,106 @@ class CTranspiler:
             return
         self.loaded_modules.add(path)
 
-        full_path = None
-        for base in self.module_search_paths:
-            candidate = os.path.join(base, path)
-            if os.path.exists(candidate):
-                full_path = candidate
-                break
-
+        full_path = resolve_module(path, self.module_search_paths)
         if not full_path:
             raise FileNotFoundError(f"Cannot find module file: {path}")
+        self.module_files[path] = full_path
+
+        module_name = module_name_for(full_path)
+
+        # Reuse the parsed AST and registered symbols from the module cache if possible
+        prefetched = self.prefetched_modules.pop(full_path, None)
+        if prefetched is not None:
+            cache_key, entry = prefetched
+        else:
+            with open(full_path, "r") as f:  # use full_path
+                source_code = f.read()
+            cache_key = self.module_cache.key(module_name, source_code)
+            entry = self.module_cache.load(cache_key)
+        if entry is None:
+            ast = Parser(Lexer(source_code).iter_tokens()).parse()
+            try:
+                ast_blob = pickle.dumps(ast, protocol=pickle.HIGHEST_PROTOCOL)
+            except RecursionError:
+                ast_blob = None
+            entry = {"ast": ast_blob, "registrations": {}}
+        else:
+            ast = pickle.loads(entry["ast"])
+
+        env = environment_fingerprint(
+            self.function_types, self.defined_functions, self.scope_stack, self.struct_defs
+        )
+        registration = entry["registrations"].get(env)
+        if registration is None:
+            registration = self.register_module(ast, module_name)
+            entry["registrations"][env] = registration
+            if entry["ast"] is not None:
+                self.module_cache.store(cache_key, entry)
+        else:
+            for stmt in ast.statements:
+                if isinstance(stmt, FunctionDef):
+                    self.qualify_function(stmt, module_name)
+            self.function_types.update(registration["function_types"])
+            self.defined_functions.update(registration["defined_functions"])
+
+        # Second pass: Transpile functions (now all are registered)
+        outer_module, self.current_module = self.current_module, module_name
+        self.transpile_statements(ast.statements)
+        self.current_module = outer_module
 
-        with open(full_path, "r") as f:  # use full_path
-            source_code = f.read()
+    def qualify_function(self, stmt, module_name):
+        fn_name = self.sanitize_name(stmt.name)
 
-        tokens = Lexer(source_code).tokenize()
-        ast = Parser(tokens).parse()
+        if not fn_name.startswith(module_name + "_"):
+            qualified_name = f"{module_name}_{fn_name}"
+            stmt.name = qualified_name
+        else:
+            qualified_name = fn_name
+        return fn_name, qualified_name
 
-        module_name = os.path.splitext(os.path.basename(full_path))[0]  # from full_path
+    def register_module(self, ast, module_name):
+        # Returns the symbols this module added so the cache can replay them
+        types_before = dict(self.function_types)
+        functions_before = set(self.defined_functions)
+
+        # Return-type inference must not leak temporaries into the caller's body
+        saved_lines, saved_counter = self.body_lines, self.temp_counter
+        saved_allocs, saved_temps = self.arena_allocs, set(self.arena_temps)
+        self.body_lines = []
 
         # First pass: Register all functions
         for stmt in ast.statements:
             if isinstance(stmt, FunctionDef):
-                fn_name = self.sanitize_name(stmt.name)
-
-                if not fn_name.startswith(module_name + "_"):
-                    qualified_name = f"{module_name}_{fn_name}"
-                    stmt.name = qualified_name
-                else:
-                    qualified_name = fn_name
+                fn_name, qualified_name = self.qualify_function(stmt, module_name)
 
                 self.defined_functions.add(qualified_name)
 
                 if stmt.return_type:
                     self.function_types[qualified_name] = stmt.return_type
-                    print(f"[DEBUG] Loaded function {qualified_name} with declared return: {stmt.return_type}")
+                    types_log.debug("Loaded function %s with declared return: %s", qualified_name, stmt.return_type)
 
                     if fn_name not in self.function_types:
                         self.function_types[fn_name] = stmt.return_type
                         self.defined_functions.add(fn_name)
-                        print(f"[DEBUG] Aliased {fn_name} → {qualified_name}")
+                        types_log.debug("Aliased %s → %s", fn_name, qualified_name)
                 elif stmt.body and hasattr(stmt.body, "statements"):
                     for s in reversed(stmt.body.statements):
                         if isinstance(s, ReturnStatement):
                             _, typ = self.gen_expr(s.expr)
                             self.function_types[qualified_name] = typ
-                            print(f"[DEBUG] Inferred return type for {qualified_name}: {typ}")
+                            types_log.debug("Inferred return type for %s: %s", qualified_name, typ)
                             break
 
-        # Second pass: Transpile functions (now all are registered)
-        for stmt in ast.statements:
-            self.transpile(stmt)
+        self.body_lines, self.temp_counter = saved_lines, saved_counter
+        self.arena_allocs, self.arena_temps = saved_allocs, saved_temps
 
+        return {
+            "function_types": {
+                name: typ for name, typ in self.function_types.items()
+                if types_before.get(name) != typ
+            },
+            "defined_functions": self.defined_functions - functions_before,
+        }
 
 
 
@@ -1149,11 +1753,25 @@ class CTranspiler:
     def transpile_block(self, block_node):
         saved_lines = self.body_lines
         self.body_lines = []
-        for stmt in block_node.statements:
-            self.transpile(stmt)
-        result = "\n".join(self.body_lines)
+        self.transpile_statements(block_node.statements)
+        # The block's lines by reference: nesting it in a statement copies nothing
+        result = lines(self.body_lines)
         self.body_lines = saved_lines
         return result
+
+    def transpile_statements(self, statements):
+        # Remembers where we are so a statement can look at the ones after it
+        outer = self.block_position
+        for index, stmt in enumerate(statements):
+            self.block_position = (statements, index)
+            self.transpile(stmt)
+        self.block_position = outer
+
+    def following_statements(self):
+        if self.block_position is None:
+            return []
+        statements, index = self.block_position
+        return statements[index + 1:]
     
     def map_binary_op(self, op):
         table = {
@@ -1179,380 +1797,811 @@ class CTranspiler:
 
 
     def gen_expr(self, expr):
-        #print("[DEBUG] gen_expr type:", type(expr).__name__)
-        if isinstance(expr, NumberLiteral):
-            typ = "float" if expr.is_float else "int"
-            return str(expr.value), typ
-        
-        elif isinstance(expr, AddressOf):
-            inner_code, inner_type = self.gen_expr(expr.expr)
-            return f"&{inner_code}", f"*{inner_type}"
-
-
-        elif isinstance(expr, StringLiteral):
-            escaped = escape_c_string(expr.value)
-            return f"\"{escaped}\"", "string"
-        
-        elif isinstance(expr, ExternExpr):
-            print(f"[DEBUG] REGISTERING extern {expr.name}")
-            self.externs[expr.name] = expr.arg_types
-            self.defined_functions.add(expr.name)
-            existing_type = self.function_types.get(expr.name)
-            new_type = expr.return_type or "int"
-
-            # Only overwrite if it's not already set, or if the new one is more specific
-            if existing_type is None or (existing_type == "int" and new_type != "int"):
-                self.function_types[expr.name] = new_type
-                print(f"[DEBUG] Set function_types['{expr.name}'] = {new_type}")
-            else:
-                print(f"[INFO] Skipped overwrite of function_types['{expr.name}'] = {new_type}")
-
-            return "", "extern"
-
-
-        
-        elif isinstance(expr, MemberAccess):
-            obj_code, obj_type = self.gen_expr(expr.obj)
-            if obj_type == "Token" and expr.name == "value":
-                return f"{obj_code}.value", "string"
-
-            # Check if obj_type is a known struct
-            if obj_type in self.struct_defs:
-                struct_def = self.struct_defs[obj_type]
-                field_type = None
-                for field_name, f_type in struct_def.fields:
-                    if field_name == expr.name:
-                        field_type = f_type
-                        break
-                if field_type is None:
-                    raise Exception(f"Unknown field {expr.name} in struct {obj_type}")
-                if obj_type.startswith("*") or obj_type.startswith("&"):
-                    return f"{obj_code}->{expr.name}", field_type
-                else:
-                    return f"{obj_code}.{expr.name}", field_type
-            
+        handler = self.EXPR_HANDLERS.get(type(expr))
+        if handler is None:
+            raise NotImplementedError(f"Unsupported expression type: {type(expr).__name__}")
+        return handler(self, expr)
+
+    def gen_NumberLiteral(self, expr):
+        typ = "float" if expr.is_float else "int"
+        return str(expr.value), typ
+
+    def gen_AddressOf(self, expr):
+        inner_code, inner_type = self.gen_expr(expr.expr)
+        return f"&{inner_code}", f"*{inner_type}"
+
+    def gen_StringLiteral(self, expr):
+        escaped = escape_c_string(expr.value)
+        return f"\"{escaped}\"", "string"
+
+    def gen_ExternExpr(self, expr):
+        types_log.debug("Registering extern %s", expr.name)
+        self.externs[expr.name] = expr.arg_types
+        self.defined_functions.add(expr.name)
+        existing_type = self.function_types.get(expr.name)
+        new_type = expr.return_type or "int"
+
+        # Only overwrite if it's not already set, or if the new one is more specific
+        if existing_type is None or (existing_type == "int" and new_type != "int"):
+            self.function_types[expr.name] = new_type
+            types_log.debug("Set function_types['%s'] = %s", expr.name, new_type)
+        else:
+            types_log.info("Skipped overwrite of function_types['%s'] = %s", expr.name, new_type)
+
+        return "", "extern"
+
+    def gen_MemberAccess(self, expr):
+        obj_code, obj_type = self.gen_expr(expr.obj)
+        if obj_type == "Token" and expr.name == "value":
+            return f"{obj_code}.value", "string"
+
+        # Check if obj_type is a known struct
+        if obj_type in self.struct_defs:
+            struct_def = self.struct_defs[obj_type]
+            field_type = None
+            for field_name, f_type in struct_def.fields:
+                if field_name == expr.name:
+                    field_type = f_type
+                    break
+            if field_type is None:
+                raise Exception(f"Unknown field {expr.name} in struct {obj_type}")
             if obj_type.startswith("*") or obj_type.startswith("&"):
-                return f"{obj_code}->{expr.name}", "int"
+                return f"{obj_code}->{expr.name}", field_type
             else:
-                return f"{obj_code}.{expr.name}", "int"
-            
-
-
-
-        elif isinstance(expr, Identifier):
-            var_name = expr.name
-            var_type = self.get_type(var_name) or "int"  # default fallback
-            return var_name, var_type
+                return f"{obj_code}.{expr.name}", field_type
         
-        elif isinstance(expr, NullLiteral):
-            return "-1", "int"
-
-
-        elif isinstance(expr, BinaryExpr):
-            op = self.map_binary_op(expr.op)
-            left_code, left_type = self.gen_expr(expr.left)
-            right_code, right_type = self.gen_expr(expr.right)
-            
-            # Special case: string equality even if types weren't inferred
-            if op in ("==", "!="):
-                if (
-                    left_type == "string"
-                    or right_type == "string"
-                    or isinstance(expr.left, StringLiteral)
-                    or isinstance(expr.right, StringLiteral)
-                ):
-                    cmp = "!=" if op == "!=" else "=="
-                    return f"(strcmp({left_code}, {right_code}) {cmp} 0)", "bool"
-
-
-
-            # Handle string concatenation
-            if op == "+" and ("string" in (left_type, right_type)):
-                # Ensure both operands are strings
-                if left_type != "string":
-                    left_tmp = self.new_temp()
-                    fmt = "%s" if left_type == "char*" else "%d"
-                    self.body_lines.append(f"char {left_tmp}[32];")
-                    self.body_lines.append(f'snprintf({left_tmp}, sizeof({left_tmp}), "{fmt}", {left_code});')
-                    left_code = left_tmp
-
-                if right_type != "string":
-                    print("Right is not string")
-                    right_tmp = self.new_temp()
-                    fmt = "%s" if right_type == "char*" else "%d"
-                    self.body_lines.append(f"char {right_tmp}[32];")
-                    self.body_lines.append(f'snprintf({right_tmp}, sizeof({right_tmp}), "{fmt}", {right_code});')
-                    right_code = right_tmp
-
-
-
-                result_tmp = self.new_temp()
-                self.body_lines.append(f"char {result_tmp}[1024];")
-                self.body_lines.append(f'snprintf({result_tmp}, sizeof({result_tmp}), "%s%s", {left_code}, {right_code});')
-                tmp_heap = self.new_temp("heapstr")
-                self.body_lines.append(f"char* {tmp_heap} = strdup({result_tmp});")  # ✅ allocate on heap
-                return tmp_heap, "string"
-
-
-            # Normal numeric ops
+        if obj_type.startswith("*") or obj_type.startswith("&"):
+            return f"{obj_code}->{expr.name}", "int"
+        else:
+            return f"{obj_code}.{expr.name}", "int"
+
+    def gen_Identifier(self, expr):
+        var_name = expr.name
+        var_type = self.get_type(var_name) or "int"  # default fallback
+        return var_name, var_type
+
+    def gen_NullLiteral(self, expr):
+        return "-1", "int"
+
+    def gen_BinaryExpr(self, expr):
+        if expr.op == "PLUS" and isinstance(expr.left, BinaryExpr) and expr.left.op == "PLUS":
+            return self.gen_plus_chain(expr)
+        op = self.map_binary_op(expr.op)
+        left_code, left_type = self.gen_expr(expr.left)
+        right_code, right_type = self.gen_expr(expr.right)
+        
+        # Special case: string equality even if types weren't inferred
+        if op in ("==", "!="):
+            if (
+                left_type == "string"
+                or right_type == "string"
+                or isinstance(expr.left, StringLiteral)
+                or isinstance(expr.right, StringLiteral)
+            ):
+                cmp = "!=" if op == "!=" else "=="
+                return f"(strcmp({left_code}, {right_code}) {cmp} 0)", "bool"
+
+
+
+        # Handle string concatenation
+        if op == "+" and ("string" in (left_type, right_type)):
+            return self.gen_concat([(left_code, left_type), (right_code, right_type)]), "string"
+
+        # Normal numeric ops
+        return self.numeric_binary(op, left_code, left_type, right_code, right_type)
+
+    def numeric_binary(self, op, left_code, left_type, right_code, right_type):
+        if left_type == "float" or right_type == "float":
+            left_code = f"(float){left_code}" if left_type != "float" else left_code
+            right_code = f"(float){right_code}" if right_type != "float" else right_code
             result_code = f"({left_code} {op} {right_code})"
-            if left_type == "float" or right_type == "float":
-                left_code = f"(float){left_code}" if left_type != "float" else left_code
-                right_code = f"(float){right_code}" if right_type != "float" else right_code
-                result_code = f"({left_code} {op} {right_code})"
-                return result_code, "float"
+            return result_code, "float"
+        else:
+            result_code = f"({left_code} {op} {right_code})"
+            return result_code, "int"
+
+    # --- String concatenation ---
+
+    def plus_chain(self, expr):
+        # Operands of a left-nested `a + b + c + ...`, in source order
+        operands = []
+        while isinstance(expr, BinaryExpr) and expr.op == "PLUS":
+            operands.append(expr.right)
+            expr = expr.left
+        operands.append(expr)
+        operands.reverse()
+        return operands
+
+    def gen_plus_chain(self, expr):
+        # `a + b + c + ...` is added up left to right until the first string;
+        # from there on every operand is concatenated, all in one allocation
+        # instead of one intermediate string per `+`
+        values = [self.gen_expr(operand) for operand in self.plus_chain(expr)]
+        code, typ = values[0]
+        for i in range(1, len(values)):
+            if "string" in (typ, values[i][1]):
+                return self.gen_concat([(code, typ)] + values[i:]), "string"
+            code, typ = self.numeric_binary("+", code, typ, *values[i])
+        return code, typ
+
+    def concat_operand(self, code, typ):
+        # C string for one operand of a concatenation
+        if typ in ("string", "char*"):
+            return code
+        tmp = self.new_temp()
+        fmt = "%f" if typ == "float" else "%d"
+        self.body_lines.append(f"char {tmp}[32];")
+        self.body_lines.append(f'snprintf({tmp}, sizeof({tmp}), "{fmt}", {code});')
+        return tmp
+
+    def gen_concat(self, values):
+        parts = [self.concat_operand(code, typ) for code, typ in values]
+        if len(parts) == 2:
+            return self.arena_string(f"forge_arena_concat({parts[0]}, {parts[1]})")
+        return self.arena_string(f"forge_arena_concat_n({len(parts)}, (const char*[]){{{', '.join(parts)}}})")
+
+    def gen_ListLiteral(self, expr):
+        if hasattr(expr, '_forced_type_hint') and expr._forced_type_hint:
+            typed = self.typed_list_type(expr._forced_type_hint)
+            if expr._forced_type_hint == "StringList" or typed == "StringList":
+                list_type = "StringList"
+                create_func = "string_list_create"
+                add_func = "string_list_add"
+                result_type = "StringList"
+            elif typed:
+                # e.g. `let xs: int = @()` or an element type inferred from .add(...)
+                list_type, prefix = self.list_runtime(typed)
+                create_func = f"{prefix}_create"
+                add_func = f"{prefix}_add"
+                result_type = typed
             else:
-                result_code = f"({left_code} {op} {right_code})"
-                return result_code, "int"
-
-
+                list_type = "List"
+                create_func = "list_create"
+                add_func = "list_add"
+                result_type = "list"
+        else:
+            # Fallback: detect based on elements
+            if not expr.elements:
+                return "list_create()", "list"
+            
+            is_string_list = all(isinstance(el, StringLiteral) for el in expr.elements)
 
-        elif isinstance(expr, ListLiteral):
-            if hasattr(expr, '_forced_type_hint') and expr._forced_type_hint:
-                if expr._forced_type_hint == "StringList":
-                    list_type = "StringList"
-                    create_func = "string_list_create"
-                    add_func = "string_list_add"
-                    result_type = "StringList"
-                else:
-                    list_type = "List"
-                    create_func = "list_create"
-                    add_func = "list_add"
-                    result_type = "list"
+            if is_string_list:
+                list_type = "StringList"
+                create_func = "string_list_create"
+                add_func = "string_list_add"
+                result_type = "stringlist"
             else:
-                # Fallback: detect based on elements
-                if not expr.elements:
-                    return "list_create()", "list"
-                
-                is_string_list = all(isinstance(el, StringLiteral) for el in expr.elements)
-
-                if is_string_list:
-                    list_type = "StringList"
-                    create_func = "string_list_create"
-                    add_func = "string_list_add"
-                    result_type = "stringlist"
-                else:
-                    list_type = "List"
-                    create_func = "list_create"
-                    add_func = "list_add"
-                    result_type = "list"
+                list_type = "List"
+                create_func = "list_create"
+                add_func = "list_add"
+                result_type = "list"
+
+        temp_name = self.new_temp()
+        self.body_lines.append(f"{list_type} {temp_name} = {create_func}();")
+
+        for el in expr.elements:
+            el_code, _ = self.gen_expr(el)
+            self.body_lines.append(f"{add_func}(&{temp_name}, {el_code});")
+
+        return temp_name, result_type
+
+    # --- Typed lists ---
+
+    def list_element_type(self, list_type):
+        # "list:int" -> "int"; None for anything that is not a typed list
+        if isinstance(list_type, str) and list_type.startswith("list:"):
+            return list_type[len("list:"):]
+        return None
+
+    def list_runtime(self, list_type):
+        # (C type, runtime function prefix) of a typed list or StringList
+        if list_type == "StringList":
+            return "StringList", "string_list"
+        element = self.list_element_type(list_type)
+        if element in TYPED_LISTS:
+            return TYPED_LISTS[element]
+        return f"{element}List", f"{element.lower()}_list"
+
+    def typed_list_type(self, element):
+        # Forge type of a list holding `element`, or None if it has no typed list
+        element = self.normalize_type(element)
+        if element in ("int", "number", "bool"):
+            return "list:int"
+        if element == "float":
+            return "list:float"
+        if element == "string":
+            return "StringList"
+        if element in ("pointer", "address", "handle") or element.startswith("&"):
+            return "list:pointer"
+        if element in self.struct_defs:
+            if element not in self.struct_lists:
+                self.struct_lists.append(element)
+            return f"list:{element}"
+        return None
+
+    def static_type(self, expr, local_types):
+        # Best-effort Forge type of an expression without generating code for it
+        if isinstance(expr, NumberLiteral):
+            return "float" if expr.is_float else "int"
+        if isinstance(expr, StringLiteral):
+            return "string"
+        if isinstance(expr, Identifier):
+            found = local_types.get(expr.name) or self.get_type(expr.name)
+            return None if found == "unknown" else found
+        if isinstance(expr, UnaryExpr):
+            return "int" if expr.op == "!" else self.static_type(expr.operand, local_types)
+        if isinstance(expr, BinaryExpr):
+            if expr.op in ("EQEQ", "NEQ", "LT", "LTE", "GT", "GTE", "AND", "OR"):
+                return "int"
+            sides = {self.normalize_type(self.static_type(side, local_types) or "")
+                     for side in (expr.left, expr.right)}
+            if expr.op == "PLUS" and "string" in sides:
+                return "string"
+            if sides <= {"int", "number", "bool"}:
+                return "int"
+            if sides <= {"int", "number", "bool", "float"}:
+                return "float"
+            return None
+        if isinstance(expr, StructInstance):
+            return expr.struct_name
+        if isinstance(expr, CallExpr) and isinstance(expr.func, Identifier):
+            if expr.func.name in self.struct_defs:
+                return expr.func.name  # User(...) builds a struct
+            return self.function_types.get(self.sanitize_name(expr.func.name))
+        return None
+
+    def infer_list_element(self, name, elements):
+        # Element type for `let name = @(...)`, taken from the literal's elements
+        # and the .add(...) calls later in the same block. Returns None (keep the
+        # generic List) when nothing says what goes in, the types disagree, or
+        # the list is used in a way a typed list cannot serve: passed to a
+        # function, reassigned, returned, declared again, ...
+        local_types = {}
+        kinds = [self.static_type(el, local_types) for el in elements]
+        allowed = set()
+        uses = []
+        for node in walk_scope(self.following_statements()):
+            if isinstance(node, LetStatement):
+                if node.name == name:
+                    return None
+                local_types[node.name] = node.type_hint or self.static_type(node.expr, local_types)
+            elif isinstance(node, Assignment) and node.target == name:
+                return None
+            elif isinstance(node, CallExpr):
+                func = node.func
+                if isinstance(func, MemberAccess) and isinstance(func.obj, Identifier) and func.obj.name == name:
+                    if func.name not in LIST_METHODS:
+                        return None
+                    allowed.add(id(func.obj))
+                    if func.name == "add" and node.args:
+                        kinds.append(self.static_type(node.args[0], local_types))
+                elif isinstance(func, Identifier) and func.name in ("len", "print"):
+                    allowed.update(id(arg) for arg in node.args if isinstance(arg, Identifier))
+                if isinstance(func, MemberAccess) and func.name == "extend":
+                    # xs.extend(name) only reads name, and converts if the types differ
+                    allowed.update(id(arg) for arg in node.args if isinstance(arg, Identifier))
+            elif isinstance(node, SubscriptExpr) and isinstance(node.target, Identifier):
+                allowed.add(id(node.target))
+            elif isinstance(node, Identifier) and node.name == name:
+                uses.append(id(node))
+
+        if any(use not in allowed for use in uses):
+            return None
+        element = self.common_type(kinds)
+        if element and self.typed_list_type(element):
+            return element
+        return None
+
+    def common_type(self, kinds):
+        # One Forge type covering all of kinds (ints widen to float), or None
+        if not kinds or None in kinds:
+            return None
+        kinds = {self.normalize_type(kind) for kind in kinds}
+        if kinds <= {"int", "number", "bool"}:
+            return "int"
+        if kinds <= {"int", "number", "bool", "float"}:
+            return "float"
+        if len(kinds) == 1:
+            return kinds.pop()
+        return None
+
+    def gen_list_bulk_method(self, obj_code, obj_type, method_name, arg_nodes, arg_values):
+        # remove_at / swap_remove / extend / reserve / clear / filter_in_place on
+        # a List ("list"), typed list or StringList
+        list_type, prefix = ("List", "list") if obj_type == "list" else self.list_runtime(obj_type)
+        if method_name in ("remove_at", "swap_remove", "reserve"):
+            return f"{prefix}_{method_name}(&{obj_code}, {arg_values[0][0]})", "void"
+        elif method_name == "clear":
+            return f"{prefix}_clear(&{obj_code})", "void"
+        elif method_name == "extend":
+            other_code, other_type = arg_values[0]
+            if other_type == "stringlist":  # untyped string literal list, see gen_ListLiteral
+                other_type = "StringList"
+            if other_type == obj_type:
+                return f"{prefix}_extend(&{obj_code}, &{other_code})", "void"
+            is_numeric = lambda t: t == "list" or self.list_element_type(t) in TYPED_LISTS
+            if not (is_numeric(obj_type) and is_numeric(other_type)):
+                raise Exception(f"Cannot extend a {list_type} with {other_type}")
+            # Different element types: convert item by item
+            i = self.new_temp()
+            self.body_lines.append(f"{prefix}_reserve(&{obj_code}, {obj_code}.size + {other_code}.size);")
+            self.body_lines.append(
+                f"for (int {i} = 0; {i} < {other_code}.size; {i}++) "
+                f"{prefix}_add(&{obj_code}, {other_code}.items[{i}]);"
+            )
+            return "", "void"
+        elif method_name == "filter_in_place":
+            if not arg_nodes or not isinstance(arg_nodes[0], Identifier):
+                raise Exception("filter_in_place expects the name of a function")
+            keep = self.sanitize_name(arg_nodes[0].name)
+            if obj_type == "StringList":
+                return f"string_list_filter_in_place(&{obj_code}, {keep})", "void"
+            self.body_lines.append(f"FORGE_LIST_FILTER_IN_PLACE(&{obj_code}, {keep});")
+            return "", "void"
+        raise Exception(f"{list_type} does not support '{method_name}'")
+
+    # --- Arena temporaries ---
+
+    def arena_string(self, c_expr):
+        # Binds a string allocated in the temporaries arena to a new temp
+        tmp = self.new_temp("str")
+        self.body_lines.append(f"char* {tmp} = {c_expr};")
+        self.arena_temps.add(tmp)
+        self.arena_allocs += 1
+        return tmp
+
+    def persist(self, code):
+        # Heap copy of an arena string about to outlive its scope; anything else as-is
+        if code in self.arena_temps:
+            return f"forge_persist({code})"
+        if code in self.borrowed:
+            return f"forge_keep({code})"
+        return code
+
+    def call_result(self, code, return_type):
+        # A user function's string result is left in the caller's arena scope
+        # (see gen_ReturnStatement), so it is handled like any arena temp
+        if return_type in ("string", "str"):
+            self.arena_temps.add(code)
+            self.arena_allocs += 1
+        return code, return_type
+
+    def transpile_loop_body(self, block_node):
+        # Loop body as its own arena scope: when it allocates, everything from
+        # the previous iteration is released at the top of the next one.
+        # Returns (body code, mark variable or None); the caller releases the
+        # mark once more after the loop.
+        start = self.arena_allocs
+        self.arena_scopes.append(set())
+        body = self.transpile_block(block_node)
+        self.arena_scopes.pop()
+        if self.arena_allocs == start:
+            return body, None
+        mark = self.new_temp("arena_mark")
+        self.body_lines.append(f"ForgeArenaMark {mark} = forge_arena_mark();")
+        return lines([f"forge_arena_release({mark});", body]), mark
+
+    def is_container(self, name):
+        typ = self.get_type(name)
+        return typ in ("list", "StringList") or bool(self.list_element_type(typ) or self.map_key_value(typ))
+
+    def arena_eligible(self, name, allow_return=False, allow_calls=False):
+        # True if the string bound by `let name` is only read in the rest of the
+        # block (printed, compared, concatenated, copied into a list or used as
+        # a map key), so it can stay in the arena until the scope is released.
+        # allow_calls also counts passing it to a Forge function, which borrows
+        # it, as a read; the call's result may be the same string.
+        allowed = set()
+        uses = []
+        for node in walk_scope(self.following_statements()):
+            if isinstance(node, LetStatement) and node.name == name:
+                return False
+            if isinstance(node, Assignment):
+                if isinstance(node.target, Identifier):
+                    allowed.add(id(node.target))  # rebinding; the new value is checked by gen_Assignment
+                if self.assigned_name(node) in self.owned_strings:
+                    allowed.add(id(node.expr))  # copied into the variable's slot
+            elif isinstance(node, BinaryExpr):
+                allowed.update((id(node.left), id(node.right)))
+            elif isinstance(node, SubscriptExpr):
+                allowed.update((id(node.target), id(node.index)))
+            elif isinstance(node, ReturnStatement) and allow_return:
+                allowed.add(id(node.expr))
+            elif isinstance(node, CallExpr):
+                func = node.func
+                if isinstance(func, Identifier) and func.name in ARENA_SAFE_BUILTINS:
+                    allowed.update(id(arg) for arg in node.args)
+                elif allow_calls and self.borrows_arguments(func):
+                    allowed.update(id(arg) for arg in node.args)
+                elif (isinstance(func, MemberAccess) and isinstance(func.obj, Identifier)
+                      and self.is_container(func.obj.name)):
+                    # lists copy strings on add; maps copy keys but keep values as-is
+                    readers = node.args[:1] if func.name == "set" else node.args
+                    allowed.update(id(arg) for arg in readers)
+                elif (isinstance(func, MemberAccess) and isinstance(func.obj, Identifier)
+                      and self.get_type(func.obj.name) == "Hasher"):
+                    allowed.update(id(arg) for arg in node.args)
+            elif isinstance(node, Identifier) and node.name == name:
+                uses.append(id(node))
+        return all(use in allowed for use in uses)
+
+    def borrows_arguments(self, func):
+        # True if func names a Forge function (see persist): not a built-in,
+        # an extern or a struct
+        if isinstance(func, Identifier):
+            name = func.name
+            return (name not in BUILTINS and name not in self.externs and name not in self.struct_defs
+                    and self.sanitize_name(name) in self.defined_functions)
+        if isinstance(func, MemberAccess) and isinstance(func.obj, Identifier):
+            return f"{func.obj.name}_{func.name}" in self.defined_functions
+        return False
+
+    # --- Owned string slots ---
+
+    def slot_eligible(self, name):
+        # True if the string variable `name` is reassigned in the rest of the
+        # block and otherwise only read or returned. Each new value is then
+        # copied into a heap slot the variable owns (forge_replace), so
+        # reassigning it in a loop neither leaks nor outlives the arena scope
+        # the value was made in.
+        reassigned = any(
+            isinstance(node, Assignment) and self.assigned_name(node) == name
+            for node in walk_scope(self.following_statements())
+        )
+        return reassigned and self.arena_eligible(name, allow_return=True)
+
+    def own_string(self, name):
+        # Slots are declared at the top of the function, so one inside a loop
+        # is reused by every iteration and can be freed on any return
+        slot = self.new_temp("slot")
+        self.owned_strings[name] = slot
+        self.owned_slots.append(slot)
+
+    # --- String builders ---
+
+    def self_append_parts(self, name, expr):
+        # Operands appended by `name = name + a + b ...`, or None if expr is anything else
+        if not (isinstance(expr, BinaryExpr) and expr.op == "PLUS"):
+            return None
+        operands = self.plus_chain(expr)
+        if not (isinstance(operands[0], Identifier) and operands[0].name == name):
+            return None
+        if any(isinstance(node, Identifier) and node.name == name for node in walk_scope(operands[1:])):
+            return None
+        return operands[1:]
 
-            temp_name = self.new_temp()
-            self.body_lines.append(f"{list_type} {temp_name} = {create_func}();")
+    def assigned_name(self, node):
+        # Variable name an Assignment rebinds (`x = ...`), or None for members and subscripts
+        if isinstance(node.target, str):
+            return node.target
+        if isinstance(node.target, Identifier):
+            return node.target.name
+        return None
+
+    def builder_eligible(self, name):
+        # True if the string bound by `let name` can live in a StringBuilder:
+        # every later assignment to it appends (`name = name + ...`), at least
+        # one of them inside a loop, and it is otherwise only read. Appending
+        # in place keeps building a long string linear; copying the whole
+        # string on every `+` makes it quadratic.
+        looped = False
+        for node in walk_scope(self.following_statements()):
+            if isinstance(node, Assignment) and self.assigned_name(node) == name:
+                if self.self_append_parts(name, node.expr) is None:
+                    return False
+            elif isinstance(node, (WhileLoop, ForStatement, ForInStatement)) and not looped:
+                looped = any(
+                    isinstance(inner, Assignment) and self.assigned_name(inner) == name
+                    for inner in walk_scope([node.body])
+                )
+        # The data pointer moves when the builder grows, so nothing may keep it;
+        # returning it is fine since the builder is never appended to again
+        return looped and self.arena_eligible(name, allow_return=True)
+
+    def builder_append(self, builder, code, typ):
+        # C call appending one value of Forge type typ to a StringBuilder
+        if typ in ("string", "char*"):
+            return f"string_builder_append(&{builder}, {code})"
+        if typ == "float":
+            return f"string_builder_append_float(&{builder}, {code})"
+        return f"string_builder_append_int(&{builder}, {code})"
+
+    def gen_builder_method(self, obj_code, method_name, arg_values):
+        if method_name == "append":
+            code, typ = arg_values[0]
+            return self.builder_append(obj_code, code, typ), "void"
+        if method_name == "to_string":
+            return self.arena_string(f"forge_arena_strdup({obj_code}.data)"), "string"
+        if method_name in ("clear", "free"):
+            return f"string_builder_{method_name}(&{obj_code})", "void"
+        raise Exception(f"StringBuilder does not support '{method_name}'")
+
+    # --- Hash maps ---
+
+    def map_key_value(self, map_type):
+        # "map:string:int" -> ("string", "int"); None for anything that is not a map
+        if isinstance(map_type, str) and map_type.startswith("map:"):
+            key, _, value = map_type[len("map:"):].partition(":")
+            return key, value
+        return None
+
+    def map_runtime(self, map_type):
+        # (C type, runtime function prefix) of a map
+        key, value = self.map_key_value(map_type)
+        (key_type, key_prefix), (value_type, value_prefix) = MAP_KEYS[key], MAP_VALUES[value]
+        return f"{key_type}{value_type}Map", f"{key_prefix}_{value_prefix}_map"
+
+    def map_type_of(self, key_kinds, value_kinds):
+        # Forge map type for these key and value types, or None if map.h has no such map
+        key = self.common_type(key_kinds)
+        if key in ("int", "bool"):
+            key = "int"
+        value = self.common_type(value_kinds)
+        if value == "bool":
+            value = "int"
+        elif value in ("address", "handle") or (value and value.startswith("&")):
+            value = "pointer"
+        if key not in MAP_KEYS or value not in MAP_VALUES:
+            return None
+        return f"map:{key}:{value}"
+
+    def infer_map_type(self, name, entries):
+        # Key and value types for `let name = @{...}`, taken from the literal's
+        # entries and the .set(k, v) calls later in the same block
+        local_types = {}
+        key_kinds = [self.static_type(key, local_types) for key, _ in entries]
+        value_kinds = [self.static_type(value, local_types) for _, value in entries]
+        for node in walk_scope(self.following_statements()):
+            if isinstance(node, LetStatement):
+                if node.name == name:
+                    break
+                local_types[node.name] = node.type_hint or self.static_type(node.expr, local_types)
+            elif isinstance(node, CallExpr):
+                func = node.func
+                if (isinstance(func, MemberAccess) and isinstance(func.obj, Identifier)
+                        and func.obj.name == name and func.name == "set" and len(node.args) == 2):
+                    key_kinds.append(self.static_type(node.args[0], local_types))
+                    value_kinds.append(self.static_type(node.args[1], local_types))
+        map_type = self.map_type_of(key_kinds, value_kinds)
+        if map_type is None and not entries:
+            raise Exception(f"Cannot infer the key and value types of map '{name}': "
+                            f"give it an entry or .set(...) it in the same block")
+        return map_type
+
+    def gen_MapLiteral(self, expr):
+        entries = [(self.gen_expr(key), self.gen_expr(value)) for key, value in expr.entries]
+        map_type = expr._forced_type_hint or self.map_type_of(
+            [key_type for (_, key_type), _ in entries], [value_type for _, (_, value_type) in entries]
+        )
+        if map_type is None:
+            raise Exception("Map keys must all be ints or all strings, and values one of int, float, "
+                            "string or pointer")
+        c_type, prefix = self.map_runtime(map_type)
+        temp_name = self.new_temp()
+        self.body_lines.append(f"{c_type} {temp_name} = {prefix}_create();")
+        for (key_code, _), (value_code, _) in entries:
+            self.body_lines.append(f"{prefix}_set(&{temp_name}, {key_code}, {self.persist(value_code)});")
+        return temp_name, map_type
+
+    def gen_map_method(self, obj_code, obj_type, method_name, args):
+        key, value = self.map_key_value(obj_type)
+        _, prefix = self.map_runtime(obj_type)
+        if method_name == "set":
+            return f"{prefix}_set(&{obj_code}, {args[0]}, {self.persist(args[1])})", "void"
+        elif method_name == "get":
+            return f"{prefix}_get(&{obj_code}, {args[0]})", value
+        elif method_name in ("has", "delete"):
+            return f"{prefix}_{method_name}(&{obj_code}, {args[0]})", "bool"
+        elif method_name == "free":
+            return f"{prefix}_free(&{obj_code})", "void"
+        elif method_name in ("keys", "values"):
+            # Copy out in slot order into the matching list type
+            list_forge_type = self.typed_list_type(key if method_name == "keys" else value)
+            list_type, list_prefix = self.list_runtime(list_forge_type)
+            field = "key" if method_name == "keys" else "value"
+            tmp = self.new_temp()
+            slot = self.new_temp()
+            self.body_lines.append(f"{list_type} {tmp} = {list_prefix}_create();")
+            self.body_lines.append(
+                f"for (int {slot} = {prefix}_next(&{obj_code}, -1); {slot} >= 0; "
+                f"{slot} = {prefix}_next(&{obj_code}, {slot})) "
+                f"{list_prefix}_add(&{tmp}, {obj_code}.slots[{slot}].{field});"
+            )
+            return tmp, list_forge_type
+        raise Exception(f"Maps do not support '{method_name}'")
+
+    def gen_SubscriptExpr(self, expr):
+        target_type = self.get_expr_type(expr.target)
+        target_code, _ = self.gen_expr(expr.target)
+        index_code, _ = self.gen_expr(expr.index)
+
+        is_value = (
+            isinstance(expr.target, Identifier)
+            and self.get_type(expr.target.name) == "array_value"
+        )
+        if self.normalize_type(target_type) in {"array", "array_value"}:
+            if (isinstance(expr.target, Identifier) and isinstance(expr.index, Identifier)
+                    and (expr.target.name, expr.index.name) in self.in_bounds):
+                data = f"{target_code}.data" if is_value else f"{target_code}->data"
+                return f"((int*){data})[{index_code}]", "int"
+            if is_value:
+                target_code = f"&{target_code}"
+            return f"*(int*)array_get({target_code}, {index_code})", "int"
 
-            for el in expr.elements:
-                el_code, _ = self.gen_expr(el)
-                self.body_lines.append(f"{add_func}(&{temp_name}, {el_code});")
+        
+        codegen_log.debug("Subscript target: %s, Type: %s, Index: %s", target_code, target_type, index_code)
 
-            return temp_name, result_type
+        if self.normalize_type(target_type) == "list":
+            if self.get_type(target_code) == "string":
+                return f"list_get_str(&{target_code}, {index_code})", "string"
+            return f"{target_code}.items[{index_code}]", "int"
+        
+        elif self.list_element_type(target_type):
+            return f"{target_code}.items[{index_code}]", self.list_element_type(target_type)
+        elif self.map_key_value(target_type):
+            return self.gen_map_method(target_code, target_type, "get", [index_code])
+        elif self.normalize_type(target_type) == "StringList":
+            return f"{target_code}.items[{index_code}]", "string"
+        elif self.normalize_type(target_type) == "TokenList" :
+            return f"token_list_get(&{target_code}, {index_code})", "Token"
 
 
 
-        elif isinstance(expr, SubscriptExpr):
-            target_type = self.get_expr_type(expr.target)
-            target_code, _ = self.gen_expr(expr.target)
-            index_code, _ = self.gen_expr(expr.index)
-
+        elif self.normalize_type(target_type) in {"array", "array_value"}:
+            # Check if the target is a value (declared as Array) vs a pointer (Array*)
             is_value = (
                 isinstance(expr.target, Identifier)
                 and self.get_type(expr.target.name) == "array_value"
             )
-            if self.normalize_type(target_type) in {"array", "array_value"}:
-                if is_value:
-                    target_code = f"&{target_code}"
-                return f"*(int*)array_get({target_code}, {index_code})", "int"
-
-            
-            print(f"[DEBUG] Subscript target: {target_code}, Type: {target_type}, Index: {index_code}")
-
-            if self.normalize_type(target_type) == "list":
-                if self.get_type(target_code) == "string":
-                    return f"list_get_str(&{target_code}, {index_code})", "string"
-                return f"{target_code}.items[{index_code}]", "int"
-            
-            elif self.normalize_type(target_type) == "StringList":
-                return f"{target_code}.items[{index_code}]", "string"
-            elif self.normalize_type(target_type) == "TokenList" :
-                return f"token_list_get(&{target_code}, {index_code})", "Token"
-
-
-
-            elif self.normalize_type(target_type) in {"array", "array_value"}:
-                # Check if the target is a value (declared as Array) vs a pointer (Array*)
-                is_value = (
-                    isinstance(expr.target, Identifier)
-                    and self.get_type(expr.target.name) == "array_value"
-                )
-                if is_value:
-                    target_code = f"&{target_code}"
-                return f"*(int*)array_get({target_code}, {index_code})", "int"
-
-
-            elif self.normalize_type(target_type) == "string":
-                tmp = self.new_temp()
-                self.body_lines.append(f"char {tmp} = {target_code}[{index_code}];")
-                return tmp, "char"
-
-            else:
-                if isinstance(expr.target, Identifier):
-                    name = expr.target.name
-                    current_type = self.get_type(name)
-                    if not current_type or current_type == "int":
-                        print(f"[INFO] Inferring '{name}' as 'array' due to subscript")
-                        self.declare_var(name, "array")
-                        return f"*(int*)array_get({target_code}, {index_code})", "int"
+            if is_value:
+                target_code = f"&{target_code}"
+            return f"*(int*)array_get({target_code}, {index_code})", "int"
 
-                raise Exception(f"Cannot subscript non-list/array: {target_type}")
-
-
-        elif isinstance(expr, UnaryExpr):
-            operand_code, _ = self.gen_expr(expr.operand)
-
-            if expr.op == "-":
-                return f"-({operand_code})", "int"
-            elif expr.op == "!":
-                return f"!({operand_code})", "bool"
-            else:
-                raise Exception(f"Unsupported unary operator: {expr.op}")
-            
-        elif isinstance(expr, ArrayLiteral):
-            if not expr.elements:
-                raise Exception("Cannot infer type for empty array")
-
-            # Generate all elements
-            element_exprs = []
-            temp_vars = []
-            for i, el in enumerate(expr.elements):
-                code, el_type = self.gen_expr(el)
-                temp_var = self.new_temp()
-                temp_vars.append(temp_var)
-                if 'func_name' in locals():
-                    print(f"[DEBUG] func_name = {func_name}")
-                    print(f"[DEBUG] function_types.get(func_name) = {self.function_types.get(func_name)}")
-                    ret_type = self.function_types.get(func_name, "int")
-                else:
-                    print(f"[DEBUG] Inferred element type: {el_type}")
-                    ret_type = el_type
-
-                self.body_lines.append(f"{ret_type} {temp_var} = {code};")
-                element_exprs.append(temp_var)
-
-            # Infer type from the first element
-            first_code, first_type = self.gen_expr(expr.elements[0])
-            array_type = self.map_type(first_type)
-
-            temp_array = self.new_temp()
-            array_init = f"Array {temp_array} = array_create(sizeof({array_type}), {len(element_exprs)});"
-
-            self.body_lines.append(array_init)
-
-            # Populate the array
-            for i, temp_var in enumerate(temp_vars):
-                self.body_lines.append(f"array_set(&{temp_array}, {i}, &{temp_var});")
-
-            return temp_array, "array_value"
-        
 
-        elif isinstance(expr, AttemptRescueExpr):
-            expr_key = id(expr)
-            if not hasattr(self, "_attempt_expr_cache"):
-                self._attempt_expr_cache = {}
-
-            if expr_key in self._attempt_expr_cache:
-                return self._attempt_expr_cache[expr_key], "int"
-
-            result_var = self.new_temp("attempt_result")
-            guard_var = self.new_temp("attempt_guard")
-            exit_label = self.new_temp("attempt_exit")
-
-            self._attempt_expr_cache[expr_key] = result_var
+        elif self.normalize_type(target_type) == "string":
+            tmp = self.new_temp()
+            self.body_lines.append(f"char {tmp} = {target_code}[{index_code}];")
+            return tmp, "char"
 
-            # Declare result early
-            self.body_lines.append(f"int {result_var};")
-            self.body_lines.append(f"static int {guard_var} = 0;")
-            self.body_lines.append(f"if (!{guard_var}) {{")
-            self.indent_level += 1
-            self.body_lines.append(f"{guard_var} = 1;")
-            self.body_lines.append(f"if (!setjmp(__context.env)) {{")
-            self.indent_level += 1
+        else:
+            if isinstance(expr.target, Identifier):
+                name = expr.target.name
+                current_type = self.get_type(name)
+                if not current_type or current_type == "int":
+                    types_log.info("Inferring '%s' as 'array' due to subscript", name)
+                    self.declare_var(name, "array")
+                    return f"*(int*)array_get({target_code}, {index_code})", "int"
+
+            raise Exception(f"Cannot subscript non-list/array: {target_type}")
+
+    def gen_UnaryExpr(self, expr):
+        operand_code, _ = self.gen_expr(expr.operand)
+
+        if expr.op == "-":
+            return f"-({operand_code})", "int"
+        elif expr.op == "!":
+            return f"!({operand_code})", "bool"
+        else:
+            raise Exception(f"Unsupported unary operator: {expr.op}")
+
+    def gen_ArrayLiteral(self, expr):
+        if not expr.elements:
+            raise Exception("Cannot infer type for empty array")
+
+        # Each element is generated once; the first one's type is the array's
+        values = [self.gen_expr(el) for el in expr.elements]
+        array_type = self.map_type(values[0][1])
+        count = len(values)
+        codes = ", ".join(code for code, _ in values)
+
+        temp_array = self.new_temp()
+        self.body_lines.append(f"Array {temp_array} = array_create(sizeof({array_type}), {count});")
+        if all(self.is_constant(el) for el in expr.elements):
+            # All constants: the contents live in a static table and are copied in one go
+            table = self.new_temp("array_data")
+            self.body_lines.append(f"static const {array_type} {table}[{count}] = {{{codes}}};")
+            self.body_lines.append(f"memcpy({temp_array}.data, {table}, sizeof({table}));")
+        else:
+            self.body_lines.append(
+                f"memcpy({temp_array}.data, ({array_type}[{count}]){{{codes}}}, sizeof({array_type}[{count}]));"
+            )
 
-            saved_lines = self.code
-            self.code = []
-            try_expr_code, _ = self.gen_expr(expr.try_expr)
-            try_block = self.code
-            self.code = saved_lines
-            self.body_lines.extend(try_block)
-            self.body_lines.append(f"{result_var} = {try_expr_code};")
-            self.body_lines.append(f"goto {exit_label};")
+        return temp_array, "array_value"
 
-            self.indent_level -= 1
-            self.body_lines.append("} else {")
-            self.indent_level += 1
+    def is_constant(self, expr):
+        # Number and string literals, and negated numbers: valid static initializers
+        if isinstance(expr, UnaryExpr) and expr.op == "-":
+            return isinstance(expr.operand, NumberLiteral)
+        return isinstance(expr, (NumberLiteral, StringLiteral))
 
-            saved_lines = self.code
-            self.code = []
-            rescue_expr_code, _ = self.gen_expr(expr.rescue_expr)
-            rescue_block = self.code
-            self.code = saved_lines
-            self.body_lines.extend(rescue_block)
-            self.body_lines.append(f"{result_var} = {rescue_expr_code};")
-            self.body_lines.append(f"goto {exit_label};")
+    def gen_AttemptRescueExpr(self, expr):
+        expr_key = id(expr)
+        if not hasattr(self, "_attempt_expr_cache"):
+            self._attempt_expr_cache = {}
 
-            self.indent_level -= 1
-            self.body_lines.append("}")
-            self.indent_level -= 1
-            self.body_lines.append("}")
-            self.body_lines.append(f"{exit_label}:;")
+        if expr_key in self._attempt_expr_cache:
+            return self._attempt_expr_cache[expr_key], "int"
 
-            return result_var, "int"
+        result_var = self.new_temp("attempt_result")
+        guard_var = self.new_temp("attempt_guard")
+        exit_label = self.new_temp("attempt_exit")
 
+        self._attempt_expr_cache[expr_key] = result_var
 
+        # Declare result early
+        depth = self.new_temp("lines_depth")
+        self.body_lines.append(f"int {result_var};")
+        self.body_lines.append(f"int {depth} = forge_lines_depth;")
+        self.body_lines.append(f"static int {guard_var} = 0;")
+        self.body_lines.append(f"if (!{guard_var}) {{")
+        self.indent_level += 1
+        self.body_lines.append(f"{guard_var} = 1;")
+        self.body_lines.append(f"if (!setjmp(__context.env)) {{")
+        self.indent_level += 1
 
+        saved_lines = self.code
+        self.code = []
+        try_expr_code, _ = self.gen_expr(expr.try_expr)
+        try_block = self.code
+        self.code = saved_lines
+        self.body_lines.extend(try_block)
+        self.body_lines.append(f"{result_var} = {try_expr_code};")
+        self.body_lines.append(f"goto {exit_label};")
+
+        self.indent_level -= 1
+        self.body_lines.append("} else {")
+        self.indent_level += 1
+        self.body_lines.append(f"forge_lines_close_to({depth});")
+
+        saved_lines = self.code
+        self.code = []
+        rescue_expr_code, _ = self.gen_expr(expr.rescue_expr)
+        rescue_block = self.code
+        self.code = saved_lines
+        self.body_lines.extend(rescue_block)
+        self.body_lines.append(f"{result_var} = {rescue_expr_code};")
+        self.body_lines.append(f"goto {exit_label};")
 
-        elif isinstance(expr, StructInstance):
-            struct_name = expr.struct_name
-            tmp = self.new_temp()
+        self.indent_level -= 1
+        self.body_lines.append("}")
+        self.indent_level -= 1
+        self.body_lines.append("}")
+        self.body_lines.append(f"{exit_label}:;")
 
-            field_values = [self.gen_expr(arg)[0] for arg in expr.args]
+        return result_var, "int"
 
-            # Skip needing struct_def.fields — hardcode fields in order for now
-            # You could make a fallback if you're not storing struct_defs
-            assignments = []
-            for i, val_code in enumerate(field_values):
-                assignments.append(f"{tmp}.field{i} = {val_code};")  # temp fallback if you don’t track fields
+    def gen_StructInstance(self, expr):
+        struct_name = expr.struct_name
+        tmp = self.new_temp()
 
-            self.body_lines.append(f"{struct_name} {tmp};")
-            self.body_lines.extend(assignments)
+        field_values = [self.persist(self.gen_expr(arg)[0]) for arg in expr.args]
 
-            return tmp, struct_name
+        # Skip needing struct_def.fields — hardcode fields in order for now
+        # You could make a fallback if you're not storing struct_defs
+        assignments = []
+        for i, val_code in enumerate(field_values):
+            assignments.append(f"{tmp}.field{i} = {val_code};")  # temp fallback if you don’t track fields
 
+        self.body_lines.append(f"{struct_name} {tmp};")
+        self.body_lines.extend(assignments)
 
+        return tmp, struct_name
 
-        elif isinstance(expr, CallExpr):
-            return self.gen_CallExpr(expr)  # DELEGATE HERE
-        
-        elif isinstance(expr, PropertyAccess):
-            obj_code, obj_type = self.gen_expr(expr.object)
-            prop = expr.prop
-
-            # Try to resolve from struct fields
-            struct_def = self.struct_defs.get(obj_type)
-            if struct_def:
-                for field_name, field_type in struct_def.fields:
-                    if field_name == prop:
-                        return f"{obj_code}.{prop}", field_type
-
-            # Fallback: return as unknown
-            print(f"[WARN] Could not resolve property type: {obj_type}.{prop}")
-            return f"{obj_code}.{prop}", "unknown"
-        # optionally resolve actual type later
+    def gen_PropertyAccess(self, expr):
+        obj_code, obj_type = self.gen_expr(expr.object)
+        prop = expr.prop
 
-        
-
-
-        else:
-            raise NotImplementedError(f"Unsupported expression type: {type(expr).__name__}")
+        # Try to resolve from struct fields
+        struct_def = self.struct_defs.get(obj_type)
+        if struct_def:
+            for field_name, field_type in struct_def.fields:
+                if field_name == prop:
+                    return f"{obj_code}.{prop}", field_type
 
+        # Fallback: return as unknown
+        types_log.warn("Could not resolve property type: %s.%s", obj_type, prop)
+        return f"{obj_code}.{prop}", "unknown"
 
     def gen_ExpressionStatement(self, node):
         if isinstance(node.expr, Assignment):
@@ -1573,40 +2622,139 @@ class CTranspiler:
     #         "EQEQ": "==", "NEQ": "!=", "LT": "<", "GT": ">", "LTE": "<=", "GTE": ">=",
     #     }.get(op, op)
 
+    # Node class -> handler, so dispatch is one dict lookup instead of an isinstance chain
+    STATEMENT_HANDLERS = {
+        Program: gen_Program,
+        LetStatement: gen_LetStatement,
+        ExpressionStatement: gen_ExpressionStatement,
+        Assignment: gen_Assignment,
+        FunctionDef: gen_FunctionDef,
+        ReturnStatement: gen_ReturnStatement,
+        IfExpr: gen_IfExpr,
+        WhileLoop: gen_WhileLoop,
+        ForStatement: gen_ForStatement,
+        ForInStatement: gen_ForInStatement,
+        BreakStatement: gen_BreakStatement,
+        StructDef: gen_StructDef,
+        AttemptRescue: gen_AttemptRescue,
+        LoadStmt: gen_LoadStmt,
+        CallExpr: gen_CallExpr,
+    }
+
+    EXPR_HANDLERS = {
+        BinaryExpr: gen_BinaryExpr,
+        CallExpr: gen_CallExpr,
+        Identifier: gen_Identifier,
+        NumberLiteral: gen_NumberLiteral,
+        StringLiteral: gen_StringLiteral,
+        MemberAccess: gen_MemberAccess,
+        PropertyAccess: gen_PropertyAccess,
+        SubscriptExpr: gen_SubscriptExpr,
+        UnaryExpr: gen_UnaryExpr,
+        ListLiteral: gen_ListLiteral,
+        MapLiteral: gen_MapLiteral,
+        ArrayLiteral: gen_ArrayLiteral,
+        AddressOf: gen_AddressOf,
+        NullLiteral: gen_NullLiteral,
+        ExternExpr: gen_ExternExpr,
+        AttemptRescueExpr: gen_AttemptRescueExpr,
+        StructInstance: gen_StructInstance,
+    }
+
 
 
 # Entry point
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python transpile_to_c.py <source.forge>")
+    ap = argparse.ArgumentParser(description="Transpile a Forge program to C, compile and run it")
+    ap.add_argument("source", help="Forge source file")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                    help="worker processes for parsing loaded modules and compiling --separate units "
+                         "(default: all cores; parsing starts them only for large uncached module graphs)")
+    ap.add_argument("--separate", action="store_true",
+                    help="compile each module to its own cached object file under build/ and link")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                    help=f"gcc build profile (default: {DEFAULT_PROFILE})")
+    ap.add_argument("--train", action="append", default=[], metavar="FILE",
+                    help="stdin for a pgo training run; repeat for several runs")
+    ap.add_argument("--force", action="store_true",
+                    help="rebuild even if the build manifest says nothing changed")
+    ap.add_argument("--in-process", action="store_true",
+                    help="build a cached shared library and run it inside this process instead of ./output")
+    ap.add_argument("--trace", help='trace levels, e.g. "debug" or "types=debug,parser=info"')
+    ap.add_argument("--trace-json", help="append trace records to this file as JSON lines")
+    args = ap.parse_args()
+    if args.profile == "pgo" and args.separate:
+        ap.error("the pgo profile builds a single translation unit; drop --separate")
+    if args.in_process and (args.separate or args.profile == "pgo"):
+        ap.error("--in-process builds one shared library; drop --separate and use a non-pgo profile")
+
+    if args.trace or args.trace_json:
+        forge_trace.configure(
+            args.trace or os.environ.get("FORGE_TRACE"),
+            args.trace_json or os.environ.get("FORGE_TRACE_JSON"),
+        )
+
+    filename = args.source
+    if args.in_process:
+        # Imported here: native imports this module
+        from native import load_library
+        try:
+            library = load_library(filename, args.profile, jobs=args.jobs)
+        except subprocess.CalledProcessError:
+            print("Compilation failed")
+            return
+        print("Running program:")
+        library.run()
         return
 
-    filename = sys.argv[1]
-    with open(filename) as f:
-        source = f.read()
-
-    # Transpile
-    tokens = Lexer(source).tokenize()
-    ast = Parser(tokens).parse()
-    transpiler = CTranspiler()
-    c_code = transpiler.gen_Program(ast)
-
-    # Write output.c
-    with open("output.c", "w") as out:
-        out.write(c_code)
-        print("Transpiled to output.c")
-
-    # Compile with gcc
     executable = "output.exe" if platform.system() == "Windows" else "./output"
-    compile_cmd = ["gcc", "-Iincludes", "output.c", "-o", "output"]
-
-
-    try:
-        subprocess.run(compile_cmd, check=True)
-        print("Compiled to 'output'")
-    except subprocess.CalledProcessError:
-        print("Compilation failed")
-        return
+    cflags = [f"-I{INCLUDES_DIR}"]
+    profile = PROFILES[args.profile]
+    if args.separate:
+        compile_cmd = ["gcc", *cflags, *profile["cflags"], *UNIT_CFLAGS, "-c", "build/*.c", *profile["ldflags"]]
+        outputs = [executable]
+    else:
+        compile_cmd = gcc_command(args.profile, cflags, ["output.c"], "output")
+        outputs = ["output.c", executable]
+    # The manifest compares this list, so training inputs take part through their hashes
+    manifest_cmd = compile_cmd + [f"train:{path}:{file_digest(path)}" for path in args.train]
+
+    # Skip the transpile + gcc steps if no input changed since the last build
+    transpiler = CTranspiler(jobs=args.jobs)
+    manifest = BuildManifest("output.manifest.json")
+    if not args.force and manifest.is_current(
+        filename, transpiler.module_search_paths, manifest_cmd, outputs
+    ):
+        print("Up to date: 'output'")
+    else:
+        with open(filename) as f:
+            source = f.read()
+
+        # Transpile
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        manifest.invalidate()
+        try:
+            if args.separate:
+                units = transpiler.gen_Units(ast)
+                print(f"Transpiled to {len(units)} files in build/")
+                compiled = build_units(units, "build", cflags + profile["cflags"], "output",
+                                       jobs=args.jobs, ldflags=profile["ldflags"])
+                print(f"Compiled {compiled} of {len(units) - 1} units, linked 'output'")
+            else:
+                c_code = transpiler.program_code(ast)
+
+                # Write output.c, streamed from the code tree
+                with open("output.c", "w") as out:
+                    c_code.write_to(out)
+                    print("Transpiled to output.c")
+
+                # Compile with gcc
+                build_program(args.profile, compile_cmd, executable, args.train)
+                print(f"Compiled to 'output' ({args.profile})")
+        except subprocess.CalledProcessError:
+            print("Compilation failed")
+            return
+        manifest.store(filename, transpiler.module_files, transpiler.module_search_paths, manifest_cmd)
 
     # Run the output program
     print("Running program:")
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import forge_trace
+from build_manifest import INCLUDES_DIR, digest_files
+from module_cache import default_cache_dir
+
+build_log = forge_trace.channel("build")
+
+# === Separate Compilation ===
+#
+# CTranspiler.gen_Units splits a program into one C file per loaded module
+# plus main.c, sharing one generated header. Each unit is compiled to an
+# object on its own, and objects are cached on disk by the hash of everything
+# that can change them: the unit, the shared header, the runtime headers and
+# the compile flags. Editing one module therefore recompiles that module's
+# unit (plus any unit whose view of the header changed) and relinks.
+
+UNIT_CFLAGS = ["-DFORGE_SEPARATE_UNITS"]
+
+
+class ObjectCache:
+    def __init__(self, cache_dir=None, enabled=True):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "objects")
+        self.enabled = enabled and os.environ.get("FORGE_NO_CACHE") is None
+
+    def key(self, cflags, unit_source, header_source, runtime):
+        h = hashlib.sha256()
+        h.update(repr(list(cflags)).encode())
+        h.update(repr(sorted(runtime.items())).encode())
+        h.update(b"\0" + header_source.encode() + b"\0")
+        h.update(unit_source.encode())
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".o")
+
+
+def write_if_changed(path, text):
+    try:
+        with open(path) as f:
+            if f.read() == text:
+                return
+    except OSError:
+        pass
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def compile_unit(cflags, source_path, object_path):
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    # Compile next to the target and rename so a failed or concurrent build never leaves half an object
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(object_path), suffix=".o.tmp")
+    os.close(fd)
+    try:
+        subprocess.run(["gcc", *cflags, "-c", source_path, "-o", tmp_path], check=True)
+        os.replace(tmp_path, object_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def build_units(units, build_dir, cflags, output, jobs=1, object_cache=None, includes_dir=INCLUDES_DIR,
+                ldflags=()):
+    # Compiles every unit not already in the object cache, then links; raises CalledProcessError
+    object_cache = object_cache or ObjectCache()
+    os.makedirs(build_dir, exist_ok=True)
+    for name, text in units.items():
+        write_if_changed(os.path.join(build_dir, name), text)
+
+    cflags = list(cflags) + UNIT_CFLAGS + ["-I", build_dir]
+    header_source = "".join(text for name, text in sorted(units.items()) if name.endswith(".h"))
+    runtime = digest_files(os.path.join(includes_dir, "*.h"))
+
+    objects = []
+    stale = []
+    for name, text in sorted(units.items()):
+        if not name.endswith(".c"):
+            continue
+        source_path = os.path.join(build_dir, name)
+        if object_cache.enabled:
+            key = object_cache.key(cflags, text, header_source, runtime)
+            object_path = object_cache.path(key)
+            if not os.path.exists(object_path):
+                stale.append((source_path, object_path))
+        else:
+            object_path = os.path.join(build_dir, name[:-2] + ".o")
+            stale.append((source_path, object_path))
+        objects.append(object_path)
+
+    build_log.info("%d of %d units need compiling", len(stale), len(objects))
+    if stale:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(stale)))) as pool:
+            for future in [pool.submit(compile_unit, cflags, src, obj) for src, obj in stale]:
+                future.result()
+
+    subprocess.run(["gcc", *objects, "-o", output, *ldflags], check=True)
+    return len(stale)